@@ -1,8 +1,13 @@
 """NLP tools for qualifications and distinctions."""
 
-from .api import get_name, ground
+from .api import annotate, annotate_many, get_name, ground, ground_arrow, ground_series, preload
 
 __all__ = [
+    "annotate",
+    "annotate_many",
     "get_name",
     "ground",
+    "ground_arrow",
+    "ground_series",
+    "preload",
 ]
@@ -0,0 +1,171 @@
+"""Find mentions of qualifications in free text.
+
+All labels and synonyms are compiled into a single `Aho-Corasick
+<https://en.wikipedia.org/wiki/Aho%E2%80%93Corasick_algorithm>`_ automaton, so every
+mention in a text is found in one pass over its characters, no matter how many
+synonyms there are. Overlapping mentions are resolved by taking the leftmost and then
+the longest, e.g., in ``PhD in Chemistry``, the span for ``PhD in Chemistry`` wins over
+the one for ``PhD`` if both are synonyms.
+"""
+
+from collections.abc import Iterable
+from functools import lru_cache
+
+import ssslm
+from curies import NamableReference
+from curies.vocabulary import has_label
+
+__all__ = [
+    "Automaton",
+    "get_automaton",
+]
+
+#: Texts shorter than this are only matched if they have the same case or if the
+#: mention is written like an abbreviation with several capital letters, since many
+#: abbreviations are also common words, e.g., ``me`` for master of engineering
+SHORT_LENGTH = 4
+
+
+def _normalize(text: str) -> str:
+    """Casefold a text, keeping character offsets the same."""
+    return "".join(
+        lowered if len(lowered := char.lower()) == 1 else char
+        for char in text.replace("’", "'")  # noqa:RUF001
+    )
+
+
+class Automaton:
+    """An automaton that finds all labels and synonyms in a text."""
+
+    def __init__(self, literal_mappings: Iterable[ssslm.LiteralMapping]) -> None:
+        """Build the automaton.
+
+        :param literal_mappings: The literal mappings to search for. If several have
+            the same text, labels are preferred over synonyms and otherwise the first
+            one is used.
+        """
+        # each state is a dictionary of transitions. States with an output have the
+        # index of a pattern, and dictionary links point to the next state that does.
+        self._transitions: list[dict[str, int]] = [{}]
+        self._outputs: list[int] = [-1]
+        self._patterns: list[tuple[str, NamableReference, bool]] = []
+        is_label: list[bool] = []
+        for literal_mapping in literal_mappings:
+            text = literal_mapping.text.strip()
+            if not text:
+                continue
+            state = 0
+            for char in _normalize(text):
+                next_state = self._transitions[state].get(char)
+                if next_state is None:
+                    next_state = self._transitions[state][char] = len(self._transitions)
+                    self._transitions.append({})
+                    self._outputs.append(-1)
+                state = next_state
+            candidate = (
+                text,
+                literal_mapping.reference,
+                len(text) < SHORT_LENGTH,
+            )
+            label = literal_mapping.predicate == has_label
+            output = self._outputs[state]
+            if output < 0:
+                self._outputs[state] = len(self._patterns)
+                self._patterns.append(candidate)
+                is_label.append(label)
+            elif label and not is_label[output]:
+                self._patterns[output] = candidate
+                is_label[output] = True
+        self._build_links()
+
+    def _build_links(self) -> None:
+        """Add failure and dictionary links with a breadth-first traversal."""
+        self._failures = [0] * len(self._transitions)
+        self._links = [-1] * len(self._transitions)
+        frontier = list(self._transitions[0].values())
+        while frontier:
+            next_frontier = []
+            for state in frontier:
+                for char, child in self._transitions[state].items():
+                    failure = self._failures[state]
+                    while failure and char not in self._transitions[failure]:
+                        failure = self._failures[failure]
+                    self._failures[child] = self._transitions[failure].get(char, 0)
+                    target = self._failures[child]
+                    self._links[child] = (
+                        target if self._outputs[target] >= 0 else self._links[target]
+                    )
+                    next_frontier.append(child)
+            frontier = next_frontier
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def annotate(self, text: str) -> list[ssslm.Annotation]:
+        """Find non-overlapping mentions in a text.
+
+        :param text: The text to search
+        :returns: Annotations in the order they appear in the text. Mentions have to
+            start and end on word boundaries.
+        """
+        spans: list[tuple[int, int, int]] = []
+        transitions, failures, outputs, links = (
+            self._transitions,
+            self._failures,
+            self._outputs,
+            self._links,
+        )
+        state = 0
+        for end, char in enumerate(_normalize(text), start=1):
+            while state and char not in transitions[state]:
+                state = failures[state]
+            state = transitions[state].get(char, 0)
+            match_state = state if outputs[state] >= 0 else links[state]
+            while match_state >= 0:
+                pattern = outputs[match_state]
+                start = end - len(self._patterns[pattern][0])
+                if self._accepts(text, start, end, pattern):
+                    spans.append((start, end, pattern))
+                match_state = links[match_state]
+
+        rv = []
+        position = 0
+        for start, end, pattern in sorted(spans, key=lambda span: (span[0], -span[1])):
+            if start < position:
+                continue
+            position = end
+            reference = self._patterns[pattern][1]
+            rv.append(
+                ssslm.Annotation(
+                    text=text,
+                    start=start,
+                    end=end,
+                    match=ssslm.Match(reference=reference, score=1.0),
+                )
+            )
+        return rv
+
+    def _accepts(self, text: str, start: int, end: int, pattern: int) -> bool:
+        """Check a mention is on word boundaries, and looks like an abbreviation if it's short."""
+        if start > 0 and text[start - 1].isalnum() and text[start].isalnum():
+            return False
+        if end < len(text) and text[end].isalnum() and text[end - 1].isalnum():
+            return False
+        pattern_text, _, short = self._patterns[pattern]
+        if not short:
+            return True
+        mention = text[start:end]
+        if mention == pattern_text and not mention.islower():
+            return True
+        return sum(char.isupper() for char in mention) > 1
+
+
+@lru_cache
+def get_automaton() -> Automaton:
+    """Get an automaton over the ontology's labels and synonyms."""
+    from qualo.data import get_literal_mappings
+    from qualo.profiling import stage
+
+    literal_mappings = get_literal_mappings()
+    with stage("make_automaton"):
+        return Automaton(literal_mappings)
@@ -1,35 +1,42 @@
 """Generation of the ontology."""
 
-import datetime
+import gc
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import AbstractContextManager, nullcontext
 from textwrap import dedent
+from typing import TYPE_CHECKING
 
+import numpy as np
+import pandas as pd
 import regex
 import ssslm
 from curies import NamableReference, NamedReference, Reference
-from curies.vocabulary import charlie, has_exact_synonym
 
+from qualo.annotate import get_automaton
 from qualo.constants import ROOT
 from qualo.data import (
     PREFIX,
     REPOSITORY,
-    add_discipline,
-    add_synonym,
-    append_term,
     get_grounder,
     get_names,
+    get_term_table,
 )
-from qualo.prefixes import (
-    BACHELOR_OF_ARTS_PREFIXES,
-    BACHELOR_OF_SCIENCE_PREFIXES,
-    BACHELOR_PREFIXES,
-    MASTER_PREFIXES,
-    MSC_PREFIXES,
-    PHD_PREFIXES,
-)
+from qualo.expand import DisciplineRequest, plan_expansion
+from qualo.fuzzy import get_approximate_index
+from qualo.profiling import stage
+
+if TYPE_CHECKING:
+    import pyarrow
 
 __all__ = [
+    "annotate",
+    "annotate_many",
     "get_name",
     "ground",
+    "ground_arrow",
+    "ground_series",
+    "preload",
 ]
 
 URI_PREFIX = f"https://w3id.org/{PREFIX.lower()}/"
@@ -40,6 +47,8 @@ EXPORT_TTL_PATH = EXPORT_DIR.joinpath(PREFIX.lower()).with_suffix(".ttl")
 EXPORT_OWL_PATH = EXPORT_DIR.joinpath(PREFIX.lower()).with_suffix(".owl")
 EXPORT_OFN_PATH = EXPORT_DIR.joinpath(PREFIX.lower()).with_suffix(".ofn")
 EXPORT_OBO_PATH = EXPORT_DIR.joinpath(PREFIX.lower()).with_suffix(".obo")
+EXPORT_SQLITE_PATH = EXPORT_DIR.joinpath(PREFIX.lower()).with_suffix(".db")
+EXPORT_TABLES_DIR = EXPORT_DIR.joinpath("tables")
 
 DOCS_DIR = ROOT.joinpath("docs")
 
@@ -102,102 +111,246 @@ def get_name(reference: str | Reference) -> str:
     return names[reference]  # type:ignore[index]
 
 
-def ground(text: str) -> NamableReference | None:
-    """Ground a qualification to the CURIE."""
-    grounder = get_grounder()
+def ground(
+    text: str,
+    *,
+    language: str | None = None,
+    fallback: Sequence[str] = (),
+    max_distance: int | None = None,
+) -> NamableReference | None:
+    """Ground a qualification to the CURIE.
+
+    :param text: The text to ground
+    :param language: If given, only search labels and synonyms in this language, e.g.,
+        ``it``. Otherwise, all languages are searched at once.
+    :param fallback: Languages to search in order when there's no match in the given
+        language, e.g., ``["en", "und"]`` to try English labels and synonyms, then
+        synonyms without a language
+    :param max_distance: If given, fall back to typo-tolerant matching with up to this
+        many edits when there's no exact match. See :mod:`qualo.fuzzy`.
+    :returns: A reference, if the text could be grounded
+
+    .. code-block:: python
+
+        import qualo
+
+        qualo.ground("Abilitazione scientifica nazionale", language="it", fallback=["en"])
+    """
     text = text.replace("’", "'")  # noqa:RUF001
-    match = grounder.get_best_match(text)
+    match = None
+    for grounder_language in [None] if language is None else [language, *fallback]:
+        grounder = get_grounder(grounder_language)
+        with stage("ground"):
+            match = grounder.get_best_match(text)
+        if match is not None:
+            break
+    if match is None and max_distance:
+        index = get_approximate_index(max_distance)
+        with stage("ground_approximate"):
+            match = index.get_best_match(text)
     if match is None:
         return None
     return match.reference
 
 
-ACADEMIC_DEGREE = NamedReference(
-    prefix=PREFIX, identifier="0000021", name="academic degree by discipline"
-)
+def annotate(text: str) -> list[ssslm.Annotation]:
+    """Find all mentions of qualifications in a text.
+
+    :param text: A free text, e.g., ``PhD in Chemistry (2010), MSc Biology, B.Sc.``
+    :returns: Non-overlapping annotations in the order they appear in the text
+
+    Unlike :func:`ground`, which matches whole texts, this finds labels and synonyms
+    anywhere in the text. See :mod:`qualo.annotate` for details.
+    """
+    automaton = get_automaton()
+    with stage("annotate"):
+        return automaton.annotate(text)
+
+
+def annotate_many(texts: Iterable[str]) -> Iterator[list[ssslm.Annotation]]:
+    """Lazily annotate a stream of texts, e.g., the lines of a large file."""
+    automaton = get_automaton()
+    for text in texts:
+        with stage("annotate"):
+            yield automaton.annotate(text)
+
+
+def ground_series(series: pd.Series, *, processes: int | None = None) -> pd.DataFrame:
+    """Ground a column of qualifications.
+
+    :param series: A series of texts. Missing values and non-string values aren't grounded.
+    :param processes: If given, ground in this many processes
+    :returns: A dataframe with the same index as the series and two categorical
+        columns, ``curie`` and ``label``. These are missing where grounding failed.
+
+    Each distinct text is only grounded once, so the cost depends on the number of
+    distinct texts rather than on the number of rows.
+
+    .. code-block:: python
+
+        import pandas as pd
+        import qualo
+
+        df = pd.DataFrame({"degree": ["PhD", "BSc", "PhD", None]})
+        df = df.join(qualo.ground_series(df["degree"]))
+    """
+    codes, uniques = pd.factorize(series)
+    curie_codes, curies, labels = _ground_unique(list(uniques), processes=processes)
+    # factorize uses -1 for missing values, which is also the code for missing categories.
+    # numpy evaluates both branches, so clip the index (and skip it for all-missing series)
+    if curie_codes.size:
+        codes = np.where(codes < 0, -1, curie_codes[np.maximum(codes, 0)]).astype(np.intp)
+    else:
+        codes = np.full(len(codes), -1, dtype=np.intp)
+    # labels aren't guaranteed to be unique, so they can't share the CURIEs' codes
+    label_values = np.array([*labels, None], dtype=object)[codes]
+    return pd.DataFrame(
+        {
+            "curie": pd.Categorical.from_codes(codes, categories=curies),
+            "label": pd.Categorical(label_values),
+        },
+        index=series.index,
+    )
+
 
-BACHELOR_DEGREE = NamedReference.from_curie(f"{PREFIX}:0000003", "bachelor's degree")
-MASTER_DEGREE = NamedReference.from_curie(f"{PREFIX}:0000004", "master's degree")
-BSC_DEGREE = NamedReference.from_curie(f"{PREFIX}:0000024", "bachelor of science")
-BA_DEGREE = NamedReference.from_curie(f"{PREFIX}:0000031", "bachelor of arts")
-MSC_DEGREE = NamedReference.from_curie(f"{PREFIX}:0000057", "master of science")
-PHD_DEGREE = NamedReference.from_curie(f"{PREFIX}:0000016", "doctor of philosophy")
+def ground_arrow(
+    array: "pyarrow.Array | pyarrow.ChunkedArray", *, processes: int | None = None
+) -> "pyarrow.Table":
+    """Ground an Arrow array of qualifications.
+
+    :param array: An array of strings
+    :param processes: If given, ground in this many processes
+    :returns: A table with two dictionary-encoded columns, ``curie`` and ``label``,
+        in the same order as the array. These are null where grounding failed.
+
+    This requires :mod:`pyarrow` to be installed, e.g., with ``pip install qualo[arrow]``.
+    Like :func:`ground_series`, each distinct text is only grounded once.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    encoded = pc.dictionary_encode(array)
+    curie_codes, curies, labels = _ground_unique(
+        encoded.dictionary.to_pylist(), processes=processes
+    )
+    # nulls in the indices are propagated by take, and ungrounded values become null
+    indices = pc.take(pa.array(curie_codes, mask=curie_codes < 0, type=pa.int32()), encoded.indices)
+    return pa.table(
+        {
+            "curie": pa.DictionaryArray.from_arrays(indices, pa.array(curies, pa.string())),
+            "label": pa.DictionaryArray.from_arrays(indices, pa.array(labels, pa.string())),
+        }
+    )
+
+
+def _ground_unique(
+    values: Sequence[object], *, processes: int | None = None
+) -> tuple[np.ndarray, list[str], list[str]]:
+    """Ground distinct values.
+
+    :returns: A triple of an array with a category code for each value (-1 if it
+        couldn't be grounded), a list of the distinct CURIEs, and a parallel list of
+        their labels
+    """
+    texts = [value if isinstance(value, str) else "" for value in values]
+    with get_executor(processes) as executor:
+        references = ground_many(texts, executor=executor)
+
+    curie_to_code: dict[str, int] = {}
+    curies: list[str] = []
+    labels: list[str] = []
+    codes = np.full(len(references), -1, dtype=np.int32)
+    for i, reference in enumerate(references):
+        if reference is None:
+            continue
+        code = curie_to_code.get(reference.curie)
+        if code is None:
+            code = curie_to_code[reference.curie] = len(curies)
+            curies.append(reference.curie)
+            labels.append(reference.name or reference.curie)
+        codes[i] = code
+    return codes, curies, labels
+
+
+def preload(
+    *, languages: Iterable[str] = (), max_distance: int | None = None, freeze: bool = True
+) -> None:
+    """Build everything needed for grounding and annotation up-front.
+
+    :param languages: Languages to build grounders for, in addition to the grounder
+        over all languages
+    :param max_distance: If given, also build the approximate index for this distance
+    :param freeze: Should everything that's been built be moved out of reach of the
+        garbage collector with :func:`gc.freeze`?
+
+    This is meant to be called in the master process of a prefork server like
+    gunicorn or uwsgi, e.g., in gunicorn's ``on_starting`` hook or with
+    ``--preload``. Workers that are forked afterwards share the memory pages
+    instead of each building their own copies. Without freezing, each garbage
+    collection in a worker writes to the objects' headers, which makes the operating
+    system copy the pages that they're on.
+    """
+    with stage("preload"):
+        get_term_table().get_id(PREFIX)  # builds the CURIE index
+        get_grounder()
+        for language in languages:
+            get_grounder(language)
+        get_automaton()
+        if max_distance:
+            get_approximate_index(max_distance)
+    if freeze:
+        gc.collect()
+        gc.freeze()
+
+
+def get_executor(processes: int | None = None) -> AbstractContextManager[Executor | None]:
+    """Get a process pool for grounding, or a null context if only one process is requested.
+
+    The grounder is built before the pool is started, so processes that are
+    forked from this one don't each have to build their own.
+    """
+    if processes is None or processes <= 1:
+        return nullcontext()
+    get_grounder()
+    return ProcessPoolExecutor(processes)
+
+
+def ground_many(
+    texts: Sequence[str], *, executor: Executor | None = None
+) -> list[NamableReference | None]:
+    """Ground several texts, optionally using a process pool from :func:`get_executor`."""
+    if executor is None or len(texts) < 2:
+        return [_ground_or_none(text) for text in texts]
+    chunksize = max(1, len(texts) // 64)
+    return list(executor.map(_ground_or_none, texts, chunksize=chunksize))
+
+
+def _ground_or_none(text: str) -> NamableReference | None:
+    if not text:
+        return None
+    return ground(text)
 
 
-def append_degree_by_discipline(  # noqa:C901
+def append_degree_by_discipline(
     discipline_term: NamedReference,
     has_bachelor_of_science: bool = False,
     has_ba: bool = False,
     has_msc: bool = False,
     has_phd: bool = False,
 ) -> NamedReference:
-    """Append a new discipline."""
-    name_to_reference: dict[str, NamedReference] = {v: k for k, v in get_names().items()}
-
-    discipline_name = discipline_term.name.lower()
-    degree_name = f"academic degree in {discipline_name}"
-    degree_term = name_to_reference.get(degree_name)
-    if degree_term is None:
-        degree_term = append_term(degree_name, parent=ACADEMIC_DEGREE)
-
-    add_discipline(degree_term, discipline_term)
-    add_synonym(_fast_literal_mapping(degree_term, f"degree in {discipline_name}"))
-
-    bachelor_name = f"bachelor of {discipline_name}"
-    bachelor_term = name_to_reference.get(bachelor_name)
-    if bachelor_term is None:
-        bachelor_term = append_term(bachelor_name, BACHELOR_DEGREE, degree_term)
-    for synonym_prefix in BACHELOR_PREFIXES:
-        add_synonym(_fast_literal_mapping(bachelor_term, f"{synonym_prefix} {discipline_name}"))
-
-    master_name = f"master of {discipline_name}"
-    master_term = name_to_reference.get(master_name)
-    if master_term is None:
-        master_term = append_term(master_name, MASTER_DEGREE, degree_term)
-    for synonym_prefix in MASTER_PREFIXES:
-        add_synonym(_fast_literal_mapping(master_term, f"{synonym_prefix} {discipline_name}"))
-
-    if has_bachelor_of_science:
-        bs_name = f"bachelor of science in {discipline_name}"
-        bs_term = name_to_reference.get(bs_name)
-        if bs_term is None:
-            bs_term = append_term(bs_name, BSC_DEGREE, bachelor_term)
-        for synonym_prefix in BACHELOR_OF_SCIENCE_PREFIXES:
-            add_synonym(_fast_literal_mapping(bs_term, f"{synonym_prefix} {discipline_name}"))
-
-    if has_ba:
-        ba_name = f"bachelor of arts in {discipline_name}"
-        ba_term = name_to_reference.get(ba_name)
-        if ba_term is None:
-            ba_term = append_term(ba_name, BSC_DEGREE, bachelor_term)
-        for synonym_prefix in BACHELOR_OF_ARTS_PREFIXES:
-            add_synonym(_fast_literal_mapping(ba_term, f"{synonym_prefix} {discipline_name}"))
-
-    if has_msc:
-        msc_name = f"master of science in {discipline_name}"
-        msc_term = name_to_reference.get(msc_name)
-        if msc_term is None:
-            msc_term = append_term(msc_name, MSC_DEGREE, master_term)
-        for synonym_prefix in MSC_PREFIXES:
-            add_synonym(_fast_literal_mapping(msc_term, f"{synonym_prefix} {discipline_name}"))
-
-    if has_phd:
-        phd_name = f"doctor of philosophy in {discipline_name}"
-        phd_term = name_to_reference.get(phd_name)
-        if phd_term is None:
-            phd_term = append_term(phd_name, PHD_DEGREE, degree_term)
-        for synonym_prefix in PHD_PREFIXES:
-            add_synonym(_fast_literal_mapping(phd_term, f"{synonym_prefix} {discipline_name}"))
-
-    return degree_term
-
-
-def _fast_literal_mapping(reference: NamedReference, text: str) -> ssslm.LiteralMapping:
-    return ssslm.LiteralMapping(
-        reference=reference,
-        text=text,
-        language="en",
-        predicate=has_exact_synonym,
-        contributor=charlie,
-        date=datetime.date.today(),
+    """Append a new discipline.
+
+    To add many disciplines at once, use :func:`qualo.expand.plan_expansion`.
+    """
+    request = DisciplineRequest(
+        discipline_term,
+        has_bachelor_of_science=has_bachelor_of_science,
+        has_ba=has_ba,
+        has_msc=has_msc,
+        has_phd=has_phd,
     )
+    plan = plan_expansion([request])
+    plan.apply()
+    return plan.degrees[discipline_term.curie]
@@ -1,8 +1,9 @@
 """A CLI for QUALO."""
 
-from collections import defaultdict
-from operator import attrgetter
+import sys
+from pathlib import Path
 from textwrap import dedent
+from typing import cast, get_args
 
 import click
 import pandas as pd
@@ -19,6 +20,8 @@ from qualo.api import (
     DOCS_DIR,
     EXPORT_OBO_PATH,
     EXPORT_OFN_PATH,
+    EXPORT_SQLITE_PATH,
+    EXPORT_TABLES_DIR,
     EXPORT_TTL_PATH,
     METADATA,
     ORG_TERM,
@@ -29,35 +32,37 @@ from qualo.data import (
     MAPPINGS_PATH,
     PREFIX,
     SYNONYMS_PATH,
+    build_bundle,
     get_conferrers,
     get_degree_holders,
     get_disciplines,
-    get_terms_df,
+    get_names,
+    get_term_table,
 )
+from qualo.export import ExportFormat
+from qualo.files import FileFormat, ground_file
+from qualo.profiling import benchmark_memory, profile_workload, stage
+from qualo.site import build_site
 
 
-@click.command()
-def main() -> None:  # noqa: C901
+@click.group(invoke_without_command=True)
+@click.pass_context
+def main(ctx: click.Context) -> None:
+    """Build and use QUALO. If no subcommand is given, the ontology is built."""
+    if ctx.invoked_subcommand is None:
+        ctx.invoke(build)
+
+
+@main.command()
+def build() -> None:  # noqa: C901
     """Build the Turtle ontology artifact.
 
     .. seealso:: https://github.com/cthoyt/orcid_downloader/blob/main/src/orcid_downloader/standardize.py
     """
-    df = get_terms_df()
-
-    for c in ["curie", "parent_1", "parent_2"]:
-        df[c] = df[c].map(Reference.from_curie, na_action="ignore")
-
-    names = dict(df[["curie", "label"]].values)
-
-    all_parents: defaultdict[Reference, list[Reference]] = defaultdict(list)
-    for child, p1, p2 in df[["curie", "parent_1", "parent_2"]].values:
-        if pd.notna(p1):
-            all_parents[child].append(p1)
-        if pd.notna(p2):
-            all_parents[child].append(p2)
+    table = get_term_table()
 
     literal_mapping_index = group_literal_mappings(
-        read_literal_mappings(SYNONYMS_PATH, names=names)
+        read_literal_mappings(SYNONYMS_PATH, names=cast(dict[Reference, str], get_names()))
     )
 
     degree_holder_examples = get_degree_holders()
@@ -85,7 +90,7 @@ def main() -> None:  # noqa: C901
     mdfg = {Reference.from_curie(k): sdf for k, sdf in mappings_df.groupby("subject_id")}
     mdfg_cols = ["predicate_id", "object_id", "contributor", "date"]
 
-    with open(EXPORT_TTL_PATH, "w") as file:
+    with stage("export_ttl"), open(EXPORT_TTL_PATH, "w") as file:
         write_prefix_map(prefixes, file, prefix_map=prefix_map)
         file.write("\n")
         file.write(METADATA)
@@ -107,15 +112,16 @@ def main() -> None:  # noqa: C901
 
         # TODO add discipline hierarchy
 
-        for k, label in df[["curie", "label"]].values:
-            file.write(f'\n{k.curie} a owl:Class; rdfs:label "{_clean_str(label)}" .\n')
+        for idx in table.term_ids():
+            k = table.reference(idx)
+            file.write(f'\n{k.curie} a owl:Class; rdfs:label "{_clean_str(k.name)}" .\n')
             for person in degree_holder_examples.get(k, []):
                 # could also simplify to using oboInOwl:hasDbXref
                 file.write(f"{k.curie} {PREFIX}:1000001 {person.curie} .\n")
             for conferrer in conferrer_examples.get(k, []):
                 file.write(f"{k.curie} {PREFIX}:1000003 {conferrer.curie} .\n")
-            if parents := all_parents.get(k, []):
-                x = ", ".join(parent.curie for parent in sorted(parents, key=attrgetter("curie")))
+            if parent_curies := [table.curie(parent) for parent in table.parent_ids(idx)]:
+                x = ", ".join(sorted(parent_curies))
                 file.write(f"{k.curie} rdfs:subClassOf {x} .\n")
             if discipline := disciplines.get(k):
                 rr = _restriction(f"{PREFIX}:1000002", discipline.curie)
@@ -146,32 +152,360 @@ def main() -> None:  # noqa: C901
 
         file.write(f'\n{charlie.curie} a NCBITaxon:9606; rdfs:label "Charles Tapley Hoyt" .\n')
 
+    with stage("export_bundle"):
+        build_bundle()
+
     try:
         import bioontologies.robot
     except ImportError:
         click.secho("bioontologies is not installed, can't convert to OWL and OFN")
     else:
         try:
-            bioontologies.robot.convert(
-                EXPORT_TTL_PATH, EXPORT_OFN_PATH, debug=True, merge=False, reason=False
-            )
+            with stage("export_ofn"):
+                bioontologies.robot.convert(
+                    EXPORT_TTL_PATH, EXPORT_OFN_PATH, debug=True, merge=False, reason=False
+                )
         except Exception as e:
             click.secho("Failed to create OFN artifact from TTL")
             click.echo(str(e))
 
         try:
-            bioontologies.robot.convert(
-                EXPORT_TTL_PATH, EXPORT_OBO_PATH, debug=True, merge=False, reason=False
-            )
+            with stage("export_obo"):
+                bioontologies.robot.convert(
+                    EXPORT_TTL_PATH, EXPORT_OBO_PATH, debug=True, merge=False, reason=False
+                )
         except Exception as e:
             click.secho("Failed to create OBO artifact from TTL")
             click.echo(str(e))
         else:
-            import pyobo
-            from pyobo.ssg import make_site
+            with stage("export_site"):
+                build_site(DOCS_DIR, path=EXPORT_OBO_PATH)
+
+
+@main.command(name="ground-file")
+@click.argument("input_path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument("output_path", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--column", required=True, help="The column to ground")
+@click.option(
+    "--input-format",
+    type=click.Choice(get_args(FileFormat)),
+    help="Inferred from the input path by default",
+)
+@click.option(
+    "--output-format",
+    type=click.Choice(get_args(FileFormat)),
+    help="Inferred from the output path by default, falling back to the input format",
+)
+@click.option("--chunksize", type=int, default=100_000, show_default=True)
+@click.option("--processes", type=int, help="The number of processes to ground with")
+def ground_file_command(
+    input_path: Path,
+    output_path: Path,
+    column: str,
+    input_format: FileFormat | None,
+    output_format: FileFormat | None,
+    chunksize: int,
+    processes: int | None,
+) -> None:
+    """Ground a column in a (gzipped) TSV, CSV, or JSON lines file."""
+    ground_file(
+        input_path,
+        output_path,
+        column,
+        input_format=input_format,
+        output_format=output_format,
+        chunksize=chunksize,
+        processes=processes,
+    )
+
+
+@main.command()
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default="qualo-profile.txt",
+    show_default=True,
+    help="The path for the text report. The raw profile is written next to it.",
+)
+@click.option("--repeat", type=int, default=100, show_default=True)
+@click.option("--sort", default="cumulative", show_default=True)
+def profile(output: Path, repeat: int, sort: str) -> None:
+    """Profile loading the data, building the grounder, and grounding."""
+    recorder = profile_workload(output, repeat=repeat, sort=sort)
+    for name, stats in sorted(recorder.stats.items()):
+        click.echo(f"{name}: {stats.calls:,} calls in {stats.seconds:.4f}s")
+    click.echo(f"wrote report to {output}")
+
+
+@main.command(name="benchmark-memory")
+@click.option("--workers", type=int, default=4, show_default=True)
+def benchmark_memory_command(workers: int) -> None:
+    """Compare the memory used by forked workers with and without preloading."""
+    click.echo("mode\tprocess\trss_kib\tpss_kib\tprivate_kib")
+    for preload in [False, True]:
+        mode = "preload" if preload else "no-preload"
+        master, usages = benchmark_memory(workers, preload=preload)
+        for name, usage in [("master", master), *(("worker", u) for u in usages)]:
+            click.echo(f"{mode}\t{name}\t{usage.rss}\t{usage.pss}\t{usage.private}")
+        mean_private = sum(usage.private for usage in usages) // len(usages)
+        click.echo(f"{mode}\tworker-mean\t\t\t{mean_private}")
+
+
+@main.command()
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="A path to write a JSON report to",
+)
+@click.option("--strict", is_flag=True, help="Fail on warnings, like label mismatches")
+def validate(output: Path | None, strict: bool) -> None:
+    """Check referential integrity across the data tables."""
+    from qualo.validate import validate as validate_data
+
+    report = validate_data()
+    for issue in report.issues:
+        location = issue.table if issue.line is None else f"{issue.table}:{issue.line}"
+        click.echo(f"{location}: {issue.severity} [{issue.rule}] {issue.curie} {issue.message}")
+    if output is not None:
+        report.write_json(output)
+    if not report.passes(strict=strict):
+        sys.exit(1)
+
+
+@main.command()
+@click.argument("old", type=click.Path(exists=True, path_type=Path))
+@click.argument("new", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="A path to write a JSON report to",
+)
+def diff(old: Path, new: Path, output: Path | None) -> None:
+    """Compare two releases, each a data directory or an exported Turtle file."""
+    from qualo.diff import FIELDS, diff_releases
+
+    release_diff = diff_releases(old, new)
+    for name, part in zip(FIELDS, release_diff.iter_parts(), strict=True):
+        for key in sorted(part.added):
+            click.echo(f"+ {name} {' '.join(key)}")
+        for key in sorted(part.removed):
+            click.echo(f"- {name} {' '.join(key)}")
+        for key in sorted(part.changed):
+            click.echo(f"~ {name} {' '.join(key)}")
+    click.echo(f"{len(release_diff.get_affected_curies()):,} affected terms")
+    if output is not None:
+        release_diff.write_json(output)
+
+
+@main.command()
+@click.option(
+    "--format",
+    "export_format",
+    type=click.Choice(["sqlite", "parquet", "jsonl"]),
+    default="sqlite",
+    show_default=True,
+)
+@click.option(
+    "--output",
+    type=click.Path(path_type=Path),
+    help=f"The SQLite file or the directory for the tables. Defaults to "
+    f"{EXPORT_SQLITE_PATH.name} or {EXPORT_TABLES_DIR.name}/ in the export directory.",
+)
+def export(export_format: str, output: Path | None) -> None:
+    """Export the data tables for databases and data lakes."""
+    if export_format == "sqlite":
+        from qualo.data import build_sqlite
+
+        output = output or EXPORT_SQLITE_PATH
+        build_sqlite(output)
+        click.echo(f"wrote {output}")
+    else:
+        from qualo.export import write_tables
+
+        paths = write_tables(
+            output or EXPORT_TABLES_DIR, export_format=cast(ExportFormat, export_format)
+        )
+        for path in paths:
+            click.echo(f"wrote {path}")
+
+
+@main.command()
+@click.option("--force", is_flag=True, help="Render all pages, even if they didn't change")
+@click.option("--processes", type=int, help="Defaults to one per CPU when many pages changed")
+def site(force: bool, processes: int | None) -> None:
+    """Render the pages of the documentation site that changed in the OBO export."""
+    result = build_site(DOCS_DIR, path=EXPORT_OBO_PATH, force=force, processes=processes)
+    click.echo(
+        f"rendered {len(result.written):,} pages, deleted {len(result.deleted):,}, "
+        f"and kept {result.unchanged:,}"
+    )
+
+
+@main.command(name="draw-hierarchies")
+@click.option("--force", is_flag=True, help="Draw all charts, even if they didn't change")
+@click.option("--processes", type=int, help="Defaults to one Graphviz process per CPU")
+def draw_hierarchies(force: bool, processes: int | None) -> None:
+    """Draw the hierarchy of every discipline that changed."""
+    from qualo.draw_hierarchy import draw_all
+
+    drawn = draw_all(force=force, processes=processes)
+    click.echo(f"drew {len(drawn):,} hierarchies")
+
+
+@main.command(name="expand-disciplines")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--dry-run", is_flag=True, help="Show the rows that would be added")
+def expand_disciplines(path: Path, dry_run: bool) -> None:
+    """Add degrees for the disciplines in a TSV file.
+
+    The file has the columns discipline, discipline_label, has_bachelor_of_science,
+    has_ba, has_msc, and has_phd.
+    """
+    from qualo.expand import plan_expansion, read_requests
+
+    plan = plan_expansion(read_requests(path))
+    if dry_run:
+        for line in plan.iter_diff():
+            click.echo(line)
+        return
+    plan.apply()
+    click.echo(
+        f"added {len(plan.terms):,} terms, {len(plan.synonyms):,} synonyms, "
+        f"and {len(plan.disciplines):,} disciplines"
+    )
+
+
+@main.command(name="cluster-ungrounded")
+@click.argument("input_path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument("output_path", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--column", required=True, help="The column with the strings")
+@click.option("--count-column", help="The column with the counts. Each row counts once by default")
+@click.option("--max-distance", type=int, default=2, show_default=True)
+@click.option("--processes", type=int, help="The number of processes to ground and cluster with")
+def cluster_ungrounded(
+    input_path: Path,
+    output_path: Path,
+    column: str,
+    count_column: str | None,
+    max_distance: int,
+    processes: int | None,
+) -> None:
+    """Cluster the strings in a (gzipped) TSV, CSV, or JSON lines file that can't be grounded."""
+    from qualo.cluster import mine_clusters, write_clusters
+    from qualo.files import infer_format, read_chunks
+
+    counts: dict[str, int] = {}
+    for chunk in read_chunks(input_path, infer_format(input_path), 100_000):
+        texts = chunk[column].dropna().astype(str)
+        weights = chunk.loc[texts.index, count_column] if count_column else 1
+        for text, count in texts.to_frame("text").assign(count=weights).itertuples(index=False):
+            counts[text] = counts.get(text, 0) + int(count)
+    clusters = mine_clusters(counts, max_distance=max_distance, processes=processes)
+    write_clusters(clusters, output_path)
+    click.echo(f"wrote {len(clusters):,} clusters of {len(counts):,} strings to {output_path}")
+
+
+@main.command()
+@click.option(
+    "--baseline",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="The accuracy baseline. Defaults to the one in the data directory.",
+)
+@click.option(
+    "--latency-baseline",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="The latency baseline of this machine. Defaults to one next to the accuracy baseline.",
+)
+@click.option(
+    "--update",
+    is_flag=True,
+    help="Write the report as the new accuracy baseline and this machine's latency baseline",
+)
+@click.option(
+    "--output", type=click.Path(dir_okay=False, path_type=Path), help="Write the report as JSON"
+)
+@click.option("--max-accuracy-drop", type=float, default=0.0, show_default=True)
+@click.option("--max-latency-ratio", type=float, default=1.5, show_default=True)
+def evaluate(
+    baseline: Path | None,
+    latency_baseline: Path | None,
+    update: bool,
+    output: Path | None,
+    max_accuracy_drop: float,
+    max_latency_ratio: float,
+) -> None:
+    """Check the accuracy and latency of grounding every label and synonym.
+
+    Exits with an error if the accuracy dropped compared to the committed baseline,
+    or if the latency grew compared to the baseline recorded on this machine with
+    ``--update``. Latency isn't checked until one is recorded.
+    """
+    from qualo.evaluation import (
+        BASELINE_PATH,
+        LATENCY_BASELINE_PATH,
+        check_regressions,
+        evaluate_grounding,
+        read_baseline,
+    )
+
+    baseline = baseline or BASELINE_PATH
+    latency_baseline = latency_baseline or LATENCY_BASELINE_PATH
+    report = evaluate_grounding()
+    for name, stats in report.variants.items():
+        latency = ", ".join(f"{key}={value:.3f}ms" for key, value in stats.latency.items())
+        click.echo(f"{name}\t{stats.correct:,}/{stats.total:,} ({stats.accuracy:.2%})\t{latency}")
+    for mismatch in report.mismatches:
+        click.echo(f"{mismatch.variant}\t{mismatch.text}\t{mismatch.actual}\t{mismatch.expected}")
+    if output is not None:
+        report.write_json(output)
+    if update:
+        report.write_json(baseline, latency=False)
+        report.write_json(latency_baseline, mismatches=False)
+        return
+    if latency_baseline.is_file():
+        latency_data = read_baseline(latency_baseline)
+    else:
+        latency_data = {"variants": {}}
+        click.secho(
+            f"no latency baseline at {latency_baseline}, so latency isn't checked. "
+            "Run `qualo evaluate --update` to record one on this machine.",
+            fg="yellow",
+        )
+    problems = check_regressions(
+        report,
+        read_baseline(baseline),
+        latency_baseline=latency_data,
+        max_accuracy_drop=max_accuracy_drop,
+        max_latency_ratio=max_latency_ratio,
+    )
+    for problem in problems:
+        click.secho(problem, fg="red")
+    if problems:
+        sys.exit(1)
+
+
+@main.command()
+@click.option("--all", "show_all", is_flag=True, help="Also show conflicts that aren't clashes")
+@click.option("--update", is_flag=True, help="Record the current clashes as known")
+def conflicts(show_all: bool, update: bool) -> None:
+    """Find synonyms whose normalized texts point to different terms.
+
+    Exits with an error if there are exact clashes that aren't known.
+    """
+    from qualo.conflicts import find_conflicts, get_new_clashes, write_known_conflicts
 
-            ont = pyobo.from_obo_path(path=EXPORT_OBO_PATH, prefix=PREFIX, version=None)
-            make_site(ont, directory=DOCS_DIR, manifest=True)
+    found = find_conflicts()
+    if update:
+        write_known_conflicts(found)
+    new = get_new_clashes(found)
+    for conflict in found if show_all else new:
+        click.echo(
+            f"{conflict.kind}\t{conflict.scope}\t{conflict.curie_1}\t{conflict.curie_2}\t"
+            f"{conflict.text}"
+        )
+    if new:
+        click.secho(f"{len(new):,} new clashes", fg="red")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
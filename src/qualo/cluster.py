@@ -0,0 +1,349 @@
+"""Cluster ungrounded degree strings so they can be curated in bulk.
+
+A corpus of strings and their counts, like the education roles from ORCID, has a
+long tail of strings that can't be grounded, many of which are near-duplicates of
+each other. Clustering them goes in four steps:
+
+1. Each string is normalized, and counts are added up over strings that are the same
+   after normalization. Strings that can already be grounded are dropped.
+2. Each string is split into a degree family, using the prefixes in
+   :mod:`qualo.prefixes` (e.g., ``PhD in`` and ``Ph.D. in`` are both doctor of
+   philosophy), and the rest, which is usually the discipline. The tokens of the
+   rest are sorted, so word order doesn't matter.
+3. Strings are blocked by their family and the first character of the rest, and the
+   strings in each block are clustered, in parallel, by joining those whose rests are
+   within a small edit distance. Candidate pairs are found with symmetric deletes,
+   like in :mod:`qualo.fuzzy`, so big blocks aren't compared pairwise.
+4. Each cluster gets a suggested target. If a term named after the family and the
+   discipline already exists, or one within a small edit distance of that name (to
+   catch typos), the cluster's strings are probably its synonyms. Otherwise, the
+   family's term is suggested as the parent of a new term.
+
+Clusters are ranked by their total count, so curators can work through millions of
+strings in the order that covers the most records.
+"""
+
+import csv
+import re
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from itertools import repeat
+from pathlib import Path
+from typing import Literal
+
+import ssslm
+from curies import NamedReference
+
+from qualo.api import get_executor, ground_many
+from qualo.data import get_names
+from qualo.expand import (
+    BA_DEGREE,
+    BACHELOR_DEGREE,
+    BSC_DEGREE,
+    MASTER_DEGREE,
+    MSC_DEGREE,
+    PHD_DEGREE,
+)
+from qualo.fuzzy import ApproximateIndex, get_deletes, get_distance
+from qualo.prefixes import (
+    BACHELOR_OF_ARTS_PREFIXES,
+    BACHELOR_OF_SCIENCE_PREFIXES,
+    BACHELOR_PREFIXES,
+    MASTER_OF_ARTS_PREFIXES,
+    MASTER_PREFIXES,
+    MSC_PREFIXES,
+    PHD_PREFIXES,
+)
+
+__all__ = [
+    "Cluster",
+    "mine_clusters",
+    "normalize",
+    "split_family",
+    "write_clusters",
+]
+
+MA_DEGREE = NamedReference.from_curie("QUALO:0000060", "master of arts")
+
+#: Degree families, with their term, the name of a term in a discipline, and prefixes
+FAMILIES: list[tuple[NamedReference, str, Iterable[str]]] = [
+    (BACHELOR_DEGREE, "bachelor of {}", BACHELOR_PREFIXES),
+    (BSC_DEGREE, "bachelor of science in {}", BACHELOR_OF_SCIENCE_PREFIXES),
+    (BA_DEGREE, "bachelor of arts in {}", BACHELOR_OF_ARTS_PREFIXES),
+    (MASTER_DEGREE, "master of {}", MASTER_PREFIXES),
+    (MSC_DEGREE, "master of science in {}", MSC_PREFIXES),
+    (MA_DEGREE, "master of arts in {}", MASTER_OF_ARTS_PREFIXES),
+    (PHD_DEGREE, "doctor of philosophy in {}", PHD_PREFIXES),
+]
+#: The family of strings that don't start with a known prefix
+OTHER_FAMILY = "other"
+
+#: Rests shorter than this are only clustered with identical rests, since short
+#: strings (e.g., abbreviations) are too easy to confuse
+MIN_FUZZY_LENGTH = 6
+#: The number of characters at the start of each rest that deletes are generated for
+PREFIX_LENGTH = 7
+
+PUNCTUATION_RE = re.compile(r"[^\w\s'&+-]+")
+
+Kind = Literal["synonym", "child"]
+
+
+def normalize(text: str) -> str:
+    """Normalize a string by case folding and removing periods and other punctuation."""
+    text = text.replace("’", "'").replace(".", "").casefold()  # noqa:RUF001
+    return " ".join(PUNCTUATION_RE.sub(" ", text).split())
+
+
+def _get_prefix_index() -> list[tuple[str, str]]:
+    """Get normalized prefixes and their families' CURIEs, longest first."""
+    rv = {
+        normalize(prefix): reference.curie
+        for reference, _, prefixes in FAMILIES
+        for prefix in prefixes
+    }
+    return sorted(rv.items(), key=lambda item: (-len(item[0]), item[0]))
+
+
+def split_family(text: str, prefix_index: list[tuple[str, str]] | None = None) -> tuple[str, str]:
+    """Split a normalized string into a degree family and the rest.
+
+    :param text: A string normalized with :func:`normalize`
+    :param prefix_index: The output of ``_get_prefix_index()``, to avoid rebuilding it
+    :returns: The CURIE of the family's term, or ``other``, and the rest of the string
+    """
+    if prefix_index is None:
+        prefix_index = _get_prefix_index()
+    for prefix, curie in prefix_index:
+        if text.startswith(prefix + " "):
+            return curie, text[len(prefix) + 1 :]
+    return OTHER_FAMILY, text
+
+
+@dataclass
+class _Candidate:
+    """A distinct normalized string."""
+
+    family: str
+    rest: str
+    count: int = 0
+    #: Original strings and their counts
+    examples: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return " ".join(sorted(set(self.rest.split())))
+
+
+@dataclass
+class Cluster:
+    """A cluster of near-duplicate ungrounded strings."""
+
+    #: The CURIE of the family's term, or ``other``
+    family: str
+    #: The rest of the most common string, after the family's prefix
+    rest: str
+    #: The total count of the strings in the cluster
+    count: int
+    #: The original strings and their counts, most common first
+    members: list[tuple[str, int]]
+    #: A suggested target term
+    target: NamedReference | None = None
+    #: ``synonym`` if the strings look like synonyms of the target, or ``child`` if
+    #: the target looks like the parent of a missing term
+    kind: Kind | None = None
+
+    @property
+    def representative(self) -> str:
+        """Get the most common string in the cluster."""
+        return self.members[0][0]
+
+
+def mine_clusters(
+    corpus: Mapping[str, int] | Iterable[tuple[str, int]],
+    *,
+    max_distance: int = 2,
+    processes: int | None = None,
+    skip_grounded: bool = True,
+) -> list[Cluster]:
+    """Cluster ungrounded strings and suggest targets for them.
+
+    :param corpus: Strings and their counts, as a dictionary or pairs
+    :param max_distance: The maximum edit distance between the rests of two strings
+        that are joined
+    :param processes: The number of processes for grounding and clustering blocks
+    :param skip_grounded: Should strings that can already be grounded be dropped?
+    :returns: Clusters, with the largest total count first
+    """
+    prefix_index = _get_prefix_index()
+    candidates: dict[str, _Candidate] = {}
+    for text, count in corpus.items() if isinstance(corpus, Mapping) else corpus:
+        norm_text = normalize(text)
+        if not norm_text:
+            continue
+        candidate = candidates.get(norm_text)
+        if candidate is None:
+            candidate = candidates[norm_text] = _Candidate(*split_family(norm_text, prefix_index))
+        candidate.count += count
+        candidate.examples[text] = candidate.examples.get(text, 0) + count
+
+    with get_executor(processes) as executor:
+        if skip_grounded:
+            texts = list(candidates)
+            references = ground_many(texts, executor=executor)
+            for text, reference in zip(texts, references, strict=True):
+                if reference is not None:
+                    del candidates[text]
+        groups = _cluster(list(candidates.values()), max_distance, executor)
+
+    targets = _Targets()
+    rv = [_make_cluster(group, targets) for group in groups]
+    return sorted(rv, key=lambda cluster: (-cluster.count, cluster.representative))
+
+
+def _cluster(
+    candidates: list[_Candidate], max_distance: int, executor: Executor | None
+) -> list[list[_Candidate]]:
+    # candidates whose rests have the same tokens are merged up front
+    by_key: defaultdict[tuple[str, str], list[_Candidate]] = defaultdict(list)
+    for candidate in candidates:
+        by_key[candidate.family, candidate.key].append(candidate)
+
+    blocks: defaultdict[tuple[str, str], list[str]] = defaultdict(list)
+    for family, key in by_key:
+        blocks[family, key[:1]].append(key)
+
+    block_items = list(blocks.items())
+    keys = [keys for _, keys in block_items]
+    results: Iterable[list[list[int]]]
+    if executor is None or len(keys) < 2:
+        results = map(_cluster_block, keys, repeat(max_distance))
+    else:
+        results = executor.map(_cluster_block, keys, repeat(max_distance), chunksize=16)
+
+    rv = []
+    for ((family, _), block_keys), groups in zip(block_items, results, strict=True):
+        for group in groups:
+            rv.append([candidate for i in group for candidate in by_key[family, block_keys[i]]])
+    return rv
+
+
+def _cluster_block(keys: list[str], max_distance: int) -> list[list[int]]:
+    """Group keys within the maximum distance of each other, with a union-find."""
+    parents = list(range(len(keys)))
+
+    def _find(i: int) -> int:
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    deletes: defaultdict[str, list[int]] = defaultdict(list)
+    for i, key in enumerate(keys):
+        if len(key) < MIN_FUZZY_LENGTH:
+            continue
+        for delete in get_deletes(key[:PREFIX_LENGTH], max_distance):
+            for j in deletes[delete]:
+                root_i, root_j = _find(i), _find(j)
+                if root_i == root_j or abs(len(key) - len(keys[j])) > max_distance:
+                    continue
+                if get_distance(key, keys[j], max_distance) is not None:
+                    parents[root_i] = root_j
+            deletes[delete].append(i)
+
+    groups: defaultdict[int, list[int]] = defaultdict(list)
+    for i in range(len(keys)):
+        groups[_find(i)].append(i)
+    return list(groups.values())
+
+
+def _make_cluster(candidates: list[_Candidate], targets: "_Targets") -> Cluster:
+    counts: defaultdict[str, int] = defaultdict(int)
+    for candidate in candidates:
+        for text, count in candidate.examples.items():
+            counts[text] += count
+    top = max(candidates, key=lambda candidate: candidate.count)
+    target, kind = targets.suggest(top.family, top.rest)
+    return Cluster(
+        family=top.family,
+        rest=top.rest,
+        count=sum(candidate.count for candidate in candidates),
+        members=sorted(counts.items(), key=lambda item: (-item[1], item[0])),
+        target=target,
+        kind=kind,
+    )
+
+
+class _Targets:
+    """Suggests targets with an index of the disciplines of each family's terms."""
+
+    def __init__(self) -> None:
+        self.exact: dict[str, dict[str, NamedReference]] = {}
+        self.approximate: dict[str, ApproximateIndex] = {}
+        self.families = {reference.curie: reference for reference, _, _ in FAMILIES}
+        names = get_names()
+        for reference, template, _ in FAMILIES:
+            prefix = template.format("")
+            rests = {
+                name.removeprefix(prefix): term
+                for term, name in names.items()
+                if name.startswith(prefix)
+            }
+            self.exact[reference.curie] = rests
+            self.approximate[reference.curie] = ApproximateIndex(
+                ssslm.LiteralMapping(text=rest, reference=term) for rest, term in rests.items()
+            )
+
+    def suggest(self, family: str, rest: str) -> tuple[NamedReference | None, Kind | None]:
+        """Suggest a term that a string is a synonym of, or the parent of a new term."""
+        if family not in self.families:
+            return None, None
+        if (target := self.exact[family].get(rest)) is not None:
+            return target, "synonym"
+        if (match := self.approximate[family].get_best_match(rest)) is not None:
+            return NamedReference.from_reference(match.reference), "synonym"
+        return self.families[family], "child"
+
+
+#: The columns written by :func:`write_clusters`
+CLUSTER_COLUMNS = [
+    "rank",
+    "count",
+    "size",
+    "family",
+    "rest",
+    "kind",
+    "target",
+    "target_label",
+    "representative",
+    "members",
+]
+
+
+def write_clusters(clusters: Iterable[Cluster], path: Path, *, max_members: int = 10) -> None:
+    """Write clusters to a TSV file, in order.
+
+    :param clusters: Clusters, e.g., from :func:`mine_clusters`
+    :param path: The path to the TSV file
+    :param max_members: The maximum number of members to list for each cluster
+    """
+    with path.open("w", newline="") as file:
+        writer = csv.writer(file, delimiter="\t", lineterminator="\n")
+        writer.writerow(CLUSTER_COLUMNS)
+        for rank, cluster in enumerate(clusters, start=1):
+            writer.writerow(
+                (
+                    rank,
+                    cluster.count,
+                    len(cluster.members),
+                    cluster.family,
+                    cluster.rest,
+                    cluster.kind or "",
+                    cluster.target.curie if cluster.target else "",
+                    cluster.target.name if cluster.target else "",
+                    cluster.representative,
+                    " | ".join(text for text, _ in cluster.members[:max_members]),
+                )
+            )
@@ -0,0 +1,157 @@
+"""Find synonyms whose normalized texts point to different terms.
+
+When the same normalized text is a synonym (or label) of several terms, the
+grounder returns several equally good matches, so which one comes first is
+arbitrary. The synonyms are indexed by the same normalization the grounder uses
+in one pass, and each pair of terms that share a text is classified:
+
+- by hierarchy: ``ancestor`` if one term is an ancestor of the other, so the text
+  is ambiguous between a general and a specific degree, or ``clash`` otherwise
+- by scope: ``exact`` if the text is a label or exact synonym of both terms, or
+  ``related`` if it's a broad, narrow, or related synonym of at least one of them
+
+Exact clashes are errors. Known ones are listed in ``known_conflicts.tsv`` so that
+only new ones fail the tests.
+"""
+
+import csv
+from collections.abc import Iterable
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+from typing import Literal
+
+import ssslm
+
+from qualo.data import HERE, get_literal_mappings, get_term_table
+from qualo.data.table import TermTable
+
+__all__ = [
+    "KNOWN_CONFLICTS_PATH",
+    "Conflict",
+    "find_conflicts",
+    "get_new_clashes",
+    "read_known_conflicts",
+    "write_known_conflicts",
+]
+
+KNOWN_CONFLICTS_PATH = HERE.joinpath("known_conflicts.tsv")
+KNOWN_CONFLICTS_COLUMNS = ["text", "curie_1", "curie_2"]
+
+#: Predicates whose synonyms mean exactly the same as the term
+EXACT_PREDICATES = {"rdfs:label", "oboInOwl:hasExactSynonym"}
+
+Kind = Literal["ancestor", "clash"]
+Scope = Literal["exact", "related"]
+
+
+@dataclass(frozen=True, order=True)
+class Conflict:
+    """A normalized text that's a synonym of two different terms."""
+
+    #: The normalized text
+    text: str
+    curie_1: str
+    curie_2: str
+    kind: Kind
+    scope: Scope
+    #: The original texts, before normalization
+    texts: tuple[str, ...]
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        """Get the normalized text and the pair of CURIEs."""
+        return self.text, self.curie_1, self.curie_2
+
+    @property
+    def is_clash(self) -> bool:
+        """Check if this is an exact synonym of two terms that aren't in the same lineage."""
+        return self.kind == "clash" and self.scope == "exact"
+
+
+def find_conflicts(
+    literal_mappings: Iterable[ssslm.LiteralMapping] | None = None,
+) -> list[Conflict]:
+    """Find normalized texts that are synonyms of several terms.
+
+    :param literal_mappings: The literal mappings to check. Defaults to all labels
+        and synonyms.
+    :returns: A sorted list of conflicts, one for each pair of terms that share a
+        normalized text
+    """
+    if literal_mappings is None:
+        literal_mappings = get_literal_mappings()
+
+    # normalized text -> CURIE -> is any synonym exact?, and the original texts
+    index: dict[str, dict[str, bool]] = {}
+    texts: dict[str, set[str]] = {}
+    for literal_mapping in literal_mappings:
+        norm_text = literal_mapping.to_gilda().norm_text
+        curies = index.setdefault(norm_text, {})
+        curie = literal_mapping.reference.curie
+        exact = literal_mapping.predicate.curie in EXACT_PREDICATES
+        curies[curie] = curies.get(curie, False) or exact
+        texts.setdefault(norm_text, set()).add(literal_mapping.text)
+
+    table = get_term_table()
+    rv = []
+    for norm_text, curies in index.items():
+        if len(curies) < 2:
+            continue
+        for curie_1, curie_2 in combinations(sorted(curies), 2):
+            rv.append(
+                Conflict(
+                    text=norm_text,
+                    curie_1=curie_1,
+                    curie_2=curie_2,
+                    kind="ancestor" if _in_lineage(table, curie_1, curie_2) else "clash",
+                    scope="exact" if curies[curie_1] and curies[curie_2] else "related",
+                    texts=tuple(sorted(texts[norm_text])),
+                )
+            )
+    return sorted(rv)
+
+
+def _in_lineage(table: TermTable, curie_1: str, curie_2: str) -> bool:
+    idx_1, idx_2 = table.get_id(curie_1), table.get_id(curie_2)
+    if idx_1 is None or idx_2 is None:
+        return False
+    return idx_1 in table.ancestor_ids(idx_2) or idx_2 in table.ancestor_ids(idx_1)
+
+
+def read_known_conflicts(path: Path | None = None) -> set[tuple[str, str, str]]:
+    """Read the known clashes, as triples of normalized text and two CURIEs."""
+    if path is None:
+        path = KNOWN_CONFLICTS_PATH
+    if not path.is_file():
+        return set()
+    with path.open(newline="") as file:
+        return {
+            (row["text"], row["curie_1"], row["curie_2"])
+            for row in csv.DictReader(file, delimiter="\t")
+        }
+
+
+def write_known_conflicts(conflicts: Iterable[Conflict], path: Path | None = None) -> None:
+    """Write the clashes among the conflicts as the known clashes."""
+    if path is None:
+        path = KNOWN_CONFLICTS_PATH
+    with path.open("w", newline="") as file:
+        writer = csv.writer(file, delimiter="\t", lineterminator="\n")
+        writer.writerow(KNOWN_CONFLICTS_COLUMNS)
+        writer.writerows(sorted(conflict.key for conflict in conflicts if conflict.is_clash))
+
+
+def get_new_clashes(
+    conflicts: Iterable[Conflict] | None = None, *, path: Path | None = None
+) -> list[Conflict]:
+    """Get the clashes that aren't known.
+
+    :param conflicts: The conflicts. Defaults to :func:`find_conflicts`.
+    :param path: The path to the known clashes
+    :returns: The clashes that aren't in the known clashes
+    """
+    if conflicts is None:
+        conflicts = find_conflicts()
+    known = read_known_conflicts(path)
+    return [conflict for conflict in conflicts if conflict.is_clash and conflict.key not in known]
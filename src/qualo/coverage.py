@@ -0,0 +1,224 @@
+"""Measure how much of a corpus of degree strings can be grounded.
+
+A corpus is a set of strings, each with a count of how often it appears. Each
+distinct string is grounded once, and the results are cached along with the
+grounder's index. On the next run, the old and new indexes are compared, and only
+strings that look up one of the normalized texts that changed are grounded again,
+so curating a few synonyms doesn't mean grounding the whole corpus.
+
+.. code-block:: python
+
+    from qualo.coverage import compute_coverage
+
+    report = compute_coverage({"PhD": 120, "BSc": 80, "Dr. rer. nat.": 3}, cache_path="cache.json")
+    print(report.fraction, report.by_family)
+"""
+
+import hashlib
+import json
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from curies import NamedReference
+
+from qualo.data import get_grounder, get_term_table
+from qualo.data.grounder import MutableGrounder
+
+__all__ = [
+    "FAMILIES",
+    "CoverageReport",
+    "GroundingResult",
+    "compute_coverage",
+]
+
+#: The version of the cache format. Increment this when it changes.
+CACHE_VERSION = 2
+
+#: The degree families that coverage is broken down by, checked in order
+FAMILIES = [
+    NamedReference.from_curie("QUALO:0000008", "associate's degree"),
+    NamedReference.from_curie("QUALO:0000003", "bachelor's degree"),
+    NamedReference.from_curie("QUALO:0000004", "master's degree"),
+    NamedReference.from_curie("QUALO:0000005", "doctoral degree"),
+]
+#: The family of terms that aren't in any of :data:`FAMILIES`
+OTHER_FAMILY = "other"
+#: The family of strings that weren't grounded
+UNGROUNDED = "ungrounded"
+
+
+@dataclass(frozen=True)
+class GroundingResult:
+    """The result of grounding a string."""
+
+    #: The CURIE of the best match, or None if there were no matches
+    curie: str | None
+    #: The number of matches
+    matches: int
+
+    @property
+    def ambiguous(self) -> bool:
+        """Check if there were several matches."""
+        return self.matches > 1
+
+
+@dataclass
+class CoverageReport:
+    """Count-weighted coverage of a corpus."""
+
+    #: The total count of all strings
+    total: int = 0
+    #: The total count of strings that were grounded
+    grounded: int = 0
+    #: The total count of strings that had several matches
+    ambiguous: int = 0
+    #: The total count of strings in each degree family
+    by_family: dict[str, int] = field(default_factory=dict)
+    #: The result for each distinct string
+    results: dict[str, GroundingResult] = field(default_factory=dict)
+    #: The number of distinct strings that were grounded in this run, rather than
+    #: read from the cache
+    regrounded: int = 0
+
+    @property
+    def fraction(self) -> float:
+        """Get the fraction of the corpus that was grounded."""
+        return self.grounded / self.total if self.total else 0.0
+
+
+def compute_coverage(
+    corpus: Mapping[str, int] | Iterable[tuple[str, int]],
+    *,
+    cache_path: str | Path | None = None,
+    families: Iterable[NamedReference] | None = None,
+    grounder: MutableGrounder | None = None,
+) -> CoverageReport:
+    """Ground a weighted corpus, reusing cached results that can't have changed.
+
+    :param corpus: Strings and their counts, as a dictionary or pairs. Counts for
+        repeated strings are added up.
+    :param cache_path: A path to a JSON file for caching results between runs
+    :param families: The degree families to break coverage down by. Defaults to
+        :data:`FAMILIES`.
+    :param grounder: The grounder. Defaults to :func:`qualo.data.get_grounder`.
+    :returns: A report of the count-weighted coverage
+    """
+    counts: dict[str, int] = {}
+    for text, count in corpus.items() if isinstance(corpus, Mapping) else corpus:
+        counts[text] = counts.get(text, 0) + count
+    if grounder is None:
+        grounder = get_grounder()
+    if families is None:
+        families = FAMILIES
+
+    index = grounder.get_index()
+    digest = _get_digest(index)
+    cached = _get_cached(_read_cache(cache_path), grounder, index, digest)
+
+    report = CoverageReport()
+    for text in counts:
+        result = cached.get(text)
+        if result is None:
+            matches = grounder.get_matches(text)
+            result = GroundingResult(matches[0].curie if matches else None, len(matches))
+            report.regrounded += 1
+        report.results[text] = result
+
+    family_of = _get_family_lookup(families)
+    for text, count in counts.items():
+        result = report.results[text]
+        family = UNGROUNDED if result.curie is None else family_of(result.curie)
+        report.total += count
+        report.grounded += count if result.curie is not None else 0
+        report.ambiguous += count if result.ambiguous else 0
+        report.by_family[family] = report.by_family.get(family, 0) + count
+
+    if cache_path is not None:
+        _write_cache(cache_path, digest, index, {**cached, **report.results})
+    return report
+
+
+def _get_cached(
+    cache: dict[str, Any] | None,
+    grounder: MutableGrounder,
+    index: dict[str, list[str]],
+    digest: str,
+) -> dict[str, GroundingResult]:
+    """Get the cached results that can't have changed since the cache was written."""
+    if cache is None:
+        return {}
+    rv = {
+        text: GroundingResult(curie, matches) for text, (curie, matches) in cache["results"].items()
+    }
+    if cache["digest"] == digest:
+        return rv
+    changed = _get_changed(cache["index"], index)
+    return {text: result for text, result in rv.items() if not grounder.get_lookups(text) & changed}
+
+
+def _get_digest(index: dict[str, list[str]]) -> str:
+    data = json.dumps(index, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _get_changed(old: dict[str, list[str]], new: dict[str, list[str]]) -> set[str]:
+    """Get the normalized texts whose entries were added, removed, or changed."""
+    rv = {norm_text for norm_text, entries in new.items() if old.get(norm_text) != entries}
+    rv.update(norm_text for norm_text in old if norm_text not in new)
+    return rv
+
+
+def _get_family_lookup(families: Iterable[NamedReference]) -> Callable[[str], str]:
+    table = get_term_table()
+    family_ids = [
+        (idx, family.name) for family in families if (idx := table.get_id(family)) is not None
+    ]
+    memo: dict[str, str] = {}
+
+    def _get_family(curie: str) -> str:
+        rv = memo.get(curie)
+        if rv is None:
+            rv = OTHER_FAMILY
+            idx = table.get_id(curie)
+            if idx is not None:
+                lineage = table.ancestor_ids(idx) | {idx}
+                for family_idx, name in family_ids:
+                    if family_idx in lineage:
+                        rv = name
+                        break
+            memo[curie] = rv
+        return rv
+
+    return _get_family
+
+
+def _read_cache(path: str | Path | None) -> dict[str, Any] | None:
+    if path is None:
+        return None
+    path = Path(path)
+    if not path.is_file():
+        return None
+    try:
+        cache = json.loads(path.read_text())
+    except ValueError:
+        return None
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return None
+    return cache
+
+
+def _write_cache(
+    path: str | Path,
+    digest: str,
+    index: dict[str, list[str]],
+    results: dict[str, GroundingResult],
+) -> None:
+    cache = {
+        "version": CACHE_VERSION,
+        "digest": digest,
+        "index": index,
+        "results": {text: [result.curie, result.matches] for text, result in results.items()},
+    }
+    Path(path).write_text(json.dumps(cache, ensure_ascii=False))
@@ -3,15 +3,16 @@
 import click
 import pandas as pd
 import pystow
-import ssslm
 from orcid_downloader.standardize import REVERSE_REPLACEMENTS
 from tabulate import tabulate
 
-from qualo.data import get_grounder
+from qualo.coverage import compute_coverage
 
 PATH = pystow.join(
     "orcid", "2023", "output", "roles", name="education_role_unstandardized_summary.tsv"
 )
+DICTIONARY_CACHE_PATH = pystow.join("qualo", "coverage", name="orcid_dictionary.json")
+ROLES_CACHE_PATH = pystow.join("qualo", "coverage", name="orcid_roles.json")
 
 SKIP = {
     "Adjunct Professor",
@@ -43,44 +44,33 @@ SKIP = {
 }
 
 
-def _ground_best(grounder: ssslm.Grounder, text: str) -> str | None:
-    best_match = grounder.get_best_match(text)
-    if not best_match:
-        return None
-    return best_match.curie
-
-
 @click.command()
 def main() -> None:
     """Curate new content."""
-    grounder = get_grounder()
-
-    n_misses = 0
-    n_hits = 0
-    for k, synonyms in REVERSE_REPLACEMENTS.items():
-        if k in SKIP:
-            continue
-
-        term = _ground_best(grounder, k)
-        if not term:
-            pass
-        for s in synonyms:
-            matches = grounder.get_matches(s)
-            if not matches:
-                n_misses += 1
-            elif len(matches) > 1:
-                click.echo(f"Multiple matches for {k} - {s}")
-                n_misses += 1
-            else:
-                n_hits += 1
-
-    total = n_hits + n_misses
-    click.echo(f"Remaining curation: {n_misses}/{total}")
+    keys = {
+        synonym: key
+        for key, synonyms in REVERSE_REPLACEMENTS.items()
+        if key not in SKIP
+        for synonym in synonyms
+    }
+    report = compute_coverage(dict.fromkeys(keys, 1), cache_path=DICTIONARY_CACHE_PATH)
+    for synonym, result in report.results.items():
+        if result.ambiguous:
+            click.echo(f"Multiple matches for {keys[synonym]} - {synonym}")
+    n_misses = report.total - report.grounded + report.ambiguous
+    click.echo(f"Remaining curation: {n_misses}/{report.total}")
 
     # This is for finding new parts
     df = pd.read_csv(PATH, sep="\t")
+    report = compute_coverage(
+        zip(df["role"], df["count"], strict=True), cache_path=ROLES_CACHE_PATH
+    )
+    click.echo(f"Count-weighted coverage of roles: {report.fraction:.1%}")
+    families = sorted(report.by_family.items(), key=lambda item: item[1], reverse=True)
+    click.echo(tabulate(families, headers=["family", "count"], tablefmt="github"))
+
     rows = [
-        (role, count, example, _ground_best(grounder, role))
+        (role, count, example, report.results[role].curie)
         for role, count, example in df.head().values
     ]
     click.echo(tabulate(rows, headers=["role", "count", "example", "curie"], tablefmt="github"))
@@ -11,8 +11,9 @@ import ssslm
 from curies import NamedReference, ReferenceTuple
 
 import qualo
-from qualo.api import append_degree_by_discipline
-from qualo.data import get_disciplines, lint_synonyms
+from qualo.cluster import mine_clusters, write_clusters
+from qualo.data import get_disciplines
+from qualo.expand import DisciplineRequest, plan_expansion
 from qualo.prefixes import (
     BACHELOR_OF_ARTS_PREFIXES_CF,
     BACHELOR_OF_SCIENCE_PREFIXES_CF,
@@ -24,6 +25,7 @@ HERE = Path(__file__).parent.resolve()
 ROOT = HERE.parent.parent.parent.resolve()
 DATA = ROOT.joinpath("data")
 PATH = DATA.joinpath("roles_curate_first.tsv")
+CLUSTERS_PATH = DATA.joinpath("roles_clusters.tsv")
 
 today = datetime.date.today().isoformat()
 QUALIFICATION_PREFIXES = [
@@ -56,6 +58,7 @@ def main(write: bool = False) -> None:  # noqa:C901
     maximum_line = 50_000
 
     dd: defaultdict[str, list[tuple[int, str]]] = defaultdict(list)
+    other: dict[str, int] = {}
 
     curated_disciplines: set[ReferenceTuple] = {r.pair for r in get_disciplines().values()}
 
@@ -77,8 +80,8 @@ def main(write: bool = False) -> None:  # noqa:C901
             if " in " in key:
                 _, _, discipline_text = key.partition(" in ")
                 dd[discipline_text.casefold()].append((int(count), key))
-
-            # TODO add the else, after initial curation for all of this is done
+            else:
+                other[key] = int(count)
 
     disciple_text_to_degrees: dict[str, list[tuple[int, str]]] = {
         discipline: sorted(degrees, reverse=True, key=lambda t: _sort(t[1]))
@@ -89,6 +92,7 @@ def main(write: bool = False) -> None:  # noqa:C901
         disciple_text_to_degrees.items(), key=lambda pair: sum(count for count, _word in pair[1])
     )
     mesh_grounder = _get_mesh_grounder()
+    requests = []
 
     # re-sort by lexicalization
     for discipline_text, degree_texts in sorted(discipline_text_degrees_pairs):
@@ -118,15 +122,20 @@ def main(write: bool = False) -> None:  # noqa:C901
         has_master_of_science = _has(degree_texts, MSC_PREFIXES_CF)
         has_phd = _has(degree_texts, PHD_PREFIXES_CF)
         has_ba = _has(degree_texts, BACHELOR_OF_ARTS_PREFIXES_CF)
-        append_degree_by_discipline(
-            discipline_term,
-            has_bachelor_of_science=has_bachelor_of_science,
-            has_ba=has_ba,
-            has_phd=has_phd,
-            has_msc=has_master_of_science,
+        requests.append(
+            DisciplineRequest(
+                discipline_term,
+                has_bachelor_of_science=has_bachelor_of_science,
+                has_ba=has_ba,
+                has_phd=has_phd,
+                has_msc=has_master_of_science,
+            )
         )
 
-    lint_synonyms()
+    plan_expansion(requests).apply()
+
+    # the rest are clustered so they can be curated in order of their total counts
+    write_clusters(mine_clusters(other, skip_grounded=False), CLUSTERS_PATH)
 
     if write or True:
         _write(discipline_text_degrees_pairs)
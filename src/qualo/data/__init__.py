@@ -1,8 +1,10 @@
 """Access to ontology data."""
 
+import csv
 import datetime
-from collections import defaultdict
-from collections.abc import Mapping, Sequence
+import threading
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
 from typing import Any, cast
@@ -12,6 +14,15 @@ import ssslm
 from curies import NamedReference, Reference
 from curies.vocabulary import has_label
 
+from qualo.profiling import stage
+
+from .bundle import Bundle, get_digests, get_stats, read_bundle, write_bundle
+from .grounder import MutableGrounder
+from .mappings import MappingIndex
+from .relations import RelationIndex
+from .sqlite import SQLiteBackend, write_sqlite
+from .table import NamesView, Relation, TermTable
+
 HERE = Path(__file__).parent.resolve()
 TERMS_PATH = HERE.joinpath("terms.tsv")
 SYNONYMS_PATH = HERE.joinpath("synonyms.tsv")
@@ -20,27 +31,199 @@ MAPPINGS_PATH = HERE.joinpath("mappings.sssom.tsv")
 DEGREE_HOLDER_PATH = HERE.joinpath("holders.tsv")
 CONFERRERS_PATH = HERE.joinpath("conferrers.tsv")
 DISCIPLINES_PATH = HERE.joinpath("disciplines.tsv")
+BUNDLE_PATH = HERE.joinpath("qualo.bundle")
+
+#: The files that are packed in the bundle, keyed by the name of their table
+BUNDLE_SOURCES = {
+    path.name: path
+    for path in [
+        TERMS_PATH,
+        SYNONYMS_PATH,
+        MAPPINGS_PATH,
+        DISCIPLINES_PATH,
+        DEGREE_HOLDER_PATH,
+        CONFERRERS_PATH,
+    ]
+}
 
 PREFIX = "QUALO"
 REPOSITORY = "https://github.com/cthoyt/qualo"
 NAME_LOWER = "qualo"
 TODAY = datetime.date.today()
 
+#: The language of the labels in the terms table
+LABEL_LANGUAGE = "en"
+#: The ISO 639-2 code that synonyms without a language are grouped under
+UNDETERMINED_LANGUAGE = "und"
+
 
 def get_terms_df(**kwargs: Any) -> pd.DataFrame:
     """Get the terms dataframe."""
     return pd.read_csv(TERMS_PATH, sep="\t", **kwargs)
 
 
+@lru_cache
+def get_bundle() -> Bundle | None:
+    """Get the memory-mapped data bundle, or None if it's missing or stale."""
+    with stage("read_bundle"):
+        return read_bundle(BUNDLE_PATH, BUNDLE_SOURCES)
+
+
+def build_bundle() -> None:
+    """Pack the data tables into a binary bundle that can be memory-mapped."""
+    write_bundle(BUNDLE_PATH, table=_read_term_table(), sources=BUNDLE_SOURCES)
+    clear_caches()
+
+
+def build_sqlite(path: Path) -> SQLiteBackend:
+    """Export the data tables to a SQLite file, see :mod:`qualo.data.sqlite`.
+
+    :param path: The path to the SQLite file
+    :returns: A read-only backend that queries the file
+    """
+    write_sqlite(path, table=get_term_table(), sources=BUNDLE_SOURCES)
+    return SQLiteBackend(path)
+
+
+@dataclass(frozen=True)
+class LoadedSources:
+    """The state of the data tables when they were read."""
+
+    #: The SHA-256 digest of each data table, keyed by file name
+    digests: dict[str, str]
+    #: The size and modification time of each data table, keyed by file name
+    stats: dict[str, list[int]]
+
+
+_LOADED_SOURCES: LoadedSources | None = None
+
+
+@lru_cache
+def get_term_table() -> TermTable:
+    """Get the interned table of terms, their parents, and their relations."""
+    global _LOADED_SOURCES
+    _LOADED_SOURCES, table = _load_term_table(get_bundle())
+    return table
+
+
+def get_loaded_sources() -> LoadedSources:
+    """Get the state of the data tables when the cached data was read from them."""
+    get_term_table()
+    if _LOADED_SOURCES is None:
+        raise RuntimeError("the term table was loaded without recording its sources")
+    return _LOADED_SOURCES
+
+
+def _load_term_table(bundle: Bundle | None) -> tuple[LoadedSources, TermTable]:
+    # the stats are taken first, so a change while reading is seen as a new version
+    stats = get_stats(BUNDLE_SOURCES)
+    if bundle is not None:
+        return LoadedSources(bundle.digests, stats), bundle.get_term_table()
+    digests = get_digests(BUNDLE_SOURCES)
+    return LoadedSources(digests, stats), _read_term_table()
+
+
+def load_literal_mappings() -> tuple[LoadedSources, list[ssslm.LiteralMapping]]:
+    """Read the literal mappings from the data tables, bypassing the caches.
+
+    This is used to build a new grounder while other threads keep using the cached
+    data, see :func:`qualo.reload.reload_data`.
+
+    :returns: A pair of the state of the data tables when they were read, and the
+        literal mappings
+    """
+    bundle = read_bundle(BUNDLE_PATH, BUNDLE_SOURCES)
+    sources, table = _load_term_table(bundle)
+    return sources, _read_literal_mappings(NamesView(table, PREFIX), bundle)
+
+
+def _read_term_table() -> TermTable:
+    with stage("read_term_table"):
+        return TermTable.from_paths(
+            TERMS_PATH,
+            disciplines_path=DISCIPLINES_PATH,
+            holders_path=DEGREE_HOLDER_PATH,
+            conferrers_path=CONFERRERS_PATH,
+        )
+
+
+def clear_caches() -> None:
+    """Clear caches that depend on the contents of the data tables."""
+    get_bundle.cache_clear()
+    get_term_table.cache_clear()
+    get_names.cache_clear()
+    get_mapping_index.cache_clear()
+    get_holder_index.cache_clear()
+    get_conferrer_index.cache_clear()
+    _clear_derived_caches()
+
+
+def iter_mapping_records() -> Iterator[dict[str, str]]:
+    """Iterate over the rows of the SSSOM mappings table."""
+    if (bundle := get_bundle()) is not None:
+        yield from bundle.iter_records(MAPPINGS_PATH.name)
+    else:
+        with MAPPINGS_PATH.open() as file:
+            yield from csv.DictReader(file, delimiter="\t")
+
+
+@lru_cache
+def get_mapping_index() -> MappingIndex:
+    """Get an index over the SSSOM mappings from terms to other vocabularies."""
+    with stage("read_mappings"):
+        return MappingIndex(iter_mapping_records())
+
+
+def map_references(
+    references: Iterable[str | Reference],
+    *,
+    prefix: str | None = None,
+    predicate: str | None = None,
+) -> list[NamedReference | None]:
+    """Map references from other vocabularies to terms.
+
+    :param references: CURIEs or references, e.g., ``wikidata:Q752297``. If a prefix
+        is given, these are local unique identifiers instead, e.g., ``Q752297``.
+    :param prefix: The prefix to use for local unique identifiers
+    :param predicate: If given, only mappings with this predicate are used, e.g.,
+        ``skos:exactMatch``
+    :returns: A term for each reference, or None if it isn't mapped. If a reference
+        is mapped to several terms, the first one in the mappings table is used.
+
+    .. code-block:: python
+
+        from qualo.data import map_references
+
+        map_references(["Q752297", "Q163727"], prefix="wikidata")
+    """
+    index = get_mapping_index()
+    table = get_term_table()
+    # inputs often repeat, so each distinct one is only resolved once
+    resolved: dict[str, NamedReference | None] = {}
+    rv: list[NamedReference | None] = []
+    for reference in references:
+        if isinstance(reference, Reference):
+            curie = reference.curie
+        elif prefix is not None:
+            curie = f"{prefix}:{reference}"
+        else:
+            curie = reference
+        if curie not in resolved:
+            subjects = index.get_subjects(curie, predicate=predicate)
+            if not subjects:
+                resolved[curie] = None
+            else:
+                idx = table.get_id(subjects[0])
+                name = table.label(idx) if idx is not None else ""
+                resolved[curie] = NamedReference.from_curie(subjects[0], name)
+        rv.append(resolved[curie])
+    return rv
+
+
 @lru_cache
 def get_names() -> Mapping[NamedReference, str]:
     """Get all names."""
-    df = get_terms_df()
-    df = df[df["curie"].str.startswith(f"{PREFIX}:")]
-    df["curie"] = [
-        NamedReference.from_curie(curie, name) for curie, name in df[["curie", "label"]].values
-    ]
-    return dict(df[["curie", "label"]].values)
+    return NamesView(get_term_table(), PREFIX)
 
 
 def get_highest() -> int:
@@ -50,10 +233,99 @@ def get_highest() -> int:
     return max(int(value.removeprefix(pp)) for value in df["curie"])
 
 
+_GROUNDERS: dict[str | None, MutableGrounder] = {}
+_GROUNDERS_LOCK = threading.Lock()
+
+
+def get_grounder(language: str | None = None) -> MutableGrounder:
+    """Get a grounder.
+
+    :param language: If given, only labels and synonyms in this language are included.
+        Labels are in English and synonyms without a language are grouped under
+        :data:`UNDETERMINED_LANGUAGE`. Each language's grounder is built the first
+        time it's requested.
+    :returns: A grounder. It's kept up-to-date in place by :func:`add_synonym`
+        and :func:`append_term`, so it doesn't need to be rebuilt during curation.
+    """
+    grounder = _GROUNDERS.get(language)
+    if grounder is not None:
+        return grounder
+    with _GROUNDERS_LOCK:
+        grounder = _GROUNDERS.get(language)
+        if grounder is None:
+            if language is None:
+                literal_mappings = get_literal_mappings()
+            else:
+                literal_mappings = _get_language_partitions().get(language, [])
+            with stage("make_grounder"):
+                grounder = MutableGrounder.from_literal_mappings(literal_mappings)
+            _GROUNDERS[language] = grounder
+    return grounder
+
+
+def clear_grounders() -> None:
+    """Clear the grounders, so they're rebuilt from the data tables when next requested."""
+    with _GROUNDERS_LOCK:
+        _GROUNDERS.clear()
+
+
+def swap_grounders(grounders: dict[str | None, MutableGrounder]) -> None:
+    """Replace all grounders at once.
+
+    Calls that already got a grounder keep using it, and calls afterwards get the new
+    ones. Grounders for languages that aren't given are rebuilt when next requested.
+    """
+    global _GROUNDERS
+    with _GROUNDERS_LOCK:
+        _GROUNDERS = grounders
+    _clear_derived_caches()
+
+
+def update_grounders(
+    added: Iterable[ssslm.LiteralMapping] = (),
+    removed: Iterable[ssslm.LiteralMapping | Reference] = (),
+) -> None:
+    """Update the grounders that have already been built in place.
+
+    This should be called after changing the synonyms or terms tables outside of
+    :func:`add_synonym` and :func:`append_term`, which already call it. Indexes
+    derived from the literal mappings are rebuilt the next time they're requested.
+
+    :param added: Literal mappings to add
+    :param removed: Literal mappings or references to remove
+    """
+    added = list(added)
+    removed = list(removed)
+    with _GROUNDERS_LOCK:
+        for language, grounder in _GROUNDERS.items():
+            for literal_mapping in added:
+                if language is None or language == _get_language(literal_mapping):
+                    grounder.add(literal_mapping)
+            for target in removed:
+                grounder.remove(target)
+    _clear_derived_caches()
+
+
+def _clear_derived_caches() -> None:
+    """Clear indexes built from the literal mappings, so they're rebuilt when next requested."""
+    from qualo.annotate import get_automaton
+    from qualo.fuzzy import get_approximate_index
+
+    _get_language_partitions.cache_clear()
+    get_approximate_index.cache_clear()
+    get_automaton.cache_clear()
+
+
+def _get_language(literal_mapping: ssslm.LiteralMapping) -> str:
+    return literal_mapping.language or UNDETERMINED_LANGUAGE
+
+
 @lru_cache
-def get_grounder() -> "ssslm.Grounder":
-    """Get a grounder."""
-    return ssslm.make_grounder(get_literal_mappings())
+def _get_language_partitions() -> dict[str, list[ssslm.LiteralMapping]]:
+    rv: dict[str, list[ssslm.LiteralMapping]] = {}
+    for literal_mapping in get_literal_mappings():
+        rv.setdefault(_get_language(literal_mapping), []).append(literal_mapping)
+    return rv
 
 
 def get_literal_mappings(
@@ -62,15 +334,35 @@ def get_literal_mappings(
     """Get literal mapping objects for terms in the ontology."""
     if names is None:
         names = get_names()
-    rv = ssslm.read_literal_mappings(SYNONYMS_PATH, names=cast(dict[Reference, str], names))
-    rv.extend(
-        ssslm.LiteralMapping(text=name, reference=reference, source=PREFIX, predicate=has_label)
-        for reference, name in names.items()
-        if reference.prefix == PREFIX
-    )
+    return _read_literal_mappings(names, get_bundle())
+
+
+def _read_literal_mappings(
+    names: Mapping[NamedReference, str], bundle: Bundle | None
+) -> list[ssslm.LiteralMapping]:
+    with stage("read_literal_mappings"):
+        if bundle is not None:
+            rv = [
+                ssslm.LiteralMapping.from_row(record, names=cast(dict[Reference, str], names))
+                for record in bundle.iter_records(SYNONYMS_PATH.name)
+            ]
+        else:
+            rv = ssslm.read_literal_mappings(SYNONYMS_PATH, names=cast(dict[Reference, str], names))
+        rv.extend(
+            get_label_literal_mapping(reference, name)
+            for reference, name in names.items()
+            if reference.prefix == PREFIX
+        )
     return rv
 
 
+def get_label_literal_mapping(reference: NamedReference, name: str) -> ssslm.LiteralMapping:
+    """Get the literal mapping for a term's label."""
+    return ssslm.LiteralMapping(
+        text=name, reference=reference, source=PREFIX, predicate=has_label, language=LABEL_LANGUAGE
+    )
+
+
 def lint_table(
     path: Path,
     *,
@@ -78,8 +370,12 @@ def lint_table(
     duplicate_subsets: str | Sequence[str] | None = None,
     casefold: str | None = None,
     sep: str | None = "\t",
-) -> None:
-    """Lint a table."""
+) -> bool:
+    """Lint a table.
+
+    :returns: If the table was changed. Tables that are already linted aren't
+        rewritten, so their modification times stay the same.
+    """
     df = pd.read_csv(path, sep=sep)
     df = df.sort_values(key)
     if casefold:
@@ -89,51 +385,100 @@ def lint_table(
         df = df.drop_duplicates(duplicate_subsets)
     if casefold:
         del df[f"{casefold}_cf"]
-    df.to_csv(path, index=False, sep=sep)
+    return _write_if_changed(path, df.to_csv(index=False, sep=sep))
+
 
+def lint_synonyms() -> bool:
+    """Lint the synonyms table.
 
-def lint_synonyms() -> None:
-    """Lint the synonyms table."""
-    ssslm.lint_literal_mappings(SYNONYMS_PATH)
+    :returns: If the table was changed
+    """
+    literal_mappings = sorted(ssslm.read_literal_mappings(SYNONYMS_PATH))
+    df = ssslm.literal_mappings_to_df(literal_mappings)
+    return _write_if_changed(SYNONYMS_PATH, df.to_csv(index=False, sep="\t"))
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    if path.read_text() == content:
+        return False
+    path.write_text(content)
+    clear_caches()
+    return True
 
 
 def add_synonym(synonym: ssslm.LiteralMapping) -> None:
     """Add a synonym."""
     ssslm.append_literal_mapping(synonym, SYNONYMS_PATH)
+    get_bundle.cache_clear()
+    update_grounders(added=[synonym])
 
 
 def get_disciplines() -> dict[NamedReference, NamedReference]:
     """Get the disciplines dictionary."""
-    disciplines_df = pd.read_csv(DISCIPLINES_PATH, sep="\t")
-    for column_id, column_label in [("curie", "label"), ("discipline", "discipline_label")]:
-        disciplines_df[column_id] = [
-            NamedReference.from_curie(curie, label)
-            for curie, label in disciplines_df[[column_id, column_label]].values
-        ]
-    disciplines = dict(disciplines_df[["curie", "discipline"]].values)
-    return disciplines
+    table = get_term_table()
+    return {
+        table.reference(degree): table.reference(discipline)
+        for degree, discipline in table.disciplines
+    }
 
 
 def get_degree_holders() -> dict[NamedReference, list[NamedReference]]:
     """Get example degree holders."""
-    rv: defaultdict[NamedReference, list[NamedReference]] = defaultdict(list)
-    df = pd.read_csv(DEGREE_HOLDER_PATH, sep="\t").values
-    for degree_curie, degree_name, person_curie, person_name in df:
-        rv[NamedReference.from_curie(degree_curie, degree_name)].append(
-            NamedReference.from_curie(person_curie, person_name)
-        )
-    return dict(rv)
+    return _group_relation(get_term_table(), get_term_table().holders)
 
 
 def get_conferrers() -> dict[NamedReference, list[NamedReference]]:
     """Get example conferrers."""
-    rv: defaultdict[NamedReference, list[NamedReference]] = defaultdict(list)
-    df = pd.read_csv(CONFERRERS_PATH, sep="\t").values
-    for degree_curie, degree_name, conferrer_curie, conferrer_name, _reference in df:
-        rv[NamedReference.from_curie(degree_curie, degree_name)].append(
-            NamedReference.from_curie(conferrer_curie, conferrer_name)
-        )
-    return dict(rv)
+    return _group_relation(get_term_table(), get_term_table().conferrers)
+
+
+@lru_cache
+def get_holder_index() -> RelationIndex:
+    """Get an index between degrees and example degree holders."""
+    table = get_term_table()
+    return RelationIndex(table, table.holders)
+
+
+@lru_cache
+def get_conferrer_index() -> RelationIndex:
+    """Get an index between degrees and example conferrers."""
+    table = get_term_table()
+    return RelationIndex(table, table.conferrers)
+
+
+def get_degrees_by_holder(
+    people: Iterable[str | Reference], *, under: str | Reference | None = None
+) -> list[list[NamedReference]]:
+    """Get the degrees held by each person.
+
+    :param people: References or CURIEs for people, e.g., ``orcid:0000-0003-4423-4370``
+    :param under: If given, only degrees that are this term or one of its descendants
+        are returned
+    :returns: A list of degrees for each person
+    """
+    return get_holder_index().get_degrees_many(people, under=under)
+
+
+def get_degrees_by_conferrer(
+    organizations: Iterable[str | Reference], *, under: str | Reference | None = None
+) -> list[list[NamedReference]]:
+    """Get the degrees conferred by each organization.
+
+    :param organizations: References or CURIEs for organizations, e.g., ``ror:024z2rq82``
+    :param under: If given, only degrees that are this term or one of its descendants
+        are returned, e.g., ``QUALO:0000016`` for all doctoral degrees
+    :returns: A list of degrees for each organization
+    """
+    return get_conferrer_index().get_degrees_many(organizations, under=under)
+
+
+def _group_relation(
+    table: TermTable, relation: Relation
+) -> dict[NamedReference, list[NamedReference]]:
+    return {
+        table.reference(subject): [table.reference(obj) for obj in objects]
+        for subject, objects in relation.group().items()
+    }
 
 
 def append_term(
@@ -147,6 +492,8 @@ def append_term(
         row = (*row, parent_2.curie, parent_2.name)
     with TERMS_PATH.open("a") as file:
         print(*row, sep="\t", file=file)
+    clear_caches()
+    update_grounders(added=[get_label_literal_mapping(new, name)])
     return new
 
 
@@ -156,6 +503,7 @@ def add_discipline(degree: NamedReference, discipline: NamedReference) -> None:
         raise ValueError
     with DISCIPLINES_PATH.open("a") as file:
         print(degree.curie, degree.name, discipline.curie, discipline.name, sep="\t", file=file)
+    clear_caches()
 
 
 def add_degree_holder(degree: NamedReference, person: NamedReference) -> None:
@@ -164,3 +512,4 @@ def add_degree_holder(degree: NamedReference, person: NamedReference) -> None:
         raise ValueError
     with DEGREE_HOLDER_PATH.open("a") as file:
         print(degree.curie, degree.name, person.curie, person.name, sep="\t", file=file)
+    clear_caches()
@@ -0,0 +1,261 @@
+"""A versioned binary bundle of the ontology data that can be memory-mapped.
+
+The bundle has the following layout:
+
+1. the magic bytes ``QUALOBDL``
+2. the length of the JSON header, as a little-endian unsigned 32-bit integer
+3. a JSON header with the format version, the byte order, the size, modification
+   time, and SHA-256 digest of each source file, and the offset and length of each
+   section
+4. the sections, each aligned to 8 bytes. Section offsets in the header are
+   relative to the end of the header.
+
+Each string is stored once in a string table, which is made from an array of
+offsets and a blob of UTF-8 bytes. Everything else is a fixed-width array of
+32-bit integers, most of which are indexes into the string table. This means
+that the bundle can be memory-mapped read-only and used without parsing, and that
+forked processes share its pages.
+"""
+
+import csv
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import Any, cast
+
+from .table import Relation, TermTable
+
+__all__ = [
+    "BUNDLE_FORMAT_VERSION",
+    "Bundle",
+    "PackedStrings",
+    "read_bundle",
+    "write_bundle",
+]
+
+#: The version of the binary layout. Increment this when the layout changes.
+BUNDLE_FORMAT_VERSION = 1
+
+MAGIC = b"QUALOBDL"
+_LENGTH = struct.Struct("<I")
+_ALIGNMENT = 8
+_RELATIONS = ("disciplines", "holders", "conferrers")
+
+
+class PackedStrings(Sequence[str]):
+    """A read-only sequence of strings backed by an offsets array and a UTF-8 blob."""
+
+    def __init__(self, offsets: Sequence[int], blob: memoryview | bytes) -> None:
+        """Initialize the string table."""
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:  # type:ignore[override]
+        if idx < 0:
+            idx += len(self)
+        return bytes(self._blob[self._offsets[idx] : self._offsets[idx + 1]]).decode("utf-8")
+
+
+class _StringColumn(Sequence[str]):
+    """A read-only sequence of strings, given as IDs into a string table."""
+
+    def __init__(self, strings: PackedStrings, ids: Sequence[int]) -> None:
+        self._strings = strings
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, idx: int) -> str:  # type:ignore[override]
+        return self._strings[self._ids[idx]]
+
+
+class Bundle:
+    """A memory-mapped bundle."""
+
+    def __init__(self, buffer: mmap.mmap | bytes, header: dict[str, Any], start: int) -> None:
+        """Initialize the bundle from a buffer, its parsed header, and where its body starts."""
+        self._buffer = buffer
+        self._view = memoryview(buffer)[start:]
+        self.header = header
+        self.strings = PackedStrings(self._ints("strings.offsets"), self._section("strings.blob"))
+
+    @property
+    def digests(self) -> dict[str, str]:
+        """Get the SHA-256 digest of each source file the bundle was written from."""
+        return cast(dict[str, str], self.header["digests"])
+
+    def _section(self, name: str) -> memoryview:
+        offset, length = self.header["sections"][name]
+        return self._view[offset : offset + length]
+
+    def _ints(self, name: str) -> memoryview:
+        return self._section(name).cast("i")
+
+    def get_term_table(self) -> TermTable:
+        """Get a read-only term table backed by the bundle."""
+        return TermTable.from_columns(
+            curies=_StringColumn(self.strings, self._ints("terms.curies")),
+            labels=_StringColumn(self.strings, self._ints("terms.labels")),
+            n_terms=self.header["n_terms"],
+            parents=self._ints("terms.parents"),
+            **{
+                name: Relation.from_arrays(
+                    self._ints(f"{name}.subjects"), self._ints(f"{name}.objects")
+                )
+                for name in _RELATIONS
+            },
+        )
+
+    def iter_records(self, name: str) -> Iterator[dict[str, str]]:
+        """Iterate over the rows of a packed table, skipping empty cells."""
+        columns = self.header["tables"][name]
+        cells = self._ints(f"{name}.cells")
+        width = len(columns)
+        for start in range(0, len(cells), width):
+            yield {
+                column: self.strings[string_id]
+                for column, string_id in zip(columns, cells[start : start + width], strict=True)
+                if string_id
+            }
+
+
+def get_digests(sources: Mapping[str, Path]) -> dict[str, str]:
+    """Get the SHA-256 digest of each source file."""
+    return {name: hashlib.sha256(path.read_bytes()).hexdigest() for name, path in sources.items()}
+
+
+def get_stats(sources: Mapping[str, Path]) -> dict[str, list[int]]:
+    """Get the size and modification time of each source file, which are cheap to check."""
+    rv = {}
+    for name, path in sources.items():
+        stat = path.stat()
+        rv[name] = [stat.st_size, stat.st_mtime_ns]
+    return rv
+
+
+def read_bundle(path: Path, sources: Mapping[str, Path]) -> Bundle | None:
+    """Memory-map a bundle, if it exists and is up-to-date with its sources.
+
+    :param path: The path to the bundle
+    :param sources: A mapping from names to the paths of the source files. If any of
+        these have changed since the bundle was written, it's considered stale.
+    :returns: A bundle, or None if the bundle is missing, was written in a different
+        format or byte order, or is stale.
+
+    The sizes and modification times of the sources are compared first, and the
+    sources are only hashed when these differ, e.g., after a fresh checkout.
+    """
+    if not path.is_file():
+        return None
+    with path.open("rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            return None
+        (header_length,) = _LENGTH.unpack(file.read(_LENGTH.size))
+        header = json.loads(file.read(header_length))
+        if (
+            header.get("version") != BUNDLE_FORMAT_VERSION
+            or header.get("byteorder") != sys.byteorder
+            or (
+                header.get("stats") != get_stats(sources)
+                and header.get("digests") != get_digests(sources)
+            )
+        ):
+            return None
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return Bundle(buffer, header, len(MAGIC) + _LENGTH.size + header_length)
+
+
+class _StringTableBuilder:
+    def __init__(self) -> None:
+        # the empty string always gets ID 0, so 0 can be used for empty cells
+        self.index: dict[str, int] = {"": 0}
+
+    def add(self, text: str) -> int:
+        idx = self.index.get(text)
+        if idx is None:
+            idx = self.index[text] = len(self.index)
+        return idx
+
+    def add_all(self, texts: Iterable[str]) -> "array[int]":
+        return array("i", map(self.add, texts))
+
+    def pack(self) -> "tuple[array[int], bytes]":
+        offsets = array("i", [0])
+        blob = bytearray()
+        for text in self.index:
+            blob.extend(text.encode("utf-8"))
+            offsets.append(len(blob))
+        return offsets, bytes(blob)
+
+
+def write_bundle(path: Path, *, table: TermTable, sources: Mapping[str, Path]) -> None:
+    """Write a bundle.
+
+    :param path: The path where the bundle is written
+    :param table: A term table. This should be built from the sources.
+    :param sources: A mapping from names to the paths of the source files. Each
+        file is packed as a table of string IDs, and its digest is recorded so
+        stale bundles can be detected.
+    """
+    strings = _StringTableBuilder()
+    sections: dict[str, array[int] | bytes] = {
+        "terms.curies": strings.add_all(table.curies),
+        "terms.labels": strings.add_all(table.labels),
+        "terms.parents": array("i", table.parents),
+    }
+    for name in _RELATIONS:
+        relation: Relation = getattr(table, name)
+        sections[f"{name}.subjects"] = array("i", relation.subjects)
+        sections[f"{name}.objects"] = array("i", relation.objects)
+
+    tables = {}
+    for name, source_path in sources.items():
+        with source_path.open() as file:
+            reader = csv.reader(file, delimiter="\t")
+            columns = next(reader)
+            cells = array("i")
+            for row in reader:
+                if not row:
+                    continue
+                row = row[: len(columns)] + [""] * (len(columns) - len(row))
+                cells.extend(map(strings.add, row))
+        tables[name] = columns
+        sections[f"{name}.cells"] = cells
+
+    sections["strings.offsets"], sections["strings.blob"] = strings.pack()
+
+    body = bytearray()
+    section_index = {}
+    for name, data in sections.items():
+        raw = data.tobytes() if isinstance(data, array) else data
+        section_index[name] = [len(body), len(raw)]
+        body.extend(raw)
+        body.extend(b"\0" * (-len(body) % _ALIGNMENT))
+
+    header = {
+        "version": BUNDLE_FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "digests": get_digests(sources),
+        "stats": get_stats(sources),
+        "n_terms": table.n_terms,
+        "tables": tables,
+        "sections": section_index,
+    }
+    header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+    # pad the header with whitespace so the body starts on an aligned offset
+    header_bytes += b" " * (-(len(MAGIC) + _LENGTH.size + len(header_bytes)) % _ALIGNMENT)
+
+    with path.open("wb") as file:
+        file.write(MAGIC)
+        file.write(_LENGTH.pack(len(header_bytes)))
+        file.write(header_bytes)
+        file.write(body)
@@ -0,0 +1,158 @@
+"""A grounder that can be updated in place."""
+
+import threading
+from typing import TYPE_CHECKING, Any, cast
+
+import ssslm
+from curies import NamableReference, Reference
+
+if TYPE_CHECKING:
+    import gilda
+
+__all__ = [
+    "MutableGrounder",
+]
+
+
+class MutableGrounder(ssslm.GildaGrounder[NamableReference]):
+    """A grounder whose literal mappings can be added and removed without a rebuild.
+
+    Lookups can run concurrently with updates from another thread, since updates
+    never change the dictionaries that lookups read. Instead, each update changes
+    copies of the entries and the prefix index and swaps them in. Only the keys of
+    the prefix index for the texts that changed are updated, so it isn't rebuilt.
+
+    Gilda has no public API for updates, so this relies on the following internals
+    of :class:`gilda.Grounder`, which are checked in ``tests/test_grounder.py``:
+
+    - ``entries`` is a dictionary from normalized texts to lists of :class:`gilda.Term`
+    - ``_prefix_index`` is a dictionary from the first word of each normalized text
+      to the numbers of words in the texts, which is built lazily from ``entries``
+      when it's empty
+    - ``_generate_lookups`` gets the normalized texts looked up for a text
+    """
+
+    def __init__(
+        self,
+        grounder: "gilda.Grounder",
+        *,
+        reference_cls: type[NamableReference] | None = None,
+    ) -> None:
+        """Initialize the grounder, wrapping a :class:`gilda.Grounder`."""
+        super().__init__(grounder, reference_cls=reference_cls)
+        #: Serializes updates, which are rare compared to lookups
+        self._lock = threading.Lock()
+
+    def add(self, literal_mapping: ssslm.LiteralMapping) -> None:
+        """Add a literal mapping.
+
+        :param literal_mapping: A literal mapping. Its reference needs a name.
+        :raises ValueError: If the literal mapping can't be converted for indexing
+        """
+        term = literal_mapping.to_gilda()
+        with self._lock:
+            entries = dict(self._get_entries())
+            entries[term.norm_text] = [*entries.get(term.norm_text, []), term]
+            prefix_index = self._get_prefix_index()
+            # an empty prefix index is built from the new entries on the next lookup
+            if prefix_index and (words := term.norm_text.split()):
+                prefix_index = {
+                    **prefix_index,
+                    words[0]: {*prefix_index.get(words[0], ()), len(words)},
+                }
+            self._swap(entries, prefix_index)
+
+    def remove(self, target: ssslm.LiteralMapping | Reference) -> int:
+        """Remove a literal mapping, or all literal mappings for a reference.
+
+        :param target: A literal mapping, which is matched on its text and reference,
+            or a reference
+        :returns: The number of indexed terms that were removed
+        """
+        reference: Reference
+        with self._lock:
+            entries = dict(self._get_entries())
+            if isinstance(target, ssslm.LiteralMapping):
+                norm_texts = [target.to_gilda().norm_text]
+                reference = target.reference
+            else:
+                norm_texts = list(entries)
+                reference = target
+
+            removed = 0
+            # the first words of the normalized texts that are no longer indexed
+            first_words = set()
+            for norm_text in norm_texts:
+                terms = entries.get(norm_text)
+                if not terms:
+                    continue
+                kept = [
+                    term
+                    for term in terms
+                    if (term.db, term.id) != (reference.prefix, reference.identifier)
+                ]
+                removed += len(terms) - len(kept)
+                if kept:
+                    entries[norm_text] = kept
+                else:
+                    del entries[norm_text]
+                    first_words.update(norm_text.split()[:1])
+            if not removed:
+                return 0
+
+            prefix_index = self._get_prefix_index()
+            if prefix_index and first_words:
+                prefix_index = _remove_prefixes(prefix_index, entries, first_words)
+            self._swap(entries, prefix_index)
+        return removed
+
+    def _swap(self, entries: dict[str, list[Any]], prefix_index: dict[str, set[int]]) -> None:
+        """Replace the underlying entries and prefix index, without changing the old ones."""
+        self._grounder._prefix_index = prefix_index
+        self._grounder.entries = entries
+
+    def get_index(self) -> dict[str, list[str]]:
+        """Get each indexed normalized text with its terms' CURIEs, statuses, and texts.
+
+        The terms are listed in the order gilda has them in, since it breaks ties in
+        that order, and with their original texts, since gilda scores matches on them.
+        Two grounders with the same index give the same results.
+        """
+        return {
+            norm_text: [f"{term.db}:{term.id}\t{term.status}\t{term.text}" for term in terms]
+            for norm_text, terms in self._get_entries().items()
+        }
+
+    def get_lookups(self, text: str) -> set[str]:
+        """Get the normalized texts that are looked up in the index when grounding a text."""
+        return self._grounder._generate_lookups(text)
+
+    def _get_prefix_index(self) -> dict[str, set[int]]:
+        """Get the underlying dictionary from first words to numbers of words."""
+        return cast(dict[str, set[int]], self._grounder._prefix_index)
+
+    def _get_entries(self) -> dict[str, list[Any]]:
+        """Get the underlying dictionary from normalized texts to :class:`gilda.Term` lists."""
+        return cast(dict[str, list[Any]], self._grounder.entries)
+
+
+def _remove_prefixes(
+    prefix_index: dict[str, set[int]], entries: dict[str, list[Any]], first_words: set[str]
+) -> dict[str, set[int]]:
+    """Get a copy of a prefix index with the lengths of some first words recounted.
+
+    Another text with the same first word and length might still be indexed, so the
+    lengths of each first word are counted again from the remaining entries.
+    """
+    lengths: dict[str, set[int]] = {word: set() for word in first_words}
+    for norm_text in entries:
+        words = norm_text.split()
+        if words and words[0] in lengths:
+            lengths[words[0]].add(len(words))
+    rv = dict(prefix_index)
+    for word, word_lengths in lengths.items():
+        if word_lengths:
+            rv[word] = word_lengths
+        else:
+            del rv[word]
+    return rv
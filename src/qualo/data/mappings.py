@@ -0,0 +1,82 @@
+"""An in-memory index over the SSSOM mappings."""
+
+from collections.abc import Iterable, Mapping
+
+from curies import Reference
+
+__all__ = [
+    "MappingIndex",
+]
+
+
+class MappingIndex:
+    """A bidirectional index from subjects to objects and from objects to subjects.
+
+    Each lookup is a dictionary access followed by a filter over the (usually one or
+    two) mappings for that CURIE.
+    """
+
+    def __init__(self, records: Iterable[Mapping[str, str]]) -> None:
+        """Build the index.
+
+        :param records: Rows of a SSSOM table, with at least the ``subject_id``,
+            ``predicate_id``, and ``object_id`` columns
+        """
+        self._by_subject: dict[str, list[tuple[str, str]]] = {}
+        self._by_object: dict[str, list[tuple[str, str]]] = {}
+        for record in records:
+            subject, predicate, obj = (
+                record["subject_id"],
+                record["predicate_id"],
+                record["object_id"],
+            )
+            self._by_subject.setdefault(subject, []).append((predicate, obj))
+            self._by_object.setdefault(obj, []).append((predicate, subject))
+
+    def __len__(self) -> int:
+        return sum(len(pairs) for pairs in self._by_subject.values())
+
+    def get_objects(
+        self,
+        subject: str | Reference,
+        *,
+        predicate: str | None = None,
+        prefix: str | None = None,
+    ) -> list[str]:
+        """Get the CURIEs of the objects mapped from a subject.
+
+        :param subject: The subject's CURIE, e.g., ``QUALO:0000016``
+        :param predicate: If given, only mappings with this predicate are used
+        :param prefix: If given, only objects with this prefix are returned, e.g.,
+            ``wikidata``
+        :returns: A list of object CURIEs
+        """
+        return _filter(self._by_subject, subject, predicate, prefix)
+
+    def get_subjects(self, obj: str | Reference, *, predicate: str | None = None) -> list[str]:
+        """Get the CURIEs of the subjects mapped to an object.
+
+        :param obj: The object's CURIE, e.g., ``wikidata:Q752297``
+        :param predicate: If given, only mappings with this predicate are used
+        :returns: A list of subject CURIEs
+        """
+        return _filter(self._by_object, obj, predicate, None)
+
+
+def _filter(
+    index: dict[str, list[tuple[str, str]]],
+    key: str | Reference,
+    predicate: str | None,
+    prefix: str | None,
+) -> list[str]:
+    if isinstance(key, Reference):
+        key = key.curie
+    pairs = index.get(key)
+    if not pairs:
+        return []
+    return [
+        curie
+        for pair_predicate, curie in pairs
+        if (predicate is None or pair_predicate == predicate)
+        and (prefix is None or curie.startswith(f"{prefix}:"))
+    ]
@@ -0,0 +1,93 @@
+"""Indexes over the relations between degrees and people or organizations."""
+
+from collections.abc import Iterable
+
+from curies import NamedReference, Reference
+
+from .table import Relation, TermTable
+
+__all__ = [
+    "RelationIndex",
+]
+
+
+class RelationIndex:
+    """Forward and reverse indexes over a relation from degrees to other entities.
+
+    Queries can be rolled up through the hierarchy, e.g., the degrees conferred by an
+    organization can be restricted to the ones under doctoral degree.
+    """
+
+    def __init__(self, table: TermTable, relation: Relation) -> None:
+        """Build the indexes.
+
+        :param table: The term table, used for names and the hierarchy
+        :param relation: A relation from degrees to other entities, e.g., the degree
+            holders or conferrers
+        """
+        self._table = table
+        self._forward = relation.group()
+        self._reverse: dict[int, list[int]] = {}
+        for subject, obj in relation:
+            self._reverse.setdefault(obj, []).append(subject)
+
+    def get_degrees(
+        self, entity: str | Reference, *, under: str | Reference | None = None
+    ) -> list[NamedReference]:
+        """Get the degrees related to an entity.
+
+        :param entity: A person or organization, e.g., ``ror:024z2rq82``
+        :param under: If given, only degrees that are this term or one of its
+            descendants are returned, e.g., ``QUALO:0000016`` for doctoral degrees
+        :returns: A list of degrees
+        """
+        return self.get_degrees_many([entity], under=under)[0]
+
+    def get_degrees_many(
+        self, entities: Iterable[str | Reference], *, under: str | Reference | None = None
+    ) -> list[list[NamedReference]]:
+        """Get the degrees related to each of several entities, see :meth:`get_degrees`."""
+        under_id = self._get_under_id(under)
+        if under_id is None and under is not None:
+            return [[] for _ in entities]
+        rv = []
+        for entity in entities:
+            idx = self._table.get_id(entity)
+            degrees = self._reverse.get(idx, []) if idx is not None else []
+            rv.append(
+                [
+                    self._table.reference(degree)
+                    for degree in degrees
+                    if under_id is None or self._is_under(degree, under_id)
+                ]
+            )
+        return rv
+
+    def get_entities(
+        self, degree: str | Reference, *, include_descendants: bool = False
+    ) -> list[NamedReference]:
+        """Get the entities related to a degree.
+
+        :param degree: A degree, e.g., ``QUALO:0000016``
+        :param include_descendants: Should entities related to the degree's
+            descendants be included? If so, each entity is only returned once.
+        :returns: A list of people or organizations
+        """
+        degree_id = self._table.get_id(degree)
+        if degree_id is None:
+            return []
+        if not include_descendants:
+            return [self._table.reference(obj) for obj in self._forward.get(degree_id, [])]
+        entities = {
+            obj: None
+            for subject, objects in self._forward.items()
+            if self._is_under(subject, degree_id)
+            for obj in objects
+        }
+        return [self._table.reference(obj) for obj in entities]
+
+    def _get_under_id(self, under: str | Reference | None) -> int | None:
+        return None if under is None else self._table.get_id(under)
+
+    def _is_under(self, degree: int, ancestor: int) -> bool:
+        return degree == ancestor or ancestor in self._table.ancestor_ids(degree)
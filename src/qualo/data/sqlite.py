@@ -0,0 +1,320 @@
+"""Export the data tables to SQLite, and query the export without loading it.
+
+The export has one table for each data table, with the same columns, plus:
+
+- ``ancestors``, the transitive closure of the hierarchy, with a row for each term
+  and each of its ancestors
+- ``synonyms_fts``, an FTS5 full-text index over the synonyms' texts
+- ``metadata``, with the format version and the digest of each data table
+
+Since SQLite files can be opened read-only by any number of processes at once, and
+pages are loaded lazily and shared by the operating system's page cache, services
+can query QUALO with :class:`SQLiteBackend` without paying to load the tables in
+each process.
+"""
+
+import csv
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+from curies import NamedReference, Reference
+
+from .bundle import get_digests
+from .table import TermTable
+
+__all__ = [
+    "SQLITE_FORMAT_VERSION",
+    "SQLiteBackend",
+    "write_sqlite",
+]
+
+#: The version of the schema. Increment this when it changes.
+SQLITE_FORMAT_VERSION = 1
+
+#: For each data table, the name of its SQL table and the columns to index
+TABLES: dict[str, tuple[str, list[tuple[str, ...]]]] = {
+    "terms.tsv": ("terms", [("curie",), ("parent_1",), ("parent_2",)]),
+    "synonyms.tsv": ("synonyms", [("curie",), ("text",)]),
+    "mappings.sssom.tsv": ("mappings", [("subject_id",), ("object_id", "predicate_id")]),
+    "disciplines.tsv": ("disciplines", [("curie",), ("discipline",)]),
+    "holders.tsv": ("holders", [("curie",), ("person_curie",)]),
+    "conferrers.tsv": ("conferrers", [("curie",), ("conferrer_curie",)]),
+}
+
+SCHEMA = """\
+CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE ancestors (
+    curie TEXT NOT NULL,
+    ancestor TEXT NOT NULL,
+    ancestor_label TEXT,
+    PRIMARY KEY (curie, ancestor)
+) WITHOUT ROWID;
+CREATE INDEX ancestors_ancestor ON ancestors (ancestor, curie);
+"""
+
+
+def write_sqlite(path: Path, *, table: TermTable, sources: Mapping[str, Path]) -> None:
+    """Write the data tables to a SQLite file.
+
+    The file is written next to the destination and then moved into place, so
+    processes that are reading the old file aren't disrupted.
+
+    :param path: The path to the SQLite file
+    :param table: The term table, used to compute the ancestor closure
+    :param sources: A mapping from data table file names to paths
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        _write_sqlite(tmp_path, table=table, sources=sources)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, path)
+
+
+def _write_sqlite(path: Path, *, table: TermTable, sources: Mapping[str, Path]) -> None:
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.executescript(SCHEMA)
+            for name, (sql_table, indexes) in TABLES.items():
+                _write_table(conn, sources[name], sql_table, indexes)
+            conn.executemany(
+                "INSERT INTO ancestors VALUES (?, ?, ?)",
+                (
+                    (table.curie(idx), table.curie(ancestor), table.label(ancestor) or None)
+                    for idx in table.term_ids()
+                    for ancestor in table.ancestor_ids(idx)
+                ),
+            )
+            conn.executescript(
+                """\
+                CREATE VIRTUAL TABLE synonyms_fts USING fts5(
+                    text, content='synonyms', content_rowid='rowid'
+                );
+                INSERT INTO synonyms_fts (synonyms_fts) VALUES ('rebuild');
+                """
+            )
+            conn.executemany(
+                "INSERT INTO metadata VALUES (?, ?)",
+                [
+                    ("format_version", str(SQLITE_FORMAT_VERSION)),
+                    *((f"digest:{k}", v) for k, v in get_digests(sources).items()),
+                ],
+            )
+        conn.execute("ANALYZE")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def _write_table(
+    conn: sqlite3.Connection, path: Path, sql_table: str, indexes: list[tuple[str, ...]]
+) -> None:
+    with path.open(newline="") as file:
+        reader = csv.reader(file, delimiter="\t")
+        header = next(reader)
+        columns = ", ".join(f'"{column}" TEXT' for column in header)
+        conn.execute(f"CREATE TABLE {sql_table} ({columns})")
+        placeholders = ", ".join("?" * len(header))
+        conn.executemany(
+            f"INSERT INTO {sql_table} VALUES ({placeholders})",  # noqa: S608
+            # empty cells are stored as NULL, and short rows are padded
+            ([cell or None for cell in row] + [None] * (len(header) - len(row)) for row in reader),
+        )
+    for index in indexes:
+        conn.execute(
+            f"CREATE INDEX {sql_table}_{'_'.join(index)} ON {sql_table} ({', '.join(index)})"
+        )
+
+
+class SQLiteBackend:
+    """Read-only queries over a SQLite export, see :func:`write_sqlite`.
+
+    Each thread gets its own read-only connection, so a backend can be shared by
+    threads, and any number of processes can open the same file.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Initialize the backend.
+
+        :param path: The path to a SQLite file written by :func:`write_sqlite`
+        :raises ValueError: If the file has a different format version
+        """
+        self.path = Path(path)
+        self._local = threading.local()
+        row = self._query_one("SELECT value FROM metadata WHERE key = 'format_version'")
+        version = row[0] if row else None
+        if version != str(SQLITE_FORMAT_VERSION):
+            raise ValueError(
+                f"{self.path} has format version {version}, not {SQLITE_FORMAT_VERSION}"
+            )
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Get this thread's connection."""
+        conn: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+            self._local.connection = conn
+        return conn
+
+    def _query(self, sql: str, parameters: Iterable[object] = ()) -> list[tuple[str, ...]]:
+        return self.connection.execute(sql, tuple(parameters)).fetchall()
+
+    def _query_one(self, sql: str, parameters: Iterable[object] = ()) -> tuple[str, ...] | None:
+        row: tuple[str, ...] | None = self.connection.execute(sql, tuple(parameters)).fetchone()
+        return row
+
+    def get_digests(self) -> dict[str, str]:
+        """Get the digests of the data tables that were exported."""
+        rows = self._query("SELECT key, value FROM metadata WHERE key LIKE 'digest:%'")
+        return {key.removeprefix("digest:"): value for key, value in rows}
+
+    def get_name(self, reference: str | Reference) -> str | None:
+        """Get the label for a term, or None if it doesn't exist."""
+        row = self._query_one("SELECT label FROM terms WHERE curie = ?", [_curie(reference)])
+        return row[0] if row else None
+
+    def get_names(self) -> dict[NamedReference, str]:
+        """Get the labels of all terms."""
+        return {
+            NamedReference.from_curie(curie, label): label
+            for curie, label in self._query("SELECT curie, label FROM terms")
+        }
+
+    def get_ancestors(self, reference: str | Reference) -> list[NamedReference]:
+        """Get the ancestors of a term, not including itself."""
+        return self._references(
+            """\
+            SELECT ancestor, coalesce(ancestor_label, '') FROM ancestors
+            WHERE curie = ? ORDER BY ancestor
+            """,
+            [_curie(reference)],
+        )
+
+    def get_descendants(self, reference: str | Reference) -> list[NamedReference]:
+        """Get the descendants of a term, not including itself."""
+        return self._references(
+            """\
+            SELECT a.curie, t.label FROM ancestors a JOIN terms t ON t.curie = a.curie
+            WHERE a.ancestor = ? ORDER BY a.curie
+            """,
+            [_curie(reference)],
+        )
+
+    def search(
+        self, query: str, *, limit: int = 10, raw: bool = False
+    ) -> list[tuple[NamedReference, str]]:
+        """Search the synonyms' texts with full-text search.
+
+        :param query: Words that all have to appear in a synonym, e.g.,
+            ``doctor philosophy`` or ``Ph.D.``
+        :param limit: The maximum number of results
+        :param raw: Should the query be passed to FTS5 as-is, e.g., to use its query
+            syntax like ``"doctor of" OR phd``? By default, each word is quoted, so
+            punctuation like in ``bachelor's`` isn't interpreted as query syntax.
+        :returns: Pairs of a term and the synonym that matched, best matches first
+        """
+        if not raw:
+            query = " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+        if not query:
+            return []
+        rows = self._query(
+            """\
+            SELECT s.curie, t.label, s.text FROM synonyms_fts f
+            JOIN synonyms s ON s.rowid = f.rowid
+            JOIN terms t ON t.curie = s.curie
+            WHERE synonyms_fts MATCH ? ORDER BY f.rank LIMIT ?
+            """,
+            [query, limit],
+        )
+        return [(NamedReference.from_curie(curie, label), text) for curie, label, text in rows]
+
+    def map_references(
+        self,
+        references: Iterable[str | Reference],
+        *,
+        prefix: str | None = None,
+        predicate: str | None = None,
+    ) -> list[NamedReference | None]:
+        """Map references from other vocabularies to terms.
+
+        This works like :func:`qualo.data.map_references`.
+        """
+        sql = """\
+            SELECT m.subject_id, coalesce(t.label, '') FROM mappings m
+            LEFT JOIN terms t ON t.curie = m.subject_id
+            WHERE m.object_id = ? AND (? IS NULL OR m.predicate_id = ?)
+            ORDER BY m.rowid LIMIT 1
+        """
+        resolved: dict[str, NamedReference | None] = {}
+        rv = []
+        for reference in references:
+            if isinstance(reference, Reference):
+                curie = reference.curie
+            elif prefix is not None:
+                curie = f"{prefix}:{reference}"
+            else:
+                curie = reference
+            if curie not in resolved:
+                row = self._query_one(sql, [curie, predicate, predicate])
+                resolved[curie] = NamedReference.from_curie(*row) if row else None
+            rv.append(resolved[curie])
+        return rv
+
+    def get_degrees_by_holder(
+        self, people: Iterable[str | Reference], *, under: str | Reference | None = None
+    ) -> list[list[NamedReference]]:
+        """Get the degrees held by each person, see :func:`qualo.data.get_degrees_by_holder`."""
+        return self._get_degrees("holders", "person_curie", people, under)
+
+    def get_degrees_by_conferrer(
+        self, organizations: Iterable[str | Reference], *, under: str | Reference | None = None
+    ) -> list[list[NamedReference]]:
+        """Get the degrees conferred by each organization.
+
+        See :func:`qualo.data.get_degrees_by_conferrer`.
+        """
+        return self._get_degrees("conferrers", "conferrer_curie", organizations, under)
+
+    def _get_degrees(
+        self,
+        sql_table: str,
+        column: str,
+        entities: Iterable[str | Reference],
+        under: str | Reference | None,
+    ) -> list[list[NamedReference]]:
+        sql = (
+            f"SELECT r.curie, t.label FROM {sql_table} r "  # noqa: S608
+            f"JOIN terms t ON t.curie = r.curie WHERE r.{column} = ?"
+        )
+        parameters: list[object] = []
+        if under is not None:
+            sql += (
+                " AND (r.curie = ? OR EXISTS "
+                "(SELECT 1 FROM ancestors a WHERE a.curie = r.curie AND a.ancestor = ?))"
+            )
+            parameters = [_curie(under), _curie(under)]
+        sql += " ORDER BY r.rowid"
+        return [self._references(sql, [_curie(entity), *parameters]) for entity in entities]
+
+    def _references(self, sql: str, parameters: Iterable[object]) -> list[NamedReference]:
+        return [
+            NamedReference.from_curie(curie, label) for curie, label in self._query(sql, parameters)
+        ]
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, "connection", None)
+        if conn is not None:
+            conn.close()
+            self._local.connection = None
+
+
+def _curie(reference: str | Reference) -> str:
+    return reference.curie if isinstance(reference, Reference) else reference
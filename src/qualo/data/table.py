@@ -0,0 +1,317 @@
+"""A compact, interned in-memory representation of the ontology tables."""
+
+import csv
+import sys
+from array import array
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from pathlib import Path
+
+from curies import NamedReference, Reference
+
+__all__ = [
+    "NO_PARENT",
+    "NamesView",
+    "Relation",
+    "TermTable",
+]
+
+#: The value stored in a term's parent slot when it has no parent in that slot
+NO_PARENT = -1
+
+
+class Relation:
+    """A relation between interned references, stored as two parallel integer arrays."""
+
+    __slots__ = ("objects", "subjects")
+
+    def __init__(self) -> None:
+        """Initialize an empty relation."""
+        self.subjects: Sequence[int] = array("i")
+        self.objects: Sequence[int] = array("i")
+
+    @classmethod
+    def from_arrays(cls, subjects: Sequence[int], objects: Sequence[int]) -> "Relation":
+        """Wrap pre-built (e.g., memory-mapped) arrays of subject and object IDs."""
+        if len(subjects) != len(objects):
+            raise ValueError("subjects and objects must have the same length")
+        rv = cls()
+        rv.subjects = subjects
+        rv.objects = objects
+        return rv
+
+    def append(self, subject: int, obj: int) -> None:
+        """Add a subject-object pair to the relation."""
+        if not isinstance(self.subjects, array) or not isinstance(self.objects, array):
+            raise TypeError("can not append to a read-only relation")
+        self.subjects.append(subject)
+        self.objects.append(obj)
+
+    def __len__(self) -> int:
+        return len(self.subjects)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return zip(self.subjects, self.objects, strict=True)
+
+    def group(self) -> dict[int, list[int]]:
+        """Group objects by subject, keeping the order in which they were added."""
+        rv: defaultdict[int, list[int]] = defaultdict(list)
+        for subject, obj in self:
+            rv[subject].append(obj)
+        return dict(rv)
+
+
+class TermTable:
+    """A table that assigns each reference a dense integer ID.
+
+    Terms from ``terms.tsv`` are interned first so their IDs are contiguous
+    from zero. References that only appear as parents or as the objects of
+    relations (e.g., PATO, MeSH, ORCID, and ROR references) are interned after.
+    Labels and parents are stored by ID, so each CURIE string is only held once
+    no matter how many tables it appears in.
+    """
+
+    __slots__ = (
+        "_ancestors",
+        "_curies",
+        "_index",
+        "_labels",
+        "_n_terms",
+        "_parents",
+        "conferrers",
+        "disciplines",
+        "holders",
+    )
+
+    def __init__(self) -> None:
+        """Initialize an empty table."""
+        self._curies: Sequence[str] = []
+        self._labels: Sequence[str] = []
+        self._index: dict[str, int] | None = {}
+        #: two slots per term, filled with :data:`NO_PARENT` when missing
+        self._parents: Sequence[int] = array("i")
+        self._n_terms = 0
+        self._ancestors: dict[int, frozenset[int]] = {}
+        self.disciplines = Relation()
+        self.holders = Relation()
+        self.conferrers = Relation()
+
+    @classmethod
+    def from_columns(
+        cls,
+        *,
+        curies: Sequence[str],
+        labels: Sequence[str],
+        n_terms: int,
+        parents: Sequence[int],
+        disciplines: Relation,
+        holders: Relation,
+        conferrers: Relation,
+    ) -> "TermTable":
+        """Wrap pre-built (e.g., memory-mapped) columns in a read-only table.
+
+        The CURIE index is built lazily the first time a CURIE is looked up.
+        """
+        if len(curies) != len(labels) or len(parents) != 2 * n_terms:
+            raise ValueError("inconsistent column lengths")
+        table = cls()
+        table._curies = curies
+        table._labels = labels
+        table._index = None
+        table._n_terms = n_terms
+        table._parents = parents
+        table.disciplines = disciplines
+        table.holders = holders
+        table.conferrers = conferrers
+        return table
+
+    def __len__(self) -> int:
+        return len(self._curies)
+
+    def __contains__(self, curie: object) -> bool:
+        return isinstance(curie, str | Reference) and self.get_id(curie) is not None
+
+    @property
+    def curies(self) -> Sequence[str]:
+        """Get the CURIEs, indexed by ID."""
+        return self._curies
+
+    @property
+    def labels(self) -> Sequence[str]:
+        """Get the labels, indexed by ID."""
+        return self._labels
+
+    @property
+    def parents(self) -> Sequence[int]:
+        """Get the parent slots, two per term, indexed by twice the term's ID."""
+        return self._parents
+
+    @property
+    def n_terms(self) -> int:
+        """Get the number of terms, which all have IDs lower than this number."""
+        return self._n_terms
+
+    def intern(self, curie: str, label: str | None = None) -> int:
+        """Get the ID for a CURIE, assigning a new one if it has not been seen before.
+
+        :param curie: The CURIE to intern
+        :param label: The label for the CURIE. This is only used if the CURIE does
+            not already have a label, so the first label seen for a CURIE wins.
+        :returns: The ID for the CURIE
+        """
+        if not isinstance(self._curies, list) or not isinstance(self._labels, list):
+            raise TypeError("can not intern into a read-only table")
+        index = self._get_index()
+        idx = index.get(curie)
+        if idx is None:
+            idx = len(self._curies)
+            curie = sys.intern(curie)
+            index[curie] = idx
+            self._curies.append(curie)
+            self._labels.append(label or "")
+        elif label and not self._labels[idx]:
+            self._labels[idx] = label
+        return idx
+
+    def get_id(self, reference: str | Reference) -> int | None:
+        """Get the ID for a CURIE or reference, if it has been interned."""
+        if isinstance(reference, Reference):
+            reference = reference.curie
+        return self._get_index().get(reference)
+
+    def _get_index(self) -> dict[str, int]:
+        if self._index is None:
+            self._index = {curie: idx for idx, curie in enumerate(self._curies)}
+        return self._index
+
+    def curie(self, idx: int) -> str:
+        """Get the CURIE for an ID."""
+        return self._curies[idx]
+
+    def label(self, idx: int) -> str:
+        """Get the label for an ID."""
+        return self._labels[idx]
+
+    def reference(self, idx: int) -> NamedReference:
+        """Construct a named reference for an ID."""
+        return NamedReference.from_curie(self._curies[idx], self._labels[idx])
+
+    def term_ids(self) -> range:
+        """Get the IDs of all terms."""
+        return range(self._n_terms)
+
+    def parent_ids(self, idx: int) -> list[int]:
+        """Get the IDs of the parents of a term."""
+        if idx >= self._n_terms:
+            return []
+        return [p for p in self._parents[2 * idx : 2 * idx + 2] if p != NO_PARENT]
+
+    def ancestor_ids(self, idx: int) -> frozenset[int]:
+        """Get the IDs of all ancestors of a term, not including itself.
+
+        These are computed the first time they're requested for each term.
+        """
+        rv = self._ancestors.get(idx)
+        if rv is None:
+            ancestors: set[int] = set()
+            stack = self.parent_ids(idx)
+            while stack:
+                parent = stack.pop()
+                if parent not in ancestors:
+                    ancestors.add(parent)
+                    stack.extend(self.parent_ids(parent))
+            rv = self._ancestors[idx] = frozenset(ancestors)
+        return rv
+
+    @classmethod
+    def from_paths(
+        cls,
+        terms_path: Path,
+        *,
+        disciplines_path: Path | None = None,
+        holders_path: Path | None = None,
+        conferrers_path: Path | None = None,
+    ) -> "TermTable":
+        """Read and intern the terms table and the relation tables."""
+        table = cls()
+        table._add_terms(_read_rows(terms_path))
+        for path, relation in [
+            (disciplines_path, table.disciplines),
+            (holders_path, table.holders),
+            (conferrers_path, table.conferrers),
+        ]:
+            if path is not None:
+                table._add_relation(relation, _read_rows(path))
+        return table
+
+    def _add_terms(self, rows: Sequence[Sequence[str]]) -> None:
+        # the first pass makes sure all terms get IDs before any parents do
+        for curie, label, *_ in rows:
+            self.intern(curie, label)
+        self._n_terms = len(self._curies)
+        parents = array("i", [NO_PARENT]) * (2 * self._n_terms)
+        for curie, _label, *parent_cells in rows:
+            idx = self._get_index()[curie]
+            for slot, (parent_curie, parent_label) in enumerate(_pairs(parent_cells)):
+                if parent_curie:
+                    parents[2 * idx + slot] = self.intern(parent_curie, parent_label)
+        self._parents = parents
+
+    def _add_relation(self, relation: Relation, rows: Iterable[Sequence[str]]) -> None:
+        for subject_curie, subject_label, object_curie, object_label, *_ in rows:
+            relation.append(
+                self.intern(subject_curie, subject_label),
+                self.intern(object_curie, object_label),
+            )
+
+
+class NamesView(Mapping[NamedReference, str]):
+    """A read-only view from references to labels for terms with a given prefix.
+
+    Lookup is done by CURIE, so any reference (named or not) can be used as a key.
+    The terms with the prefix are only listed when iterating or getting the length,
+    and named references are only constructed when iterating.
+    """
+
+    def __init__(self, table: TermTable, prefix: str) -> None:
+        """Initialize the view."""
+        self._table = table
+        self._curie_prefix = f"{prefix}:"
+        self._ids: list[int] | None = None
+
+    def _get_ids(self) -> list[int]:
+        if self._ids is None:
+            self._ids = [
+                idx
+                for idx in self._table.term_ids()
+                if self._table.curie(idx).startswith(self._curie_prefix)
+            ]
+        return self._ids
+
+    def __getitem__(self, reference: Reference) -> str:
+        idx = self._table.get_id(reference)
+        if (
+            idx is None
+            or idx >= self._table.n_terms
+            or not self._table.curie(idx).startswith(self._curie_prefix)
+        ):
+            raise KeyError(reference)
+        return self._table.label(idx)
+
+    def __iter__(self) -> Iterator[NamedReference]:
+        return map(self._table.reference, self._get_ids())
+
+    def __len__(self) -> int:
+        return len(self._get_ids())
+
+
+def _pairs(cells: Sequence[str]) -> Iterator[tuple[str, str]]:
+    for i in range(0, len(cells) - 1, 2):
+        yield cells[i], cells[i + 1]
+
+
+def _read_rows(path: Path) -> list[list[str]]:
+    with path.open() as file:
+        reader = csv.reader(file, delimiter="\t")
+        _header = next(reader)
+        return [row for row in reader if row]
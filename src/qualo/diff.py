@@ -0,0 +1,257 @@
+"""Compare two releases of the ontology.
+
+A release is read from either a directory with the data tables (like
+``src/qualo/data/``) or from a Turtle file exported by ``qualo build``. Each part of
+the release is loaded into a dictionary keyed on the CURIE, or on the text and the
+CURIE for synonyms, so comparing two releases is a hash join that takes linear time
+in the size of the releases.
+
+.. code-block:: python
+
+    from qualo.diff import diff_releases
+
+    diff = diff_releases("old/src/qualo/data", "src/qualo/data")
+    print(diff.get_affected_curies())
+"""
+
+import csv
+import json
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+__all__ = [
+    "Changes",
+    "Release",
+    "ReleaseDiff",
+    "diff_releases",
+    "read_release",
+]
+
+#: A key or value in a part of a release
+Fields = tuple[str, ...]
+
+#: For each part of a release, the names of the fields in its keys and values
+FIELDS: dict[str, tuple[Fields, Fields]] = {
+    "labels": (("curie",), ("label",)),
+    "parents": (("curie",), ("parents",)),
+    "synonyms": (("text", "curie"), ("predicate", "language")),
+    "mappings": (("subject_id", "object_id"), ("predicate_id",)),
+}
+
+
+@dataclass
+class Release:
+    """The parts of a release that affect grounding, keyed for joins."""
+
+    #: Term CURIEs to labels
+    labels: dict[Fields, Fields] = field(default_factory=dict)
+    #: Term CURIEs to their parents' CURIEs, joined with commas
+    parents: dict[Fields, Fields] = field(default_factory=dict)
+    #: Pairs of synonym text and term CURIE to the predicate and language
+    synonyms: dict[Fields, Fields] = field(default_factory=dict)
+    #: Pairs of subject and object CURIE to the predicate
+    mappings: dict[Fields, Fields] = field(default_factory=dict)
+
+
+@dataclass
+class Changes:
+    """The differences between one part of two releases."""
+
+    added: dict[Fields, Fields] = field(default_factory=dict)
+    removed: dict[Fields, Fields] = field(default_factory=dict)
+    #: Keys whose values changed, to pairs of the old and new value
+    changed: dict[Fields, tuple[Fields, Fields]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    @classmethod
+    def from_dicts(cls, old: dict[Fields, Fields], new: dict[Fields, Fields]) -> "Changes":
+        """Compare two dictionaries in linear time."""
+        rv = cls()
+        for key, value in new.items():
+            old_value = old.get(key)
+            if old_value is None:
+                rv.added[key] = value
+            elif old_value != value:
+                rv.changed[key] = (old_value, value)
+        for key, value in old.items():
+            if key not in new:
+                rv.removed[key] = value
+        return rv
+
+    def to_dict(self, key_names: Fields, value_names: Fields) -> dict[str, object]:
+        """Get a JSON-serializable version, with a record for each change."""
+        return {
+            "added": [
+                _record(key_names, key) | _record(value_names, value)
+                for key, value in sorted(self.added.items())
+            ],
+            "removed": [
+                _record(key_names, key) | _record(value_names, value)
+                for key, value in sorted(self.removed.items())
+            ],
+            "changed": [
+                _record(key_names, key)
+                | {"old": _record(value_names, old), "new": _record(value_names, new)}
+                for key, (old, new) in sorted(self.changed.items())
+            ],
+        }
+
+
+def _record(names: Fields, values: Fields) -> dict[str, object]:
+    return dict(zip(names, values, strict=True))
+
+
+@dataclass
+class ReleaseDiff:
+    """The differences between two releases."""
+
+    labels: Changes
+    parents: Changes
+    synonyms: Changes
+    mappings: Changes
+
+    def __bool__(self) -> bool:
+        return any(self.iter_parts())
+
+    def iter_parts(self) -> Iterator[Changes]:
+        """Iterate over the changes to each part, in the order of :data:`FIELDS`."""
+        yield from (self.labels, self.parents, self.synonyms, self.mappings)
+
+    def get_affected_curies(self) -> set[str]:
+        """Get the terms that were added, removed, relabeled, or gained or lost synonyms.
+
+        Records that were grounded to these terms should be grounded again.
+        """
+        rv = {curie for part in (self.labels, self.parents) for (curie,) in _keys(part)}
+        rv.update(curie for _, curie in _keys(self.synonyms))
+        return rv
+
+    def get_affected_texts(self) -> set[str]:
+        """Get the texts of synonyms and labels that were added, removed, or changed.
+
+        Records with these texts might ground differently in the new release.
+        """
+        rv = {text for text, _ in _keys(self.synonyms)}
+        for part in (self.labels.added, self.labels.removed):
+            rv.update(label for (label,) in part.values())
+        for old, new in self.labels.changed.values():
+            rv.update((*old, *new))
+        return rv
+
+    def to_dict(self) -> dict[str, object]:
+        """Get a JSON-serializable version of the differences."""
+        return {
+            name: part.to_dict(*FIELDS[name])
+            for name, part in zip(FIELDS, self.iter_parts(), strict=True)
+        }
+
+    def write_json(self, path: Path) -> None:
+        """Write the differences as JSON."""
+        path.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False) + "\n")
+
+
+def _keys(changes: Changes) -> Iterator[Fields]:
+    yield from changes.added
+    yield from changes.removed
+    yield from changes.changed
+
+
+def diff_releases(old: str | Path | Release, new: str | Path | Release) -> ReleaseDiff:
+    """Compare two releases.
+
+    :param old: The old release, or a path to its data directory or Turtle file
+    :param new: The new release, or a path to its data directory or Turtle file
+    :returns: The terms, labels, parents, synonyms, and mappings that were added,
+        removed, or changed
+    """
+    if not isinstance(old, Release):
+        old = read_release(old)
+    if not isinstance(new, Release):
+        new = read_release(new)
+    return ReleaseDiff(
+        labels=Changes.from_dicts(old.labels, new.labels),
+        parents=Changes.from_dicts(old.parents, new.parents),
+        synonyms=Changes.from_dicts(old.synonyms, new.synonyms),
+        mappings=Changes.from_dicts(old.mappings, new.mappings),
+    )
+
+
+def read_release(path: str | Path) -> Release:
+    """Read a release from a data directory or an exported Turtle file."""
+    path = Path(path)
+    if path.is_dir():
+        return _read_directory(path)
+    if path.suffix == ".ttl":
+        return _read_turtle(path)
+    raise ValueError(f"{path} is neither a data directory nor a Turtle file")
+
+
+def _read_tsv(path: Path) -> Iterator[dict[str, str]]:
+    if not path.is_file():
+        return
+    with path.open(newline="") as file:
+        yield from csv.DictReader(file, delimiter="\t")
+
+
+def _read_directory(directory: Path) -> Release:
+    release = Release()
+    for row in _read_tsv(directory.joinpath("terms.tsv")):
+        key = (row["curie"],)
+        release.labels[key] = (row["label"],)
+        parents = sorted(row[column] for column in ("parent_1", "parent_2") if row.get(column))
+        release.parents[key] = (", ".join(parents),)
+    for row in _read_tsv(directory.joinpath("synonyms.tsv")):
+        release.synonyms[row["text"], row["curie"]] = (row["predicate"], row.get("language") or "")
+    for row in _read_tsv(directory.joinpath("mappings.sssom.tsv")):
+        release.mappings[row["subject_id"], row["object_id"]] = (row["predicate_id"],)
+    return release
+
+
+#: A term declaration, as written by ``qualo build``
+TERM_RE = re.compile(r'^(\S+) a owl:Class; rdfs:label "((?:[^"\\]|\\.)*)" \.$')
+#: A triple on a single line, as written by ``qualo build``
+TRIPLE_RE = re.compile(r"^(\S+) (\S+) (.+?)\s*\.$")
+LITERAL_RE = re.compile(r'^"((?:[^"\\]|\\.)*)"(?:@([\w-]+)|\^\^\S+)?$')
+
+
+def _read_turtle(path: Path) -> Release:
+    """Read a release from the Turtle file exported by ``qualo build``.
+
+    This isn't a general Turtle parser. It reads the one-triple-per-line statements
+    that ``qualo build`` writes for each term, and skips everything else, like the
+    preamble and axioms.
+    """
+    from qualo.data import PREFIX
+
+    local = f"{PREFIX}:"
+    release = Release()
+    parents: dict[str, list[str]] = {}
+    with path.open() as file:
+        for line in file:
+            line = line.strip()
+            if line.startswith(local):
+                _read_turtle_line(release, parents, line)
+    for curie, parent_curies in parents.items():
+        if (curie,) in release.labels:
+            release.parents[(curie,)] = (", ".join(sorted(parent_curies)),)
+    return release
+
+
+def _read_turtle_line(release: Release, parents: dict[str, list[str]], line: str) -> None:
+    if match := TERM_RE.match(line):
+        curie, label = match.groups()
+        release.labels[(curie,)] = (label,)
+        parents.setdefault(curie, [])
+    elif match := TRIPLE_RE.match(line):
+        subject, predicate, obj = match.groups()
+        if predicate == "rdfs:subClassOf" and not obj.startswith("["):
+            parents.setdefault(subject, []).extend(o.strip() for o in obj.split(","))
+        elif predicate.startswith("skos:"):
+            release.mappings[subject, obj] = (predicate,)
+        elif predicate.startswith("oboInOwl:") and (literal := LITERAL_RE.match(obj)):
+            text, language = literal.groups()
+            release.synonyms[text, subject] = (predicate, language or "")
@@ -1,4 +1,17 @@
-"""This script plots the hierarchy on a given discipine."""
+"""This script plots the hierarchy on a given discipine.
+
+Run it with no arguments to plot psychology to ``docs/source/img/hierarchy.png``,
+or use :func:`draw_all` to plot every discipline to its own file in
+``docs/source/img/hierarchies/``.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import networkx as nx
 import pandas as pd
@@ -19,17 +32,16 @@ def _parse_named_references(df: pd.DataFrame, curie_col: str, name_col: str) ->
 IMG = ROOT.joinpath("docs", "source", "img")
 IMG.mkdir(exist_ok=True)
 PATH = IMG.joinpath("hierarchy.png")
+HIERARCHIES = IMG.joinpath("hierarchies")
+MANIFEST_NAME = "manifest.json"
 ROOTS = {
     NamedReference(prefix="PATO", identifier="0000001", name="quality"),
     NamedReference(prefix=PREFIX, identifier="0000001", name="qualification"),
 }
 
 
-def main(discipline: NamedReference | None = None) -> None:
-    """Generate a chart for a given discipline."""
-    if discipline is None:
-        discipline = NamedReference(prefix="mesh", identifier="D011584", name="psychology")
-
+def get_graph() -> nx.DiGraph:
+    """Get a graph with edges from terms to their parents and to their disciplines."""
     graph = nx.DiGraph()
     terms_df = get_terms_df()
 
@@ -46,18 +58,111 @@ def main(discipline: NamedReference | None = None) -> None:
     for degree, discipline in get_disciplines().items():
         graph.add_edge(degree, discipline)
 
-    ancestors = nx.ancestors(graph, discipline) | {discipline}
+    return graph
+
+
+def get_subgraph(closure: nx.DiGraph, graph: nx.DiGraph, discipline: NamedReference) -> nx.DiGraph:
+    """Get the subgraph for a discipline.
+
+    :param closure: The transitive closure of the graph, which is shared between
+        disciplines so reachability is only computed once
+    :param graph: The graph from :func:`get_graph`
+    :param discipline: The discipline
+    :returns: The discipline, the terms in it and their descendants, and all of their
+        ancestors, except for the roots
+    """
+    ancestors = set(closure.predecessors(discipline)) | {discipline}
     descendants = {
-        descendant for ancestor in ancestors for descendant in nx.descendants(graph, ancestor)
+        descendant for ancestor in ancestors for descendant in closure.successors(ancestor)
     }
-
     nodes = (ancestors | descendants) - ROOTS
+    return nx.subgraph(graph, nodes)
+
+
+def to_dot(graph: nx.DiGraph) -> str:
+    """Write a graph in the DOT language, with nodes and edges in a stable order."""
+
+    def _label(node: NamedReference) -> str:
+        return json.dumps(f"{node.name}\n{node.curie}", ensure_ascii=False)
+
+    lines = ["strict digraph {"]
+    lines.extend(f"\t{_label(node)};" for node in sorted(graph))
+    lines.extend(f"\t{_label(u)} -> {_label(v)};" for u, v in sorted(graph.edges))
+    lines.append("}")
+    return "\n".join(lines) + "\n"
 
-    sg: nx.DiGraph = nx.subgraph(graph, nodes)
-    sg = nx.relabel_nodes(sg, {node: f"{node.name}\n{node.curie}" for node in sg})
 
-    ag = nx.nx_agraph.to_agraph(sg)
-    ag.draw(PATH, prog="dot", args="-Gdpi=300")
+def main(discipline: NamedReference | None = None) -> None:
+    """Generate a chart for a given discipline."""
+    if discipline is None:
+        discipline = NamedReference(prefix="mesh", identifier="D011584", name="psychology")
+
+    graph = get_graph()
+    sg = get_subgraph(nx.transitive_closure_dag(graph), graph, discipline)
+    _draw(to_dot(sg), PATH)
+
+
+def draw_all(
+    directory: Path | None = None,
+    *,
+    disciplines: Iterable[NamedReference] | None = None,
+    force: bool = False,
+    processes: int | None = None,
+) -> list[NamedReference]:
+    """Generate a chart for every discipline, skipping ones that haven't changed.
+
+    The graph and its transitive closure are built once and shared by all
+    disciplines. The hash of each discipline's DOT source is stored in a manifest
+    next to the charts, and a chart is only drawn again when its hash changes.
+
+    :param directory: The directory for the charts. Defaults to
+        ``docs/source/img/hierarchies/``.
+    :param disciplines: The disciplines to draw. Defaults to all disciplines.
+    :param force: Should all charts be drawn, even if they haven't changed?
+    :param processes: The number of Graphviz processes to run at once. Defaults to
+        one per CPU.
+    :returns: The disciplines whose charts were drawn
+    """
+    if directory is None:
+        directory = HIERARCHIES
+    directory.mkdir(parents=True, exist_ok=True)
+
+    graph = get_graph()
+    closure = nx.transitive_closure_dag(graph)
+    if disciplines is None:
+        disciplines = sorted(set(get_disciplines().values()))
+
+    manifest_path = directory.joinpath(MANIFEST_NAME)
+    manifest: dict[str, str] = (
+        {} if force or not manifest_path.is_file() else json.loads(manifest_path.read_text())
+    )
+
+    jobs = []
+    for discipline in disciplines:
+        dot = to_dot(get_subgraph(closure, graph, discipline))
+        digest = hashlib.sha256(dot.encode()).hexdigest()
+        path = directory.joinpath(f"{discipline.prefix}-{discipline.identifier}.png")
+        if manifest.get(discipline.curie) == digest and path.is_file():
+            continue
+        manifest[discipline.curie] = digest
+        jobs.append((discipline, dot, path))
+
+    # each job spends its time waiting on a Graphviz subprocess, so threads are enough
+    # to run several of them at once
+    with ThreadPoolExecutor(processes or os.cpu_count() or 1) as executor:
+        for _ in executor.map(lambda job: _draw(job[1], job[2]), jobs):
+            pass
+
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    return [discipline for discipline, _, _ in jobs]
+
+
+def _draw(dot: str, path: Path) -> None:
+    subprocess.run(  # noqa: S603
+        ["dot", "-Tpng", "-Gdpi=300", "-o", str(path)],  # noqa: S607
+        input=dot.encode(),
+        check=True,
+    )
 
 
 if __name__ == "__main__":
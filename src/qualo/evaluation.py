@@ -0,0 +1,293 @@
+"""Check that grounding stays accurate and fast.
+
+Every label and synonym in the ontology is a gold standard example: grounding its
+text should give its term. Each text is grounded as-is and after perturbations, like
+changing the case or spacing and deleting a character (which needs the approximate
+index from :mod:`qualo.fuzzy`). Since several terms can share a normalized text (see
+:mod:`qualo.conflicts`), grounding to any of them counts as correct.
+
+Each call to :func:`qualo.ground` is timed, so the report has the accuracy, the
+mismatches, and the latency distribution of each variant. The report can be compared
+to a baseline, which fails when the accuracy drops or the 99th percentile latency
+grows by more than a given factor.
+
+Latency depends on the machine, so the committed baseline in
+``grounding_baseline.json`` only has the accuracy. The latency baseline is written
+next to it, but isn't committed, so it has to be recorded on each machine first:
+
+.. code-block:: python
+
+    from qualo.evaluation import (
+        LATENCY_BASELINE_PATH,
+        check_regressions,
+        evaluate_grounding,
+        read_baseline,
+    )
+
+    report = evaluate_grounding()
+    if not LATENCY_BASELINE_PATH.is_file():
+        report.write_json(LATENCY_BASELINE_PATH, mismatches=False)
+    latency_baseline = read_baseline(LATENCY_BASELINE_PATH)
+    for problem in check_regressions(report, read_baseline(), latency_baseline=latency_baseline):
+        print(problem)
+"""
+
+import json
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import ssslm
+
+from qualo.api import ground
+from qualo.data import HERE, get_grounder, get_literal_mappings
+from qualo.fuzzy import get_approximate_index
+
+__all__ = [
+    "BASELINE_PATH",
+    "LATENCY_BASELINE_PATH",
+    "VARIANTS",
+    "Case",
+    "EvaluationReport",
+    "VariantStats",
+    "check_regressions",
+    "evaluate_grounding",
+    "get_cases",
+    "read_baseline",
+]
+
+BASELINE_PATH = HERE.joinpath("grounding_baseline.json")
+#: The latency baseline of this machine, which isn't committed
+LATENCY_BASELINE_PATH = HERE.joinpath("grounding_latency.json")
+
+#: Texts shorter than this aren't given typos, since short texts are too easy to confuse
+MIN_TYPO_LENGTH = 8
+
+
+def _space(text: str) -> str:
+    return "  " + "  ".join(text.split()) + " "
+
+
+def _typo(text: str) -> str | None:
+    if len(text) < MIN_TYPO_LENGTH:
+        return None
+    middle = len(text) // 2
+    return text[:middle] + text[middle + 1 :]
+
+
+#: Perturbations of the gold standard texts, with the maximum edit distance to use for
+#: approximate matching. Perturbations return None for texts they don't apply to.
+VARIANTS: dict[str, tuple[Callable[[str], str | None], int | None]] = {
+    "exact": (lambda text: text, None),
+    "upper": (str.upper, None),
+    "lower": (str.casefold, None),
+    "spacing": (_space, None),
+    "typo": (_typo, 1),
+}
+
+PERCENTILES = (50, 90, 99)
+
+
+@dataclass(frozen=True)
+class Case:
+    """A text to ground and the terms it should ground to."""
+
+    variant: str
+    #: The original label or synonym
+    original: str
+    #: The text to ground, after perturbation
+    text: str
+    #: The CURIEs of all terms that share the original's normalized text
+    expected: frozenset[str]
+
+
+@dataclass
+class Mismatch:
+    """A case that was grounded to the wrong term, or not at all."""
+
+    variant: str
+    text: str
+    expected: list[str]
+    actual: str | None
+
+
+@dataclass
+class VariantStats:
+    """The accuracy and latency of grounding the cases of a variant."""
+
+    total: int = 0
+    correct: int = 0
+    #: Latency percentiles in milliseconds, keyed like ``p99``
+    latency: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def accuracy(self) -> float:
+        """Get the fraction of cases that were grounded correctly."""
+        return self.correct / self.total if self.total else 1.0
+
+
+@dataclass
+class EvaluationReport:
+    """The accuracy and latency of each variant, and the mismatches."""
+
+    variants: dict[str, VariantStats] = field(default_factory=dict)
+    mismatches: list[Mismatch] = field(default_factory=list)
+
+    def to_dict(self, *, mismatches: bool = True, latency: bool = True) -> dict[str, Any]:
+        """Get a JSON-serializable version of the report.
+
+        :param mismatches: Should the mismatches be included?
+        :param latency: Should the latency percentiles be included? They should be left
+            out of baselines that are shared between machines.
+        :returns: A dictionary with the stats of each variant, and the mismatches
+        """
+        variants = {}
+        for name, stats in self.variants.items():
+            variants[name] = {**asdict(stats), "accuracy": round(stats.accuracy, 6)}
+            if not latency:
+                del variants[name]["latency"]
+        rv: dict[str, Any] = {"variants": variants}
+        if mismatches:
+            rv["mismatches"] = [asdict(mismatch) for mismatch in self.mismatches]
+        return rv
+
+    def write_json(self, path: Path, *, mismatches: bool = True, latency: bool = True) -> None:
+        """Write the report as JSON."""
+        data = self.to_dict(mismatches=mismatches, latency=latency)
+        path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n")
+
+
+def get_cases(
+    literal_mappings: Iterable[ssslm.LiteralMapping] | None = None,
+    *,
+    variants: Iterable[str] | None = None,
+) -> list[Case]:
+    """Get a case for each label and synonym and each applicable variant.
+
+    :param literal_mappings: The gold standard. Defaults to all labels and synonyms.
+    :param variants: The names of the variants in :data:`VARIANTS`. Defaults to all.
+    :returns: A list of cases, grouped by variant
+    """
+    if literal_mappings is None:
+        literal_mappings = get_literal_mappings()
+    literal_mappings = list(literal_mappings)
+    expected: dict[str, set[str]] = {}
+    norm_texts = []
+    for literal_mapping in literal_mappings:
+        norm_text = literal_mapping.to_gilda().norm_text
+        norm_texts.append(norm_text)
+        expected.setdefault(norm_text, set()).add(literal_mapping.reference.curie)
+
+    rv = []
+    for name in VARIANTS if variants is None else variants:
+        perturb, _ = VARIANTS[name]
+        for literal_mapping, norm_text in zip(literal_mappings, norm_texts, strict=True):
+            text = perturb(literal_mapping.text)
+            if text is not None:
+                rv.append(Case(name, literal_mapping.text, text, frozenset(expected[norm_text])))
+    return rv
+
+
+def evaluate_grounding(cases: Iterable[Case] | None = None) -> EvaluationReport:
+    """Ground each case with :func:`qualo.ground`, timing each call.
+
+    The grounders and approximate indexes are built before any calls are timed.
+
+    :param cases: The cases. Defaults to :func:`get_cases`.
+    :returns: A report of the accuracy, latency, and mismatches of each variant
+    """
+    if cases is None:
+        cases = get_cases()
+    get_grounder()
+    for _, max_distance in VARIANTS.values():
+        if max_distance:
+            get_approximate_index(max_distance)
+
+    report = EvaluationReport()
+    latencies: dict[str, list[float]] = {}
+    for case in cases:
+        _, max_distance = VARIANTS[case.variant]
+        start = time.perf_counter()
+        reference = ground(case.text, max_distance=max_distance)
+        latencies.setdefault(case.variant, []).append(time.perf_counter() - start)
+
+        stats = report.variants.setdefault(case.variant, VariantStats())
+        stats.total += 1
+        if reference is not None and reference.curie in case.expected:
+            stats.correct += 1
+        else:
+            report.mismatches.append(
+                Mismatch(
+                    case.variant,
+                    case.text,
+                    sorted(case.expected),
+                    reference.curie if reference is not None else None,
+                )
+            )
+
+    for name, seconds in latencies.items():
+        report.variants[name].latency = _get_percentiles(seconds)
+    return report
+
+
+def _get_percentiles(seconds: list[float]) -> dict[str, float]:
+    """Get nearest-rank percentiles in milliseconds."""
+    values = sorted(seconds)
+    rv = {}
+    for percentile in PERCENTILES:
+        rank = max(1, -(-percentile * len(values) // 100))
+        rv[f"p{percentile}"] = round(values[rank - 1] * 1000, 4)
+    rv["max"] = round(values[-1] * 1000, 4)
+    return rv
+
+
+def read_baseline(path: Path | None = None) -> dict[str, Any]:
+    """Read a baseline report written with :meth:`EvaluationReport.write_json`."""
+    if path is None:
+        path = BASELINE_PATH
+    rv: dict[str, Any] = json.loads(path.read_text())
+    return rv
+
+
+def check_regressions(
+    report: EvaluationReport,
+    baseline: dict[str, Any],
+    *,
+    latency_baseline: dict[str, Any] | None = None,
+    max_accuracy_drop: float = 0.0,
+    max_latency_ratio: float = 1.5,
+) -> list[str]:
+    """Compare a report to a baseline.
+
+    :param report: The new report
+    :param baseline: The baseline, from :func:`read_baseline`
+    :param latency_baseline: A baseline recorded on this machine to compare latency
+        to. Defaults to ``baseline``. Latency is only compared for variants whose
+        baseline has it, so it isn't compared to the committed baseline.
+    :param max_accuracy_drop: How much lower the accuracy of a variant can be than
+        in the baseline
+    :param max_latency_ratio: How many times the baseline a variant's 99th percentile
+        latency can be
+    :returns: A description of each regression
+    """
+    if latency_baseline is None:
+        latency_baseline = baseline
+    rv = []
+    for name, old in baseline["variants"].items():
+        new = report.variants.get(name)
+        if new is None:
+            rv.append(f"{name}: missing")
+            continue
+        old_accuracy = old["correct"] / old["total"] if old["total"] else 1.0
+        if new.accuracy < old_accuracy - max_accuracy_drop:
+            rv.append(f"{name}: accuracy dropped from {old_accuracy:.2%} to {new.accuracy:.2%}")
+    for name, old in latency_baseline["variants"].items():
+        new = report.variants.get(name)
+        if new is None or "latency" not in old:
+            continue
+        old_p99, new_p99 = old["latency"]["p99"], new.latency["p99"]
+        if new_p99 > old_p99 * max_latency_ratio:
+            rv.append(f"{name}: p99 latency grew from {old_p99:.3f} ms to {new_p99:.3f} ms")
+    return rv
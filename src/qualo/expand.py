@@ -0,0 +1,324 @@
+"""Add degrees for many disciplines at once.
+
+For each discipline, QUALO has an academic degree in the discipline, a bachelor's
+and master's degree in it, and optionally a bachelor of science, bachelor of arts,
+master of science, and doctor of philosophy in it, each with synonyms made from
+the prefixes in :mod:`qualo.prefixes`.
+
+:func:`plan_expansion` works out all the terms, synonyms, and discipline rows that
+are missing for a list of disciplines in memory, against an index of the existing
+names and normalized synonyms, so nothing is added twice. The plan can be shown as a diff
+with :meth:`ExpansionPlan.iter_diff` for a dry run, and :meth:`ExpansionPlan.apply`
+writes each table once, so adding thousands of disciplines takes seconds.
+
+.. code-block:: python
+
+    from curies import NamedReference
+    from qualo.expand import DisciplineRequest, plan_expansion
+
+    biology = NamedReference.from_curie("mesh:D001699", "Biology")
+    plan = plan_expansion([DisciplineRequest(biology, has_phd=True)])
+    for line in plan.iter_diff():
+        print(line)
+    plan.apply()
+"""
+
+import csv
+import datetime
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import ssslm
+from curies import NamedReference
+from curies.vocabulary import charlie, has_exact_synonym
+
+from qualo.data import (
+    DISCIPLINES_PATH,
+    HERE,
+    PREFIX,
+    SYNONYMS_PATH,
+    TERMS_PATH,
+    clear_caches,
+    get_disciplines,
+    get_highest,
+    get_label_literal_mapping,
+    get_literal_mappings,
+    get_names,
+    update_grounders,
+)
+from qualo.prefixes import (
+    BACHELOR_OF_ARTS_PREFIXES,
+    BACHELOR_OF_SCIENCE_PREFIXES,
+    BACHELOR_PREFIXES,
+    MASTER_PREFIXES,
+    MSC_PREFIXES,
+    PHD_PREFIXES,
+)
+
+__all__ = [
+    "DisciplineRequest",
+    "ExpansionPlan",
+    "plan_discipline_degrees",
+    "plan_expansion",
+    "read_requests",
+]
+
+ACADEMIC_DEGREE = NamedReference(
+    prefix=PREFIX, identifier="0000021", name="academic degree by discipline"
+)
+BACHELOR_DEGREE = NamedReference.from_curie(f"{PREFIX}:0000003", "bachelor's degree")
+MASTER_DEGREE = NamedReference.from_curie(f"{PREFIX}:0000004", "master's degree")
+BSC_DEGREE = NamedReference.from_curie(f"{PREFIX}:0000024", "bachelor of science")
+BA_DEGREE = NamedReference.from_curie(f"{PREFIX}:0000031", "bachelor of arts")
+MSC_DEGREE = NamedReference.from_curie(f"{PREFIX}:0000057", "master of science")
+PHD_DEGREE = NamedReference.from_curie(f"{PREFIX}:0000016", "doctor of philosophy")
+
+#: The columns of a requests file, see :func:`read_requests`
+REQUEST_COLUMNS = [
+    "discipline",
+    "discipline_label",
+    "has_bachelor_of_science",
+    "has_ba",
+    "has_msc",
+    "has_phd",
+]
+
+
+@dataclass(frozen=True)
+class DisciplineRequest:
+    """A discipline to add degrees for."""
+
+    discipline: NamedReference
+    has_bachelor_of_science: bool = False
+    has_ba: bool = False
+    has_msc: bool = False
+    has_phd: bool = False
+
+
+@dataclass
+class ExpansionPlan:
+    """The rows to add to the data tables."""
+
+    #: Rows for ``terms.tsv``
+    terms: list[tuple[str, ...]] = field(default_factory=list)
+    #: Synonyms for ``synonyms.tsv``
+    synonyms: list[ssslm.LiteralMapping] = field(default_factory=list)
+    #: Rows for ``disciplines.tsv``
+    disciplines: list[tuple[str, str, str, str]] = field(default_factory=list)
+    #: The academic degree in each discipline, keyed by the discipline's CURIE
+    degrees: dict[str, NamedReference] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.terms or self.synonyms or self.disciplines)
+
+    def iter_diff(self) -> Iterator[str]:
+        """Iterate over the lines of a diff of the rows that would be added."""
+        tables: list[tuple[Path, list[tuple[str, ...]]]] = [
+            (TERMS_PATH, self.terms),
+            (SYNONYMS_PATH, [_synonym_row(synonym) for synonym in self.synonyms]),
+            (DISCIPLINES_PATH, list(self.disciplines)),
+        ]
+        for path, rows in tables:
+            if rows:
+                yield f"+++ {path.name} ({len(rows):,} rows)"
+                yield from ("+" + "\t".join(row) for row in rows)
+
+    def apply(self, directory: Path | None = None) -> None:
+        """Write the rows, with one write for each table.
+
+        :param directory: The directory with the data tables. Defaults to the
+            package's data directory, in which case the caches and any grounders
+            that were already built are updated too.
+        """
+        if not self:
+            return
+        if directory is None:
+            directory = HERE
+        _append_rows(directory.joinpath(TERMS_PATH.name), self.terms)
+        _append_rows(directory.joinpath(DISCIPLINES_PATH.name), self.disciplines)
+        if self.synonyms:
+            # rewrite the synonyms in the same sorted order as lint_synonyms()
+            synonyms_path = directory.joinpath(SYNONYMS_PATH.name)
+            literal_mappings = sorted([*ssslm.read_literal_mappings(synonyms_path), *self.synonyms])
+            df = ssslm.literal_mappings_to_df(literal_mappings)
+            synonyms_path.write_text(df.to_csv(index=False, sep="\t"))
+        if directory == HERE:
+            clear_caches()
+            labels = [
+                get_label_literal_mapping(NamedReference.from_curie(curie, name), name)
+                for curie, name, *_ in self.terms
+            ]
+            update_grounders(added=[*labels, *self.synonyms])
+
+
+def _synonym_row(synonym: ssslm.LiteralMapping) -> tuple[str, ...]:
+    return synonym.text, synonym.reference.curie, synonym.predicate.curie
+
+
+def _append_rows(path: Path, rows: Iterable[tuple[str, ...]]) -> None:
+    rows = list(rows)
+    if rows:
+        with path.open("a") as file:
+            file.writelines("\t".join(row) + "\n" for row in rows)
+
+
+class _Planner:
+    """Plans terms and synonyms against an index of existing and planned names."""
+
+    def __init__(self) -> None:
+        self.plan = ExpansionPlan()
+        self.name_to_reference = {name: reference for reference, name in get_names().items()}
+        # synonyms whose normalized texts already ground to any term are skipped, so
+        # curated synonyms aren't overridden and no new conflicts are made
+        self.norm_texts = {
+            literal_mapping.to_gilda().norm_text for literal_mapping in get_literal_mappings()
+        }
+        self.discipline_keys = {
+            (degree.curie, discipline.curie) for degree, discipline in get_disciplines().items()
+        }
+        self.next_id = get_highest() + 1
+        self.today = datetime.date.today()
+
+    def ensure_term(
+        self, name: str, parent: NamedReference, parent_2: NamedReference | None = None
+    ) -> NamedReference:
+        reference = self.name_to_reference.get(name)
+        if reference is not None:
+            return reference
+        reference = NamedReference(prefix=PREFIX, identifier=f"{self.next_id:07}", name=name)
+        self.next_id += 1
+        row: tuple[str, ...] = reference.curie, name, parent.curie, parent.name
+        if parent_2 is not None:
+            row = (*row, parent_2.curie, parent_2.name)
+        self.plan.terms.append(row)
+        self.name_to_reference[name] = reference
+        self.norm_texts.add(get_label_literal_mapping(reference, name).to_gilda().norm_text)
+        return reference
+
+    def ensure_synonym(self, reference: NamedReference, text: str) -> None:
+        literal_mapping = ssslm.LiteralMapping(
+            reference=reference,
+            text=text,
+            language="en",
+            predicate=has_exact_synonym,
+            contributor=charlie,
+            date=self.today,
+        )
+        norm_text = literal_mapping.to_gilda().norm_text
+        if norm_text in self.norm_texts:
+            return
+        self.norm_texts.add(norm_text)
+        self.plan.synonyms.append(literal_mapping)
+
+    def ensure_degree(
+        self,
+        name: str,
+        parent: NamedReference,
+        parent_2: NamedReference,
+        prefixes: Iterable[str],
+        discipline_name: str,
+    ) -> NamedReference:
+        reference = self.ensure_term(name, parent, parent_2)
+        for prefix in prefixes:
+            self.ensure_synonym(reference, f"{prefix} {discipline_name}")
+        return reference
+
+    def ensure_discipline(self, degree: NamedReference, discipline: NamedReference) -> None:
+        key = degree.curie, discipline.curie
+        if key in self.discipline_keys:
+            return
+        self.discipline_keys.add(key)
+        self.plan.disciplines.append((degree.curie, degree.name, discipline.curie, discipline.name))
+
+    def add(self, request: DisciplineRequest) -> None:
+        name = request.discipline.name.lower()
+        degree = self.ensure_term(f"academic degree in {name}", ACADEMIC_DEGREE)
+        self.plan.degrees[request.discipline.curie] = degree
+        self.ensure_discipline(degree, request.discipline)
+        self.ensure_synonym(degree, f"degree in {name}")
+
+        bachelor = self.ensure_degree(
+            f"bachelor of {name}", BACHELOR_DEGREE, degree, BACHELOR_PREFIXES, name
+        )
+        master = self.ensure_degree(
+            f"master of {name}", MASTER_DEGREE, degree, MASTER_PREFIXES, name
+        )
+        if request.has_bachelor_of_science:
+            self.ensure_degree(
+                f"bachelor of science in {name}",
+                BSC_DEGREE,
+                bachelor,
+                BACHELOR_OF_SCIENCE_PREFIXES,
+                name,
+            )
+        if request.has_ba:
+            self.ensure_degree(
+                f"bachelor of arts in {name}", BA_DEGREE, bachelor, BACHELOR_OF_ARTS_PREFIXES, name
+            )
+        if request.has_msc:
+            self.ensure_degree(
+                f"master of science in {name}", MSC_DEGREE, master, MSC_PREFIXES, name
+            )
+        if request.has_phd:
+            self.ensure_degree(
+                f"doctor of philosophy in {name}", PHD_DEGREE, degree, PHD_PREFIXES, name
+            )
+
+
+def plan_expansion(requests: Iterable[DisciplineRequest]) -> ExpansionPlan:
+    """Plan the rows to add for degrees in many disciplines.
+
+    Terms are matched to existing ones by their labels. Synonyms whose normalized
+    texts are already a label or synonym of any term are skipped, like discipline
+    rows that already exist or that appear in the plan already. New
+    terms get consecutive identifiers after the highest existing one.
+
+    :param requests: The disciplines to add degrees for
+    :returns: A plan, which can be shown with :meth:`ExpansionPlan.iter_diff` and
+        written with :meth:`ExpansionPlan.apply`
+    """
+    planner = _Planner()
+    for request in requests:
+        planner.add(request)
+    return planner.plan
+
+
+def plan_discipline_degrees(disciplines: Iterable[NamedReference]) -> ExpansionPlan:
+    """Plan a ``degree in {discipline}`` term for each discipline that doesn't have one.
+
+    Unlike :func:`plan_expansion`, the terms keep the discipline's label as-is, like
+    ``degree in Psychology``, and don't get synonyms. A term is added even if there's
+    already an ``academic degree in psychology`` for the discipline.
+
+    :param disciplines: The disciplines
+    :returns: A plan, which can be shown with :meth:`ExpansionPlan.iter_diff` and
+        written with :meth:`ExpansionPlan.apply`
+    """
+    planner = _Planner()
+    for discipline in disciplines:
+        degree = planner.ensure_term(f"degree in {discipline.name}", ACADEMIC_DEGREE)
+        planner.plan.degrees[discipline.curie] = degree
+        planner.ensure_discipline(degree, discipline)
+    return planner.plan
+
+
+def read_requests(path: Path) -> list[DisciplineRequest]:
+    """Read discipline requests from a TSV file.
+
+    The file has a header with the columns in :data:`REQUEST_COLUMNS`. The
+    discipline is given as a CURIE with its label, e.g., ``mesh:D001699`` and
+    ``Biology``, and the flags are ``true`` or empty.
+    """
+    with path.open(newline="") as file:
+        return [
+            DisciplineRequest(
+                NamedReference.from_curie(row["discipline"], row["discipline_label"]),
+                **{column: _parse_flag(row.get(column)) for column in REQUEST_COLUMNS[2:]},
+            )
+            for row in csv.DictReader(file, delimiter="\t")
+        ]
+
+
+def _parse_flag(value: str | None) -> bool:
+    return (value or "").strip().lower() in {"true", "yes", "1", "x"}
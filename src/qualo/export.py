@@ -0,0 +1,205 @@
+"""Export the ontology as typed, columnar tables for data lakes.
+
+The tables are built straight from the loaders in :mod:`qualo.data`, so Spark,
+DuckDB, and similar tools can join against QUALO without parsing RDF:
+
+- ``terms``: each term with its label and a list of its parents
+- ``synonyms``: each synonym, including labels, with its scope and language
+- ``mappings``: the SSSOM mappings
+- ``ancestors``: the transitive closure of the hierarchy, one row per term and
+  ancestor, with the number of steps between them
+- ``disciplines``, ``holders``, and ``conferrers``: the relations from degrees to
+  disciplines, example holders, and example conferrers
+
+Parquet files need :mod:`pyarrow`, e.g., ``pip install qualo[arrow]``. JSON lines
+files don't.
+"""
+
+import datetime
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal
+
+from qualo.data import (
+    get_literal_mappings,
+    get_term_table,
+    iter_mapping_records,
+)
+from qualo.data.table import Relation, TermTable
+
+if TYPE_CHECKING:
+    import pyarrow
+
+__all__ = [
+    "ExportFormat",
+    "get_columns",
+    "get_tables",
+    "write_tables",
+]
+
+ExportFormat = Literal["parquet", "jsonl"]
+
+#: The types of the columns of each table. Columns whose types end in ``[]`` are lists.
+SCHEMAS: dict[str, dict[str, str]] = {
+    "terms": {"curie": "string", "label": "string", "parents": "string[]"},
+    "synonyms": {
+        "curie": "string",
+        "text": "string",
+        "predicate": "string",
+        "scope": "string",
+        "language": "string",
+        "type": "string",
+        "contributor": "string",
+        "date": "date",
+    },
+    "mappings": {
+        "subject_id": "string",
+        "predicate_id": "string",
+        "object_id": "string",
+        "contributor": "string",
+        "date": "date",
+    },
+    "ancestors": {"curie": "string", "ancestor": "string", "distance": "int"},
+    "disciplines": {"curie": "string", "discipline": "string"},
+    "holders": {"curie": "string", "person": "string"},
+    "conferrers": {"curie": "string", "conferrer": "string"},
+}
+
+#: The scopes of synonym predicates, like in OBO
+SCOPES = {
+    "oboInOwl:hasExactSynonym": "EXACT",
+    "oboInOwl:hasBroadSynonym": "BROAD",
+    "oboInOwl:hasNarrowSynonym": "NARROW",
+    "oboInOwl:hasRelatedSynonym": "RELATED",
+    "rdfs:label": "LABEL",
+}
+
+
+def get_columns() -> dict[str, dict[str, list[Any]]]:
+    """Get each table as a dictionary from column names to lists of values.
+
+    Missing values are None, and dates are :class:`datetime.date` objects.
+    """
+    table = get_term_table()
+    terms = range(table.n_terms)
+    rv: dict[str, dict[str, list[Any]]] = {
+        "terms": {
+            "curie": [table.curie(idx) for idx in terms],
+            "label": [table.label(idx) for idx in terms],
+            "parents": [[table.curie(p) for p in table.parent_ids(idx)] for idx in terms],
+        },
+        "synonyms": _empty("synonyms"),
+        "mappings": _empty("mappings"),
+        "ancestors": _get_ancestors(table),
+        "disciplines": _get_relation(table, table.disciplines, "discipline"),
+        "holders": _get_relation(table, table.holders, "person"),
+        "conferrers": _get_relation(table, table.conferrers, "conferrer"),
+    }
+
+    synonyms = rv["synonyms"]
+    for literal_mapping in get_literal_mappings():
+        predicate = literal_mapping.predicate.curie
+        synonyms["curie"].append(literal_mapping.reference.curie)
+        synonyms["text"].append(literal_mapping.text)
+        synonyms["predicate"].append(predicate)
+        synonyms["scope"].append(SCOPES.get(predicate))
+        synonyms["language"].append(literal_mapping.language)
+        synonyms["type"].append(literal_mapping.type and literal_mapping.type.curie)
+        synonyms["contributor"].append(
+            literal_mapping.contributor and literal_mapping.contributor.curie
+        )
+        synonyms["date"].append(literal_mapping.date)
+
+    mappings = rv["mappings"]
+    for record in iter_mapping_records():
+        for column, column_type in SCHEMAS["mappings"].items():
+            value = record.get(column) or None
+            if value is not None and column_type == "date":
+                mappings[column].append(datetime.date.fromisoformat(value))
+            else:
+                mappings[column].append(value)
+    return rv
+
+
+def _empty(name: str) -> dict[str, list[Any]]:
+    return {column: [] for column in SCHEMAS[name]}
+
+
+def _get_ancestors(table: TermTable) -> dict[str, list[Any]]:
+    """Get the ancestors of each term with a breadth-first search, so distances are shortest."""
+    rv = _empty("ancestors")
+    for idx in range(table.n_terms):
+        curie = table.curie(idx)
+        seen = {idx}
+        frontier = table.parent_ids(idx)
+        distance = 1
+        while frontier:
+            following = []
+            for parent in frontier:
+                if parent in seen:
+                    continue
+                seen.add(parent)
+                rv["curie"].append(curie)
+                rv["ancestor"].append(table.curie(parent))
+                rv["distance"].append(distance)
+                following.extend(table.parent_ids(parent))
+            frontier = following
+            distance += 1
+    return rv
+
+
+def _get_relation(table: TermTable, relation: Relation, column: str) -> dict[str, list[Any]]:
+    return {
+        "curie": [table.curie(subject) for subject in relation.subjects],
+        column: [table.curie(obj) for obj in relation.objects],
+    }
+
+
+def get_tables() -> dict[str, "pyarrow.Table"]:
+    """Get each table as a typed :class:`pyarrow.Table`."""
+    import pyarrow as pa
+
+    types = {
+        "string": pa.string(),
+        "string[]": pa.list_(pa.string()),
+        "date": pa.date32(),
+        "int": pa.int32(),
+    }
+    return {
+        name: pa.table(
+            columns,
+            schema=pa.schema(
+                [(column, types[column_type]) for column, column_type in SCHEMAS[name].items()]
+            ),
+        )
+        for name, columns in get_columns().items()
+    }
+
+
+def write_tables(directory: Path, *, export_format: ExportFormat = "parquet") -> list[Path]:
+    """Write each table to a file in a directory.
+
+    :param directory: The directory, which is created if it doesn't exist
+    :param export_format: Either ``parquet`` or ``jsonl`` (JSON lines)
+    :returns: The paths that were written
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    rv = []
+    if export_format == "parquet":
+        import pyarrow.parquet as pq
+
+        for name, table in get_tables().items():
+            path = directory.joinpath(f"{name}.parquet")
+            pq.write_table(table, path)
+            rv.append(path)
+    elif export_format == "jsonl":
+        for name, columns in get_columns().items():
+            path = directory.joinpath(f"{name}.jsonl")
+            with path.open("w") as file:
+                for row in zip(*columns.values(), strict=True):
+                    record = dict(zip(columns, row, strict=True))
+                    file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            rv.append(path)
+    else:
+        raise ValueError(f"unknown export format: {export_format}")
+    return rv
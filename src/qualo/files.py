@@ -0,0 +1,135 @@
+"""Ground a column in large tabular files in a streaming way."""
+
+import gzip
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Literal, TextIO
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from qualo.api import get_executor, ground_many
+
+__all__ = [
+    "FileFormat",
+    "ground_file",
+    "infer_format",
+    "read_chunks",
+]
+
+FileFormat = Literal["tsv", "csv", "jsonl"]
+SEPARATORS: dict[FileFormat, str] = {"tsv": "\t", "csv": ","}
+
+
+def infer_format(path: Path) -> FileFormat:
+    """Infer the format of a file from its suffixes, ignoring a trailing ``.gz``."""
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes.pop()
+    if suffixes and suffixes[-1] in {".tsv", ".tab", ".txt"}:
+        return "tsv"
+    if suffixes and suffixes[-1] == ".csv":
+        return "csv"
+    if suffixes and suffixes[-1] in {".jsonl", ".ndjson"}:
+        return "jsonl"
+    raise ValueError(f"can not infer the format of {path}")
+
+
+def ground_file(
+    input_path: Path,
+    output_path: Path,
+    column: str,
+    *,
+    input_format: FileFormat | None = None,
+    output_format: FileFormat | None = None,
+    chunksize: int = 100_000,
+    processes: int | None = None,
+    cache_size: int = 1_000_000,
+    progress: bool = True,
+) -> None:
+    """Ground a column in a file and write the enriched rows to another file.
+
+    :param input_path: The path to a TSV, CSV, or JSON lines file, optionally gzipped
+    :param output_path: The path to write to. It's gzipped if it ends with ``.gz``.
+    :param column: The column to ground. Two columns are added to the output,
+        ``<column>_curie`` and ``<column>_label``.
+    :param input_format: The input format. Inferred from the input path if not given.
+    :param output_format: The output format. Inferred from the output path if not given,
+        falling back to the input format.
+    :param chunksize: The number of rows to read, ground, and write at a time. Memory
+        use is bounded by this (and by the cache size), not by the size of the file.
+    :param processes: If given, ground in this many processes
+    :param cache_size: The maximum number of distinct texts whose grounding results
+        are remembered between chunks
+    :param progress: Should a progress bar be shown?
+    """
+    if input_format is None:
+        input_format = infer_format(input_path)
+    if output_format is None:
+        try:
+            output_format = infer_format(output_path)
+        except ValueError:
+            output_format = input_format
+
+    cache: dict[str, tuple[str | None, str | None]] = {}
+    with (
+        get_executor(processes) as executor,
+        _open_write(output_path) as file,
+        tqdm(
+            unit="row", unit_scale=True, desc=f"grounding {input_path.name}", disable=not progress
+        ) as bar,
+    ):
+        for i, chunk in enumerate(read_chunks(input_path, input_format, chunksize)):
+            codes, uniques = pd.factorize(chunk[column])
+            texts = [text if isinstance(text, str) else "" for text in uniques]
+            misses = [text for text in texts if text and text not in cache]
+            # the chunk's results are collected before the cache is cleared, so hits
+            # from this chunk aren't lost when it overflows
+            chunk_results = {text: cache[text] for text in texts if text in cache}
+            for text, reference in zip(misses, ground_many(misses, executor=executor), strict=True):
+                chunk_results[text] = (
+                    (None, None) if reference is None else (reference.curie, reference.name)
+                )
+            if len(cache) + len(misses) > cache_size:
+                cache.clear()
+            cache.update((text, chunk_results[text]) for text in misses)
+            results = [chunk_results.get(text, (None, None)) for text in texts]
+            # factorize gives -1 for missing values, which picks out the trailing None
+            curies = np.array([curie for curie, _ in results] + [None], dtype=object)
+            labels = np.array([label for _, label in results] + [None], dtype=object)
+            chunk[f"{column}_curie"] = curies[codes]
+            chunk[f"{column}_label"] = labels[codes]
+            _write_chunk(chunk, file, output_format, header=i == 0)
+            bar.update(len(chunk))
+            bar.set_postfix(cached=len(cache))
+
+
+def read_chunks(path: Path, file_format: FileFormat, chunksize: int) -> Iterable[pd.DataFrame]:
+    """Read a TSV, CSV, or JSON lines file in chunks of rows."""
+    if file_format == "jsonl":
+        with pd.read_json(path, lines=True, chunksize=chunksize, dtype=False) as reader:
+            yield from reader
+    else:
+        with pd.read_csv(
+            path,
+            sep=SEPARATORS[file_format],
+            chunksize=chunksize,
+            dtype=str,
+            keep_default_na=False,
+            na_values=[""],
+        ) as reader:
+            yield from reader
+
+
+def _open_write(path: Path) -> TextIO:
+    if path.suffix == ".gz":
+        return gzip.open(path, "wt", encoding="utf-8")
+    return path.open("w", encoding="utf-8")
+
+
+def _write_chunk(df: pd.DataFrame, file: TextIO, file_format: FileFormat, *, header: bool) -> None:
+    if file_format == "jsonl":
+        df.to_json(file, orient="records", lines=True, force_ascii=False)
+    else:
+        df.to_csv(file, sep=SEPARATORS[file_format], index=False, header=header)
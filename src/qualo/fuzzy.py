@@ -0,0 +1,182 @@
+"""Typo-tolerant approximate matching using symmetric deletes.
+
+This implements the approach from `SymSpell <https://github.com/wolfgarbe/SymSpell>`_.
+When the index is built, every text is normalized and all strings that can be made
+by deleting up to ``max_distance`` characters from its first ``prefix_length``
+characters are stored. At lookup time, the same is done for the query, so candidates
+are found with a few dozen dictionary lookups instead of a scan over all texts.
+Candidates are then filtered by length and character counts, which are cheap lower
+bounds on the edit distance, before the remaining few are compared to the query.
+"""
+
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from functools import lru_cache
+
+import ssslm
+from curies import NamableReference
+
+__all__ = [
+    "ApproximateIndex",
+    "get_approximate_index",
+    "get_deletes",
+    "get_distance",
+    "normalize",
+]
+
+
+def normalize(text: str) -> str:
+    """Normalize text for approximate matching."""
+    return " ".join(text.replace("’", "'").casefold().split())  # noqa:RUF001
+
+
+class ApproximateIndex:
+    """An index for finding texts within a bounded edit distance."""
+
+    def __init__(
+        self,
+        literal_mappings: Iterable[ssslm.LiteralMapping],
+        *,
+        max_distance: int = 2,
+        prefix_length: int = 7,
+        min_length: int = 6,
+    ) -> None:
+        """Build the index.
+
+        :param literal_mappings: The literal mappings to index
+        :param max_distance: The maximum number of insertions, deletions, substitutions,
+            and transpositions of adjacent characters between a query and a match
+        :param prefix_length: The number of characters at the start of each text that
+            deletes are generated for. Larger values use more memory, but give fewer
+            candidates to check at lookup time.
+        :param min_length: Queries shorter than this aren't matched approximately,
+            since short texts (e.g., abbreviations) are too easy to confuse.
+        """
+        if prefix_length <= max_distance:
+            raise ValueError("prefix length must be larger than the maximum distance")
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.min_length = min_length
+
+        self._keys: list[str] = []
+        self._counts: list[Counter[str]] = []
+        self._references: list[dict[str, NamableReference]] = []
+        key_to_id: dict[str, int] = {}
+        for literal_mapping in literal_mappings:
+            key = normalize(literal_mapping.text)
+            idx = key_to_id.get(key)
+            if idx is None:
+                idx = key_to_id[key] = len(self._keys)
+                self._keys.append(key)
+                self._counts.append(Counter(key))
+                self._references.append({})
+            self._references[idx].setdefault(literal_mapping.curie, literal_mapping.reference)
+
+        deletes: defaultdict[str, list[int]] = defaultdict(list)
+        for idx, key in enumerate(self._keys):
+            for delete in get_deletes(key[:prefix_length], max_distance):
+                deletes[delete].append(idx)
+        self._deletes = dict(deletes)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get_matches(self, text: str) -> list[ssslm.Match]:
+        """Get matches within the maximum distance, closest first.
+
+        The score of each match is one minus its distance divided by the query's length.
+        """
+        query = normalize(text)
+        if len(query) < self.min_length:
+            return []
+        candidates: set[int] = set()
+        for delete in get_deletes(query[: self.prefix_length], self.max_distance):
+            candidates.update(self._deletes.get(delete, ()))
+
+        query_counts = Counter(query)
+        best: dict[str, tuple[int, NamableReference]] = {}
+        for idx in candidates:
+            key = self._keys[idx]
+            if abs(len(key) - len(query)) > self.max_distance:
+                continue
+            # each edit changes the character counts by at most two
+            counts = self._counts[idx]
+            if (query_counts - counts).total() + (
+                counts - query_counts
+            ).total() > 2 * self.max_distance:
+                continue
+            distance = get_distance(query, key, self.max_distance)
+            if distance is None:
+                continue
+            for curie, reference in self._references[idx].items():
+                if curie not in best or distance < best[curie][0]:
+                    best[curie] = distance, reference
+        return [
+            ssslm.Match(reference=reference, score=1.0 - distance / len(query))
+            for _, (distance, reference) in sorted(best.items(), key=lambda p: (p[1][0], p[0]))
+        ]
+
+    def get_best_match(self, text: str) -> ssslm.Match | None:
+        """Get the closest match, or None if there's none or if the closest is a tie."""
+        matches = self.get_matches(text)
+        if not matches:
+            return None
+        if len(matches) > 1 and matches[0].score == matches[1].score:
+            return None
+        return matches[0]
+
+
+@lru_cache
+def get_approximate_index(max_distance: int = 2) -> ApproximateIndex:
+    """Get an approximate index over the ontology's labels and synonyms."""
+    from qualo.data import get_literal_mappings
+    from qualo.profiling import stage
+
+    literal_mappings = get_literal_mappings()
+    with stage("make_approximate_index"):
+        return ApproximateIndex(literal_mappings, max_distance=max_distance)
+
+
+def get_deletes(text: str, max_distance: int) -> set[str]:
+    """Get all strings made by deleting up to the given number of characters."""
+    rv = {text}
+    frontier = {text}
+    for _ in range(max_distance):
+        frontier = {
+            candidate[:i] + candidate[i + 1 :]
+            for candidate in frontier
+            for i in range(len(candidate))
+        }
+        frontier -= rv
+        rv |= frontier
+    return rv
+
+
+def get_distance(left: str, right: str, max_distance: int) -> int | None:
+    """Get the optimal string alignment distance, or None if it's above the maximum.
+
+    Only cells within ``max_distance`` of the diagonal are computed, so the cost is
+    linear in the length of the strings.
+    """
+    if left == right:
+        return 0
+    # cells outside the band are never better than the maximum, so they're capped there
+    cap = max_distance + 1
+    width = len(right)
+    previous_previous: list[int] = []
+    previous = [min(j, cap) for j in range(width + 1)]
+    for i in range(1, len(left) + 1):
+        left_char = left[i - 1]
+        current = [cap] * (width + 1)
+        current[0] = min(i, cap)
+        for j in range(max(1, i - max_distance), min(width, i + max_distance) + 1):
+            right_char = right[j - 1]
+            cost = 0 if left_char == right_char else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and left_char == right[j - 2] and left[i - 2] == right_char:
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = min(value, cap)
+        if min(current) > max_distance:
+            return None
+        previous_previous, previous = previous, current
+    return previous[-1] if previous[-1] <= max_distance else None
@@ -1,29 +1,162 @@
 """Lint files."""
 
+import csv
+import sys
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypeVar
+
 import click
 
+__all__ = [
+    "TableSpec",
+    "check_table",
+    "get_specs",
+    "lint_specs",
+]
 
-@click.command()
-def main() -> None:
-    """Lint files."""
+X = TypeVar("X")
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """How a data table is sorted and deduplicated."""
+
+    path: Path
+    #: The columns the table is sorted by
+    key: tuple[str, ...]
+    #: The columns that identify duplicates, if duplicates are removed
+    duplicate_subsets: tuple[str, ...] | None = None
+    #: Is this the synonyms table, which is sorted by :mod:`ssslm`'s rules?
+    synonyms: bool = False
+
+
+def get_specs() -> list[TableSpec]:
+    """Get the specifications for all data tables."""
     from qualo.data import (
         CONFERRERS_PATH,
         DEGREE_HOLDER_PATH,
         DISCIPLINES_PATH,
         MAPPINGS_PATH,
+        SYNONYMS_PATH,
         TERMS_PATH,
-        lint_synonyms,
-        lint_table,
     )
 
-    lint_table(TERMS_PATH, key="curie")
-    lint_synonyms()
-    lint_table(
-        DISCIPLINES_PATH, key=["curie", "discipline"], duplicate_subsets=["curie", "discipline"]
-    )
-    lint_table(MAPPINGS_PATH, key=["subject_id", "object_id"])
-    lint_table(DEGREE_HOLDER_PATH, key=["curie", "person_curie"])
-    lint_table(CONFERRERS_PATH, key=["curie", "conferrer_curie"])
+    return [
+        TableSpec(TERMS_PATH, key=("curie",)),
+        TableSpec(SYNONYMS_PATH, key=("text", "curie"), synonyms=True),
+        TableSpec(
+            DISCIPLINES_PATH,
+            key=("curie", "discipline"),
+            duplicate_subsets=("curie", "discipline"),
+        ),
+        TableSpec(MAPPINGS_PATH, key=("subject_id", "object_id")),
+        TableSpec(DEGREE_HOLDER_PATH, key=("curie", "person_curie")),
+        TableSpec(CONFERRERS_PATH, key=("curie", "conferrer_curie")),
+    ]
+
+
+def check_table(spec: TableSpec) -> list[str]:
+    """Check a table is sorted and has no duplicates, reading it one row at a time.
+
+    :param spec: The specification for the table
+    :returns: A list of problems, which is empty if the table is already linted
+    """
+    with spec.path.open(newline="") as file:
+        reader = csv.reader(file, delimiter="\t")
+        header = next(reader)
+        sort_key = _get_sort_key(header, spec)
+        duplicate_columns = (
+            None
+            if spec.duplicate_subsets is None
+            else [header.index(column) for column in spec.duplicate_subsets]
+        )
+        problems = []
+        previous = None
+        seen: set[tuple[str, ...]] = set()
+        for line, row in enumerate(reader, start=2):
+            if len(row) > len(header):
+                problems.append(f"{spec.path.name}:{line}: has more cells than the header")
+                continue
+            row = row + [""] * (len(header) - len(row))
+            current = sort_key(row)
+            if previous is not None and current < previous:
+                problems.append(f"{spec.path.name}:{line}: isn't sorted by {', '.join(spec.key)}")
+            previous = current
+            if duplicate_columns is not None:
+                duplicate_key = tuple(row[i] for i in duplicate_columns)
+                if duplicate_key in seen:
+                    problems.append(f"{spec.path.name}:{line}: is a duplicate")
+                seen.add(duplicate_key)
+    return problems
+
+
+def _get_sort_key(header: list[str], spec: TableSpec) -> Callable[[list[str]], tuple[object, ...]]:
+    columns = [header.index(column) for column in spec.key]
+    if spec.synonyms:
+        text, curie = columns
+        # the same as :func:`ssslm.model._lm_sort_key`
+        return lambda row: (row[text].casefold(), row[text], row[curie].casefold(), row[curie])
+    # missing values come last, like in :meth:`pandas.DataFrame.sort_values`
+    return lambda row: tuple((not row[i], row[i]) for i in columns)
+
+
+def _fix_table(spec: TableSpec) -> bool:
+    from qualo.data import lint_synonyms, lint_table
+
+    if spec.synonyms:
+        return lint_synonyms()
+    return lint_table(spec.path, key=list(spec.key), duplicate_subsets=spec.duplicate_subsets)
+
+
+def lint_specs(
+    specs: Sequence[TableSpec], *, check: bool = False, processes: int | None = None
+) -> list[tuple[TableSpec, list[str]]]:
+    """Check or fix tables in parallel.
+
+    :param specs: The tables to lint
+    :param check: If true, only check the tables. Otherwise, sort and deduplicate the
+        tables, only rewriting the ones that change.
+    :param processes: The number of processes. Defaults to one per table.
+    :returns: Pairs of each table and its problems. When fixing, a table's problems
+        say it was rewritten.
+    """
+    if processes is None:
+        processes = len(specs)
+    if check:
+        results = _map(check_table, specs, processes)
+    else:
+        results = [
+            ["was rewritten"] if changed else [] for changed in _map(_fix_table, specs, processes)
+        ]
+    return list(zip(specs, results, strict=True))
+
+
+def _map(func: Callable[[TableSpec], X], specs: Sequence[TableSpec], processes: int) -> list[X]:
+    if processes <= 1 or len(specs) <= 1:
+        return [func(spec) for spec in specs]
+    with ProcessPoolExecutor(min(processes, len(specs))) as executor:
+        return list(executor.map(func, specs))
+
+
+@click.command()
+@click.option(
+    "--check",
+    is_flag=True,
+    help="Only check that the tables are linted, and exit with an error if not",
+)
+@click.option("--processes", type=int, help="Defaults to one process per table")
+def main(check: bool, processes: int | None) -> None:
+    """Lint files."""
+    failed = False
+    for spec, problems in lint_specs(get_specs(), check=check, processes=processes):
+        for problem in problems:
+            click.echo(problem if check else f"{spec.path.name} {problem}")
+        failed = failed or bool(problems)
+    if check and failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,405 @@
+"""Opt-in timing instrumentation and profiling.
+
+Loading, grounding, and exporting are split into named stages. By default, recording
+is disabled and each stage costs a single global lookup. Recording can be enabled
+with the :func:`instrument` context manager:
+
+.. code-block:: python
+
+    import qualo
+    from qualo.profiling import instrument, write_json
+
+    with instrument(write_json("stages.json"), trace_memory=True) as recorder:
+        qualo.ground("PhD")
+
+    print(recorder.stats["ground"].calls)
+
+or for a whole process by setting the ``QUALO_INSTRUMENT`` environment variable
+to a comma-separated list of sinks, e.g., ``log,json=stages.json,prometheus=stages.prom``.
+The sinks are called when the process exits. Add ``memory`` to the list to also trace
+memory, like ``trace_memory=True``. Invalid sinks are skipped with a warning.
+"""
+
+import atexit
+import cProfile
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from multiprocessing.connection import Connection
+from pathlib import Path
+from types import TracebackType
+
+__all__ = [
+    "ENVIRONMENT_VARIABLE",
+    "MemoryUsage",
+    "Recorder",
+    "Sink",
+    "StageStats",
+    "benchmark_memory",
+    "instrument",
+    "log_sink",
+    "profile_workload",
+    "stage",
+    "to_prometheus",
+    "write_json",
+    "write_prometheus",
+]
+
+logger = logging.getLogger(__name__)
+
+#: The environment variable used to turn on instrumentation for a whole process
+ENVIRONMENT_VARIABLE = "QUALO_INSTRUMENT"
+
+
+@dataclass
+class StageStats:
+    """Aggregated measurements for a stage."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    #: The net change in memory allocated by Python, only recorded when tracing memory
+    memory_bytes: int | None = None
+
+
+class Recorder:
+    """Aggregates measurements for each stage."""
+
+    def __init__(self, *, trace_memory: bool = False) -> None:
+        """Initialize the recorder.
+
+        :param trace_memory: Should memory deltas be recorded using :mod:`tracemalloc`?
+            This slows everything down, so it's off by default.
+        """
+        self.trace_memory = trace_memory
+        self.stats: dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, memory_bytes: int | None = None) -> None:
+        """Add a measurement for a stage."""
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = StageStats()
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            if memory_bytes is not None:
+                stats.memory_bytes = (stats.memory_bytes or 0) + memory_bytes
+
+
+#: A sink is called with the recorder when recording is done
+Sink = Callable[[Recorder], None]
+
+_RECORDER: Recorder | None = None
+_NULL_CONTEXT: AbstractContextManager[None] = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("memory", "name", "recorder", "start")
+
+    def __init__(self, recorder: Recorder, name: str) -> None:
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.memory = tracemalloc.get_traced_memory()[0] if self.recorder.trace_memory else None
+        self.start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        seconds = time.perf_counter() - self.start
+        memory = None if self.memory is None else tracemalloc.get_traced_memory()[0] - self.memory
+        self.recorder.add(self.name, seconds, memory)
+
+
+def stage(name: str) -> AbstractContextManager[None]:
+    """Get a context manager that measures a stage, if recording is enabled."""
+    if _RECORDER is None:
+        return _NULL_CONTEXT
+    return _Stage(_RECORDER, name)
+
+
+@contextmanager
+def instrument(*sinks: Sink, trace_memory: bool = False) -> Iterator[Recorder]:
+    """Record stages within the context, then send the measurements to the sinks.
+
+    :param sinks: Callables that receive the recorder when the context exits, such
+        as :func:`log_sink`, :func:`write_json`, or :func:`write_prometheus`
+    :param trace_memory: Should memory deltas be recorded using :mod:`tracemalloc`?
+    :yields: The recorder
+    """
+    global _RECORDER
+    previous = _RECORDER
+    recorder = _RECORDER = Recorder(trace_memory=trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        yield recorder
+    finally:
+        _RECORDER = previous
+        if started_tracing:
+            tracemalloc.stop()
+        for sink in sinks:
+            sink(recorder)
+
+
+def log_sink(recorder: Recorder) -> None:
+    """Log the measurements for each stage."""
+    for name, stats in sorted(recorder.stats.items()):
+        logger.info(
+            "%s: %d calls in %.4fs (max %.4fs)%s",
+            name,
+            stats.calls,
+            stats.seconds,
+            stats.max_seconds,
+            "" if stats.memory_bytes is None else f", {stats.memory_bytes:+,} bytes",
+        )
+
+
+def write_json(path: str | Path) -> Sink:
+    """Get a sink that writes the measurements as JSON."""
+
+    def _sink(recorder: Recorder) -> None:
+        data = {name: asdict(stats) for name, stats in sorted(recorder.stats.items())}
+        Path(path).write_text(json.dumps(data, indent=2))
+
+    return _sink
+
+
+def to_prometheus(recorder: Recorder) -> str:
+    """Get the measurements in the Prometheus text exposition format."""
+    metrics = [
+        ("qualo_stage_calls_total", "counter", "Number of times each stage ran", "calls"),
+        ("qualo_stage_seconds_total", "counter", "Wall time spent in each stage", "seconds"),
+        ("qualo_stage_max_seconds", "gauge", "Longest single run of each stage", "max_seconds"),
+        ("qualo_stage_memory_bytes", "gauge", "Net memory allocated in each stage", "memory_bytes"),
+    ]
+    lines = []
+    for metric, metric_type, description, attribute in metrics:
+        values = [
+            (name, value)
+            for name, stats in sorted(recorder.stats.items())
+            if (value := getattr(stats, attribute)) is not None
+        ]
+        if not values:
+            continue
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        lines.extend(f'{metric}{{stage="{name}"}} {value}' for name, value in values)
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str | Path) -> Sink:
+    """Get a sink that writes the measurements in the Prometheus text format."""
+
+    def _sink(recorder: Recorder) -> None:
+        Path(path).write_text(to_prometheus(recorder))
+
+    return _sink
+
+
+def _parse_environment(value: str) -> tuple[list[Sink], bool]:
+    """Parse the value of :data:`ENVIRONMENT_VARIABLE` into sinks and whether to trace memory.
+
+    Invalid parts are skipped with a warning rather than raising, since this runs
+    when :mod:`qualo` is imported.
+    """
+    sinks: list[Sink] = []
+    trace_memory = False
+    for part in value.split(","):
+        key, _, argument = part.strip().partition("=")
+        if key in {"1", "true", "log"}:
+            sinks.append(log_sink)
+        elif key == "memory":
+            trace_memory = True
+        elif key == "json" and argument:
+            sinks.append(write_json(argument))
+        elif key == "prometheus" and argument:
+            sinks.append(write_prometheus(argument))
+        elif key:
+            logger.warning("skipping invalid sink in $%s: %s", ENVIRONMENT_VARIABLE, part)
+    return sinks, trace_memory
+
+
+def _configure_from_environment() -> None:
+    value = os.environ.get(ENVIRONMENT_VARIABLE)
+    if not value:
+        return
+    sinks, trace_memory = _parse_environment(value)
+    if not sinks and not trace_memory:
+        return
+    context = instrument(*sinks, trace_memory=trace_memory)
+    context.__enter__()
+    atexit.register(context.__exit__, None, None, None)
+
+
+#: Texts used by :func:`profile_workload`, including some that don't ground
+WORKLOAD_TEXTS = [
+    "PhD",
+    "Ph.D.",
+    "doctor of philosophy",
+    "BSc",
+    "B.Sc. in Chemistry",
+    "bachelor of science in biochemistry",
+    "Master of Science",
+    "MSc in Psychology",
+    "master of arts",
+    "Abilitazione scientifica nazionale",
+    "Licenciatura",
+    "not a qualification",
+]
+
+
+def profile_workload(
+    path: str | Path, *, repeat: int = 100, sort: str = "cumulative", limit: int = 40
+) -> Recorder:
+    """Load the data, build the grounder, and ground texts under :mod:`cProfile`.
+
+    :param path: The path where the text report is written. The raw profile is written
+        next to it with the ``.prof`` extension, so it can be opened by tools like
+        ``snakeviz``.
+    :param repeat: How many times to ground each text in :data:`WORKLOAD_TEXTS`.
+        Repeated texts measure the steady state after the first call.
+    :param sort: The key used to sort the report, see :class:`pstats.Stats`
+    :param limit: The number of functions included in the report
+    :returns: The recorder with measurements for each stage
+    """
+    import qualo
+    from qualo.data import clear_caches, clear_grounders, get_grounder
+
+    path = Path(path)
+    clear_caches()
+    clear_grounders()
+
+    profiler = cProfile.Profile()
+    with instrument(trace_memory=False) as recorder:
+        profiler.enable()
+        get_grounder()
+        for _ in range(repeat):
+            for text in WORKLOAD_TEXTS:
+                qualo.ground(text)
+        profiler.disable()
+
+    profiler.dump_stats(path.with_suffix(".prof"))
+    with path.open("w") as file:
+        file.write("stage\tcalls\tseconds\tmax_seconds\n")
+        for name, stats in sorted(recorder.stats.items()):
+            file.write(f"{name}\t{stats.calls}\t{stats.seconds:.6f}\t{stats.max_seconds:.6f}\n")
+        file.write("\n")
+        pstats.Stats(profiler, stream=file).sort_stats(sort).print_stats(limit)
+    return recorder
+
+
+@dataclass
+class MemoryUsage:
+    """The memory used by a process, in kibibytes, from ``/proc/<pid>/smaps_rollup``."""
+
+    #: The resident set size, which counts shared pages in full
+    rss: int
+    #: The proportional set size, which splits shared pages between the processes
+    pss: int
+    #: Pages that only this process uses, e.g., ones that were copied on write
+    private: int
+
+
+def _get_memory_usage() -> MemoryUsage:
+    fields = {}
+    with open("/proc/self/smaps_rollup") as file:
+        for line in file:
+            key, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[key] = int(value.split()[0])
+    return MemoryUsage(
+        rss=fields["Rss"],
+        pss=fields["Pss"],
+        private=fields["Private_Clean"] + fields["Private_Dirty"],
+    )
+
+
+def _run_worker(connection: Connection, ready: Connection) -> None:
+    import qualo
+
+    for text in WORKLOAD_TEXTS:
+        qualo.ground(text)
+    qualo.annotate(" ".join(WORKLOAD_TEXTS))
+    # simulates the collections that happen while a worker serves requests
+    gc.collect()
+    connection.send(_get_memory_usage())
+    # wait until every worker has measured, so shared pages are counted while shared
+    ready.recv()
+
+
+def _run_master(workers: int, preload: bool, connection: Connection) -> None:
+    import qualo
+
+    if preload:
+        qualo.preload()
+    context = multiprocessing.get_context("fork")
+    pipes = [context.Pipe(duplex=False) for _ in range(workers)]
+    ready_pipes = [context.Pipe(duplex=False) for _ in range(workers)]
+    processes = [
+        context.Process(target=_run_worker, args=(send, ready_receive))
+        for (_, send), (ready_receive, _) in zip(pipes, ready_pipes, strict=True)
+    ]
+    for process in processes:
+        process.start()
+    # close this process's copies of the workers' ends, so receiving raises EOFError
+    # instead of blocking forever if a worker crashes
+    for (_, send), (ready_receive, _) in zip(pipes, ready_pipes, strict=True):
+        send.close()
+        ready_receive.close()
+    usages = []
+    for receive, _ in pipes:
+        usages.append(receive.recv())
+        receive.close()
+    for _, ready_send in ready_pipes:
+        ready_send.send(None)
+        ready_send.close()
+    for process in processes:
+        process.join()
+    connection.send((_get_memory_usage(), usages))
+
+
+def benchmark_memory(
+    workers: int = 4, *, preload: bool = True
+) -> tuple[MemoryUsage, list[MemoryUsage]]:
+    """Measure the memory used by forked workers that ground texts.
+
+    :param workers: The number of workers to fork
+    :param preload: Should :func:`qualo.preload` be called before forking?
+    :returns: The memory used by the master process and by each worker
+
+    This simulates a prefork server. A fresh master process is started, which
+    optionally preloads the data and then forks the workers. This only works on Linux,
+    since it reads memory usage from ``/proc``.
+    """
+    context = multiprocessing.get_context("spawn")
+    receive, send = context.Pipe(duplex=False)
+    process = context.Process(target=_run_master, args=(workers, preload, send))
+    process.start()
+    # so receiving raises EOFError instead of blocking forever if the master crashes
+    send.close()
+    try:
+        rv: tuple[MemoryUsage, list[MemoryUsage]] = receive.recv()
+    finally:
+        receive.close()
+        process.join()
+    return rv
+
+
+_configure_from_environment()
@@ -0,0 +1,184 @@
+"""Reload the ontology data in long-running processes.
+
+The data tables are read once and cached, so a process that runs for a long time
+doesn't see new releases. :func:`reload_data` checks if the tables have changed,
+builds a new grounder from them, and then swaps it in at once. Calls to
+:func:`qualo.ground` that are already running finish with the old grounder, and
+calls afterwards use the new one, so nothing is blocked while the new one is built.
+
+Reloads can be triggered explicitly, e.g., from a signal handler or an admin
+endpoint, with :func:`start_reload`, or automatically by watching the data
+directory with :func:`watch_data`:
+
+.. code-block:: python
+
+    import qualo
+    from qualo.reload import get_data_version, watch_data
+
+    watcher = watch_data(interval=60)
+    qualo.ground("PhD")
+    print(get_data_version().digest)
+"""
+
+import datetime
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+
+from qualo.data import (
+    BUNDLE_SOURCES,
+    LoadedSources,
+    clear_caches,
+    get_loaded_sources,
+    load_literal_mappings,
+    swap_grounders,
+)
+from qualo.data.bundle import get_digests, get_stats
+from qualo.data.grounder import MutableGrounder
+from qualo.profiling import stage
+
+__all__ = [
+    "DataVersion",
+    "DataWatcher",
+    "get_data_version",
+    "reload_data",
+    "start_reload",
+    "watch_data",
+]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DataVersion:
+    """Metadata about the version of the data tables that's in use."""
+
+    #: A short digest of all data tables, which changes when any of them does
+    digest: str
+    #: The SHA-256 digest of each data table, keyed by file name
+    digests: dict[str, str] = field(repr=False)
+    #: The size and modification time of each data table when it was read
+    stats: dict[str, list[int]] = field(repr=False)
+    #: When this version was loaded
+    loaded: datetime.datetime
+
+    @classmethod
+    def from_sources(cls, sources: LoadedSources) -> "DataVersion":
+        """Make a version from the state of the data tables when they were read."""
+        combined = hashlib.sha256()
+        for name, digest in sorted(sources.digests.items()):
+            combined.update(f"{name}\t{digest}\n".encode())
+        return cls(
+            digest=combined.hexdigest()[:12],
+            digests=sources.digests,
+            stats=sources.stats,
+            loaded=datetime.datetime.now(datetime.timezone.utc),
+        )
+
+
+_VERSION: DataVersion | None = None
+_RELOAD_LOCK = threading.Lock()
+
+
+def get_data_version() -> DataVersion:
+    """Get the version of the data tables that's in use.
+
+    This describes the data tables as they were when the data was first read, or
+    last reloaded, even if they changed on disk since.
+    """
+    global _VERSION
+    if _VERSION is None:
+        with _RELOAD_LOCK:
+            if _VERSION is None:
+                _VERSION = DataVersion.from_sources(get_loaded_sources())
+    return _VERSION
+
+
+def reload_data(*, force: bool = False) -> bool:
+    """Reload the data tables if they've changed, and swap in a new grounder.
+
+    :param force: Should the data be reloaded even if the tables haven't changed?
+    :returns: If the data was reloaded
+    """
+    global _VERSION
+    current = get_data_version()
+    with _RELOAD_LOCK:
+        if not force and current.digests == get_digests(BUNDLE_SOURCES):
+            return False
+        with stage("reload"):
+            # the new grounder is built without touching the caches other threads use,
+            # and the caches are only cleared once it's swapped in, so the grounder and
+            # the other data are never from different versions
+            sources, literal_mappings = load_literal_mappings()
+            grounder = MutableGrounder.from_literal_mappings(literal_mappings)
+            swap_grounders({None: grounder})
+            clear_caches()
+        _VERSION = DataVersion.from_sources(sources)
+    logger.info("reloaded qualo data version %s", _VERSION.digest)
+    return True
+
+
+def start_reload(*, force: bool = False) -> threading.Thread:
+    """Reload the data in a background thread, see :func:`reload_data`."""
+    thread = threading.Thread(
+        target=reload_data, kwargs={"force": force}, name="qualo-reload", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+class DataWatcher(threading.Thread):
+    """A background thread that reloads the data when the data tables change."""
+
+    def __init__(self, interval: float = 30.0) -> None:
+        """Initialize the watcher.
+
+        :param interval: The number of seconds between checks. A change is only acted
+            on once the tables have stayed the same for a whole interval, so files
+            that are still being written aren't read.
+        """
+        super().__init__(name="qualo-watcher", daemon=True)
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        """Poll the modification times of the data tables."""
+        # start from the tables as they were when the data was read, so changes
+        # before the watcher started are still picked up
+        current: dict[str, list[int]] | None
+        try:
+            current = get_data_version().stats
+        except OSError:
+            logger.exception("failed to read the qualo data tables, checking again later")
+            current = None
+        pending: dict[str, list[int]] | None = None
+        while not self._stopped.wait(self.interval):
+            # a release that replaces the tables one at a time can briefly remove them
+            try:
+                signature = get_stats(BUNDLE_SOURCES)
+            except OSError:
+                logger.exception("failed to read the qualo data tables, checking again later")
+                continue
+            if signature == current:
+                pending = None
+            elif signature != pending:
+                pending = signature
+            else:
+                try:
+                    reload_data()
+                except Exception:
+                    logger.exception("failed to reload qualo data, keeping the current version")
+                    continue
+                current, pending = signature, None
+
+    def stop(self) -> None:
+        """Stop watching."""
+        self._stopped.set()
+
+
+def watch_data(interval: float = 30.0) -> DataWatcher:
+    """Start a background thread that reloads the data when the data tables change."""
+    watcher = DataWatcher(interval=interval)
+    watcher.start()
+    return watcher
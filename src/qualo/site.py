@@ -0,0 +1,298 @@
+"""Build the static documentation site incrementally.
+
+The site in ``docs/`` has a page for each term and relation in the OBO export, and
+an index page. They're rendered with the templates from :mod:`pyobo.ssg`, so they're
+the same as the pages :func:`pyobo.ssg.make_site` makes, but only pages whose
+inputs changed are rendered:
+
+1. The OBO export is split into its header and its stanzas. A page's inputs are
+   the header, the relations' stanzas, its own stanza, and the stanzas of the
+   entities it mentions or that mention it, such as its parents and its children.
+   Their hashes are stored in ``docs/manifest.json``.
+2. If the OBO export didn't change since the last build, nothing is parsed.
+3. Otherwise, only pages whose hashes changed are rendered, in one process per CPU
+   when many changed, and in this process otherwise. The index page is rendered
+   whenever the OBO export changes, since it lists every term.
+4. Pages that the last build wrote but this one didn't, like the pages of deleted
+   terms, are removed. Other files, like ``docs/source/``, are always kept.
+
+A site directory without a manifest, like one rendered before this module
+existed, is always rendered in full.
+
+.. code-block:: python
+
+    from qualo.site import build_site
+
+    result = build_site()
+    print(result.written, result.deleted)
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from qualo.data import PREFIX
+
+__all__ = [
+    "MANIFEST_NAME",
+    "SiteBuild",
+    "build_site",
+    "get_page_digests",
+]
+
+#: The name of the file in the site directory that stores the hash of each page
+MANIFEST_NAME = "manifest.json"
+#: Bumped when the way the site is rendered changes, so all pages are rendered again
+SITE_VERSION = 3
+#: Pages are only rendered in parallel when at least this many changed
+PARALLEL_THRESHOLD = 64
+#: The name of the index page
+INDEX_NAME = "index.html"
+
+#: Tokens in a stanza that could be the identifier of another stanza
+_TOKEN = re.compile(r'[^\s{}!",=]+')
+
+
+@dataclass
+class SiteBuild:
+    """The result of :func:`build_site`."""
+
+    #: Was the OBO export parsed? This is false when it didn't change.
+    rendered: bool = False
+    #: The paths, relative to the site directory, of pages that were rendered
+    written: list[str] = field(default_factory=list)
+    #: The paths, relative to the site directory, of pages that were deleted
+    deleted: list[str] = field(default_factory=list)
+    #: The number of pages that didn't change
+    unchanged: int = 0
+
+
+def get_page_digests(text: str) -> dict[str, str]:
+    """Get a hash of the inputs of each page for an OBO file.
+
+    :param text: The contents of an OBO file
+    :returns: A dictionary from the paths of pages, relative to the site directory,
+        to hashes that change whenever the page would
+    """
+    header, *blocks = re.split(r"\n(?=\[)", text)
+    stanzas: dict[str, tuple[str, str]] = {}
+    for block in blocks:
+        stanza_type = block[1 : block.index("]")]
+        match = re.search(r"^id: (\S+)", block, re.MULTILINE)
+        if match is not None:
+            stanzas[match.group(1)] = (stanza_type, block.strip())
+
+    related: defaultdict[str, set[str]] = defaultdict(set)
+    for curie, (_, stanza) in stanzas.items():
+        for token in _TOKEN.findall(stanza):
+            if token != curie and token in stanzas:
+                related[curie].add(token)
+                related[token].add(curie)
+
+    # every page shows the relations' names and is rendered with the header's metadata
+    shared = [
+        SITE_VERSION,
+        header.strip(),
+        sorted(stanza for stanza_type, stanza in stanzas.values() if stanza_type == "Typedef"),
+    ]
+    rv = {
+        INDEX_NAME: _digest([shared, text]),
+    }
+    curie_prefix = f"{PREFIX}:"
+    for curie, (stanza_type, stanza) in stanzas.items():
+        if not curie.startswith(curie_prefix) or stanza_type not in {"Term", "Typedef"}:
+            continue
+        name = f"{curie.removeprefix(curie_prefix)}/index.html"
+        rv[name] = _digest(
+            [shared, stanza, sorted(stanzas[other][1] for other in related.get(curie, ()))]
+        )
+    return rv
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, ensure_ascii=False).encode()).hexdigest()
+
+
+def build_site(
+    directory: Path | None = None,
+    *,
+    path: Path | None = None,
+    force: bool = False,
+    processes: int | None = None,
+) -> SiteBuild:
+    """Render the pages whose inputs changed since the last build.
+
+    :param directory: The site directory. Defaults to ``docs/`` in the repository.
+    :param path: The OBO file to render. Defaults to the OBO export.
+    :param force: Should all pages be rendered, even if they didn't change?
+    :param processes: The number of processes to render in. By default, pages are
+        rendered in one process per CPU when many changed, and in this process
+        otherwise.
+    :returns: Which pages were rendered and deleted
+    """
+    if directory is None or path is None:
+        from qualo.api import DOCS_DIR, EXPORT_OBO_PATH
+
+        directory = directory or DOCS_DIR
+        path = path or EXPORT_OBO_PATH
+
+    manifest_path = directory.joinpath(MANIFEST_NAME)
+    manifest: dict[str, Any] = {} if force else _read_manifest(manifest_path)
+    old_digests: dict[str, str] = manifest.get("pages", {})
+
+    text = path.read_text()
+    source_digest = _digest([SITE_VERSION, text])
+    if manifest.get("source") == source_digest and all(
+        directory.joinpath(name).is_file() for name in old_digests
+    ):
+        return SiteBuild(unchanged=len(old_digests))
+
+    new_digests = get_page_digests(text)
+    result = SiteBuild(rendered=True)
+    for name, digest in new_digests.items():
+        if old_digests.get(name) == digest and directory.joinpath(name).is_file():
+            result.unchanged += 1
+        else:
+            result.written.append(name)
+    result.written.sort()
+    _render_pages(path, directory, result.written, processes)
+
+    # only pages this builder wrote are deleted, so hand-written files are kept
+    for name in sorted(old_digests.keys() - new_digests.keys()):
+        target = directory.joinpath(name)
+        target.unlink(missing_ok=True)
+        parent = target.parent
+        if parent != directory and parent.is_dir() and not any(parent.iterdir()):
+            parent.rmdir()
+        result.deleted.append(name)
+
+    manifest_path.write_text(
+        json.dumps(
+            {"version": SITE_VERSION, "source": source_digest, "pages": new_digests},
+            indent=2,
+            sort_keys=True,
+        )
+        + "\n"
+    )
+    return result
+
+
+def _read_manifest(path: Path) -> dict[str, Any]:
+    if not path.is_file():
+        return {}
+    try:
+        manifest = json.loads(path.read_text())
+    except ValueError:
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("version") != SITE_VERSION:
+        return {}
+    return manifest
+
+
+def _render_pages(path: Path, directory: Path, names: Sequence[str], processes: int | None) -> None:
+    if not names:
+        return
+    if processes is None:
+        processes = (os.cpu_count() or 1) if len(names) >= PARALLEL_THRESHOLD else 1
+    directory.mkdir(parents=True, exist_ok=True)
+    if processes <= 1:
+        _Renderer(path).write(directory, names)
+        return
+    # each worker parses the OBO file once, which is much cheaper than rendering
+    chunks = [names[i : i + 16] for i in range(0, len(names), 16)]
+    with ProcessPoolExecutor(processes, initializer=_initialize, initargs=(path,)) as executor:
+        for _ in executor.map(_write_in_worker, [directory] * len(chunks), chunks):
+            pass
+
+
+_WORKER_RENDERER: "_Renderer | None" = None
+
+
+def _initialize(path: Path) -> None:
+    global _WORKER_RENDERER
+    _WORKER_RENDERER = _Renderer(path)
+
+
+def _write_in_worker(directory: Path, names: Sequence[str]) -> None:
+    if _WORKER_RENDERER is None:
+        raise RuntimeError("worker was not initialized")
+    _WORKER_RENDERER.write(directory, names)
+
+
+class _Renderer:
+    """Renders pages the same way as :func:`pyobo.ssg.make_site`."""
+
+    def __init__(self, path: Path) -> None:
+        import bioregistry
+        import pyobo
+        from bioregistry.constants import BIOREGISTRY_DEFAULT_BASE_URL
+        from pyobo.struct import part_of
+
+        self.obo = pyobo.from_obo_path(path=path, prefix=PREFIX, version=None)
+        self.resource = bioregistry.get_resource(self.obo.ontology)
+        if self.resource is None:
+            raise KeyError(self.obo.ontology)
+        self.context = {
+            "obo": self.obo,
+            "resource": self.resource,
+            "manager": bioregistry.manager,
+            "metaregistry_metaprefix": "bioregistry",
+            "metaregistry_name": "Bioregistry",
+            "metaregistry_base_url": BIOREGISTRY_DEFAULT_BASE_URL.rstrip("/"),
+        }
+        self.terms = [term for term in self.obo if term.prefix == self.obo.ontology]
+        self.terms_by_identifier = {term.identifier: term for term in self.terms}
+        self.typedefs_by_identifier = {
+            typedef.identifier: typedef
+            for typedef in self.obo.typedefs or []
+            if typedef.prefix == self.obo.ontology
+        }
+        self.children: defaultdict[str, list[Any]] = defaultdict(list)
+        self.parts: defaultdict[str, list[Any]] = defaultdict(list)
+        for term in self.terms:
+            for parent in term.parents or []:
+                self.children[parent.curie].append(term)
+            for whole in term.get_relationships(part_of):
+                self.parts[whole.curie].append(term)
+
+    def write(self, directory: Path, names: Iterable[str]) -> None:
+        """Render pages and write them to the site directory."""
+        for name in names:
+            target = directory.joinpath(name)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(self.render(name))
+
+    def render(self, name: str) -> str:
+        """Render a page, given its path relative to the site directory."""
+        from operator import attrgetter
+
+        from pyobo.ssg import index_template, term_template, typedef_template
+
+        if name == INDEX_NAME:
+            return str(
+                index_template.render(
+                    manifest=sorted(self.terms, key=attrgetter("identifier")),
+                    number_terms=len(self.terms),
+                    **self.context,
+                )
+            )
+        identifier = name.removesuffix("/index.html")
+        if (term := self.terms_by_identifier.get(identifier)) is not None:
+            return str(
+                term_template.render(
+                    term=term,
+                    children=self.children.get(term.curie),
+                    parts=self.parts.get(term.curie),
+                    **self.context,
+                )
+            )
+        return str(
+            typedef_template.render(typedef=self.typedefs_by_identifier[identifier], **self.context)
+        )
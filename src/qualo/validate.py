@@ -0,0 +1,234 @@
+"""Check referential integrity across the data tables.
+
+The terms table is read once into a dictionary from CURIEs to labels, then every
+other table is streamed and checked against it, so validation takes linear time in
+the total number of rows. The following rules are checked:
+
+- ``duplicate-term``: each term appears only once in the terms table
+- ``missing-parent``: each QUALO parent exists in the terms table
+- ``missing-term``: each QUALO term referenced by another table exists
+- ``cycle``: the hierarchy of terms has no cycles
+- ``label-mismatch``: labels repeated next to CURIEs match the terms table
+
+Label mismatches are warnings, everything else is an error.
+"""
+
+import csv
+import json
+from collections.abc import Iterator, Mapping
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Literal
+
+__all__ = [
+    "Issue",
+    "ValidationReport",
+    "validate",
+]
+
+Severity = Literal["error", "warning"]
+
+#: For each table, pairs of columns with a QUALO CURIE and the label that's repeated
+#: next to it
+REFERENCE_COLUMNS: dict[str, list[tuple[str, str]]] = {
+    "synonyms.tsv": [("curie", "name")],
+    "disciplines.tsv": [("curie", "label")],
+    "holders.tsv": [("curie", "label")],
+    "conferrers.tsv": [("curie", "label")],
+    "mappings.sssom.tsv": [("subject_id", "subject_label")],
+}
+PARENT_COLUMNS = [("parent_1", "parent_1_label"), ("parent_2", "parent_2_label")]
+
+
+@dataclass
+class Issue:
+    """A problem found in a data table."""
+
+    rule: str
+    severity: Severity
+    table: str
+    #: The line in the table, counting the header as line one
+    line: int | None
+    curie: str
+    message: str
+
+
+@dataclass
+class ValidationReport:
+    """The issues found by :func:`validate`."""
+
+    issues: list[Issue] = field(default_factory=list)
+
+    @property
+    def errors(self) -> list[Issue]:
+        """Get the issues that are errors."""
+        return [issue for issue in self.issues if issue.severity == "error"]
+
+    def passes(self, *, strict: bool = False) -> bool:
+        """Check if the data passes validation.
+
+        :param strict: Should warnings also fail validation?
+        """
+        return not (self.issues if strict else self.errors)
+
+    def to_dict(self) -> dict[str, object]:
+        """Get a JSON-serializable summary and the list of issues."""
+        counts: dict[str, int] = {}
+        for issue in self.issues:
+            counts[issue.rule] = counts.get(issue.rule, 0) + 1
+        return {
+            "passes": self.passes(),
+            "counts": counts,
+            "issues": [asdict(issue) for issue in self.issues],
+        }
+
+    def write_json(self, path: Path) -> None:
+        """Write the report as JSON."""
+        path.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False) + "\n")
+
+
+def validate(
+    paths: Mapping[str, Path] | None = None, *, prefix: str | None = None
+) -> ValidationReport:
+    """Check referential integrity across the data tables.
+
+    :param paths: A mapping from table file names to paths. Defaults to the tables
+        in :mod:`qualo.data`. Tables other than ``terms.tsv`` are optional.
+    :param prefix: The prefix of terms. Defaults to QUALO.
+    :returns: A report of all issues
+    """
+    from qualo.data import BUNDLE_SOURCES, PREFIX
+
+    if paths is None:
+        paths = BUNDLE_SOURCES
+    if prefix is None:
+        prefix = PREFIX
+    local = f"{prefix}:"
+
+    report = ValidationReport()
+    labels, parents = _read_terms(report, paths["terms.tsv"])
+
+    _check_table(
+        report, labels, local, paths["terms.tsv"], PARENT_COLUMNS, missing_rule="missing-parent"
+    )
+    for name, columns in REFERENCE_COLUMNS.items():
+        path = paths.get(name)
+        if path is not None and path.is_file():
+            _check_table(report, labels, local, path, columns)
+
+    for cycle in _find_cycles(parents):
+        report.issues.append(
+            Issue(
+                "cycle",
+                "error",
+                "terms.tsv",
+                None,
+                cycle[0],
+                "the hierarchy has a cycle: " + " -> ".join([*cycle, cycle[0]]),
+            )
+        )
+    return report
+
+
+def _read_terms(
+    report: ValidationReport, path: Path
+) -> tuple[dict[str, str], dict[str, list[str]]]:
+    """Read the labels and parents of each term, reporting duplicates."""
+    labels: dict[str, str] = {}
+    parents: dict[str, list[str]] = {}
+    for line, row in _read(path):
+        curie = row["curie"]
+        if curie in labels:
+            report.issues.append(
+                Issue("duplicate-term", "error", "terms.tsv", line, curie, "appears more than once")
+            )
+            continue
+        labels[curie] = row["label"]
+        parents[curie] = [row[column] for column, _ in PARENT_COLUMNS if row.get(column)]
+    return labels, parents
+
+
+def _read(path: Path) -> Iterator[tuple[int, dict[str, str]]]:
+    with path.open(newline="") as file:
+        yield from enumerate(csv.DictReader(file, delimiter="\t"), start=2)
+
+
+def _check_table(
+    report: ValidationReport,
+    labels: dict[str, str],
+    local: str,
+    path: Path,
+    columns: list[tuple[str, str]],
+    *,
+    missing_rule: str = "missing-term",
+) -> None:
+    for line, row in _read(path):
+        for column, label_column in columns:
+            curie = row.get(column)
+            if curie:
+                _check_reference(
+                    report,
+                    labels,
+                    local,
+                    path.name,
+                    line,
+                    curie,
+                    row.get(label_column),
+                    missing_rule=missing_rule,
+                )
+
+
+def _check_reference(
+    report: ValidationReport,
+    labels: dict[str, str],
+    local: str,
+    table: str,
+    line: int,
+    curie: str,
+    label: str | None,
+    *,
+    missing_rule: str = "missing-term",
+) -> None:
+    if not curie.startswith(local):
+        return
+    expected = labels.get(curie)
+    if expected is None:
+        report.issues.append(
+            Issue(missing_rule, "error", table, line, curie, "isn't in the terms table")
+        )
+    elif label and label != expected:
+        report.issues.append(
+            Issue(
+                "label-mismatch",
+                "warning",
+                table,
+                line,
+                curie,
+                f"has label {label!r} but is {expected!r} in the terms table",
+            )
+        )
+
+
+def _find_cycles(parents: dict[str, list[str]]) -> list[list[str]]:
+    """Find cycles with an iterative depth-first search, reporting each cycle once."""
+    # 0 is unvisited, 1 is on the current path, and 2 is done
+    state = dict.fromkeys(parents, 0)
+    cycles = []
+    for root, root_parents in parents.items():
+        if state[root]:
+            continue
+        path = [root]
+        stack = [iter(root_parents)]
+        state[root] = 1
+        while stack:
+            parent = next(stack[-1], None)
+            if parent is None:
+                stack.pop()
+                state[path.pop()] = 2
+            elif state.get(parent) == 1:
+                cycles.append(path[path.index(parent) :])
+            elif state.get(parent) == 0:
+                state[parent] = 1
+                path.append(parent)
+                stack.append(iter(parents[parent]))
+    return cycles
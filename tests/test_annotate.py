@@ -0,0 +1,69 @@
+"""Tests for mention extraction."""
+
+import unittest
+
+import ssslm
+from curies import NamedReference
+from curies.vocabulary import has_label
+
+import qualo
+from qualo.annotate import Automaton
+
+PHD = NamedReference.from_curie("QUALO:0000016", "doctor of philosophy")
+PHD_CHEMISTRY = NamedReference.from_curie("QUALO:0000077", "doctor of philosophy in chemistry")
+MENG = NamedReference.from_curie("QUALO:0000058", "master of engineering")
+
+
+class TestAutomaton(unittest.TestCase):
+    """Test the automaton."""
+
+    def setUp(self) -> None:
+        """Build a small automaton."""
+        self.automaton = Automaton(
+            [
+                ssslm.LiteralMapping(reference=PHD, text="PhD"),
+                ssslm.LiteralMapping(reference=PHD_CHEMISTRY, text="PhD in Chemistry"),
+                ssslm.LiteralMapping(reference=MENG, text="me"),
+                ssslm.LiteralMapping(
+                    reference=PHD, text="doctor of philosophy", predicate=has_label
+                ),
+            ]
+        )
+
+    def get_spans(self, text: str) -> list[tuple[str, str]]:
+        """Get the mentions and CURIEs in a text."""
+        return [(a.substr, a.curie) for a in self.automaton.annotate(text)]
+
+    def test_longest(self):
+        """Test the longest of overlapping mentions wins."""
+        self.assertEqual(
+            [("PhD in chemistry", PHD_CHEMISTRY.curie), ("PHD", PHD.curie)],
+            self.get_spans("PhD in chemistry (2010), PHD"),
+        )
+
+    def test_boundaries(self):
+        """Test mentions have to be on word boundaries."""
+        self.assertEqual([], self.get_spans("PhDs and aPhD"))
+        self.assertEqual(
+            [("Doctor of Philosophy", PHD.curie)], self.get_spans("a Doctor of Philosophy.")
+        )
+
+    def test_short(self):
+        """Test short lowercase synonyms only match abbreviations."""
+        self.assertEqual([], self.get_spans("give me a call"))
+        self.assertEqual([("ME", MENG.curie)], self.get_spans("ME, 2001"))
+
+
+class TestAnnotate(unittest.TestCase):
+    """Test the API."""
+
+    def test_annotate(self):
+        """Test annotating a CV-like string."""
+        annotations = qualo.annotate("PhD in Chemistry (2010), MSc Biology, B.Sc.")
+        self.assertEqual(
+            ["QUALO:0000077", "QUALO:0000057", "QUALO:0000024"],
+            [annotation.curie for annotation in annotations],
+        )
+        self.assertEqual(
+            [[], [PHD.curie]], [[a.curie for a in x] for x in qualo.annotate_many(["", "PhD"])]
+        )
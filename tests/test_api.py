@@ -0,0 +1,52 @@
+"""Tests for the user-facing API."""
+
+import unittest
+
+import pandas as pd
+
+import qualo
+
+
+class TestGroundSeries(unittest.TestCase):
+    """Test grounding columns."""
+
+    def test_ground_series(self):
+        """Test grounding a series broadcasts back to every row."""
+        series = pd.Series(["PhD", "BSc", "PhD", None, "not a degree"], index=list("abcde"))
+        df = qualo.ground_series(series)
+        self.assertEqual(list(series.index), list(df.index))
+        self.assertIsInstance(df["curie"].dtype, pd.CategoricalDtype)
+        self.assertEqual(
+            ["QUALO:0000016", "QUALO:0000024", "QUALO:0000016"], list(df["curie"].iloc[:3])
+        )
+        self.assertEqual("doctor of philosophy", df["label"]["a"])
+        self.assertTrue(df.iloc[3:].isna().all(axis=None))
+
+    def test_ground_series_missing(self):
+        """Test grounding a series with only missing values."""
+        series = pd.Series([None, None])
+        df = qualo.ground_series(series)
+        self.assertEqual(list(series.index), list(df.index))
+        self.assertTrue(df.isna().all(axis=None))
+
+    def test_ground_arrow(self):
+        """Test grounding an Arrow array."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        table = qualo.ground_arrow(pa.chunked_array([["PhD", None], ["not a degree", "PhD"]]))
+        self.assertEqual(["QUALO:0000016", None, None, "QUALO:0000016"], table["curie"].to_pylist())
+
+
+class TestLanguages(unittest.TestCase):
+    """Test grounding with language partitions."""
+
+    def test_language(self):
+        """Test only the given language is searched, then the fallbacks."""
+        text = "Abilitazione scientifica nazionale"
+        self.assertEqual("QUALO:0000203", qualo.ground(text, language="it").curie)
+        self.assertIsNone(qualo.ground(text, language="en"))
+        self.assertIsNone(qualo.ground("PhD", language="it"))
+        self.assertEqual("QUALO:0000016", qualo.ground("PhD", language="it", fallback=["en"]).curie)
+        self.assertEqual("QUALO:0000016", qualo.ground("Doutorado", language="und").curie)
@@ -0,0 +1,66 @@
+"""Test clustering ungrounded strings."""
+
+import csv
+import tempfile
+import unittest
+from pathlib import Path
+
+from qualo.cluster import OTHER_FAMILY, mine_clusters, normalize, split_family, write_clusters
+
+PHD = "QUALO:0000016"
+BSC = "QUALO:0000024"
+
+
+class TestCluster(unittest.TestCase):
+    """Test clustering ungrounded strings."""
+
+    def test_split_family(self):
+        """Test normalizing strings and splitting off the degree family."""
+        self.assertEqual("phd in astro-biology", normalize(" Ph.D.  in Astro-Biology."))
+        self.assertEqual((PHD, "astrobiology"), split_family(normalize("Ph.D. in Astrobiology")))
+        self.assertEqual(
+            (BSC, "marine biology"), split_family(normalize("B.Sc. in Marine Biology"))
+        )
+        self.assertEqual((OTHER_FAMILY, "basket weaving"), split_family("basket weaving"))
+
+    def test_mine_clusters(self):
+        """Test clustering near-duplicates and suggesting targets."""
+        clusters = mine_clusters(
+            {
+                "PhD in Psychology": 100,  # grounded, so it's dropped
+                "PhD in Psycology": 5,
+                "PhD in Astrobiology": 30,
+                "Ph.D in astrobiology": 3,
+                "PhD in Astrobiologie": 4,
+                "BSc in Marine Biology": 12,
+                "B.Sc. in biology, marine": 2,
+                "Underwater basket weaving": 7,
+                "Underwater basket weavng": 1,
+                "BSc in Art": 2,
+                "BSc in Arts": 1,
+            }
+        )
+        self.assertEqual(
+            [
+                (37, PHD, "astrobiology", "child", PHD),
+                (14, BSC, "marine biology", "child", BSC),
+                (8, OTHER_FAMILY, "underwater basket weaving", None, None),
+                (5, PHD, "psycology", "synonym", "QUALO:0000118"),
+                (2, BSC, "art", "child", BSC),
+                (1, BSC, "arts", "child", BSC),
+            ],
+            [(c.count, c.family, c.rest, c.kind, c.target and c.target.curie) for c in clusters],
+        )
+        self.assertEqual(
+            [("PhD in Astrobiology", 30), ("PhD in Astrobiologie", 4), ("Ph.D in astrobiology", 3)],
+            clusters[0].members,
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory).joinpath("clusters.tsv")
+            write_clusters(clusters, path, max_members=2)
+            with path.open() as file:
+                rows = list(csv.DictReader(file, delimiter="\t"))
+        self.assertEqual(len(clusters), len(rows))
+        self.assertEqual("PhD in Astrobiology | PhD in Astrobiologie", rows[0]["members"])
+        self.assertEqual("3", rows[0]["size"])
@@ -0,0 +1,57 @@
+"""Test finding synonym conflicts."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import ssslm
+from curies import NamedReference
+
+from qualo.conflicts import find_conflicts, get_new_clashes, write_known_conflicts
+
+BACHELOR = NamedReference.from_curie("QUALO:0000003", "bachelor's degree")
+BSC = NamedReference.from_curie("QUALO:0000033", "bachelor of science")
+MASTER = NamedReference.from_curie("QUALO:0000004", "master's degree")
+EXACT = "oboInOwl:hasExactSynonym"
+BROAD = "oboInOwl:hasBroadSynonym"
+
+
+def _literal_mapping(text: str, reference: NamedReference, predicate: str) -> ssslm.LiteralMapping:
+    return ssslm.LiteralMapping(
+        text=text, reference=reference, predicate=NamedReference.from_curie(predicate, "")
+    )
+
+
+class TestConflicts(unittest.TestCase):
+    """Test finding synonym conflicts."""
+
+    def test_classify(self):
+        """Test conflicts are classified by hierarchy and scope."""
+        conflicts = find_conflicts(
+            [
+                _literal_mapping("Bachelor", BACHELOR, EXACT),
+                _literal_mapping("bachelor", BSC, BROAD),
+                _literal_mapping("Degree X", BACHELOR, EXACT),
+                _literal_mapping("degree  x", MASTER, EXACT),
+                _literal_mapping("Degree Y", BACHELOR, EXACT),
+                _literal_mapping("Degree Y", BACHELOR, BROAD),
+            ]
+        )
+        self.assertEqual(
+            [
+                ("bachelor", "ancestor", "related"),
+                ("degree x", "clash", "exact"),
+            ],
+            [(c.text, c.kind, c.scope) for c in conflicts],
+        )
+        self.assertEqual(("Degree X", "degree  x"), conflicts[1].texts)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "known.tsv")
+            self.assertEqual(conflicts[1:], get_new_clashes(conflicts, path=path))
+            write_known_conflicts(conflicts, path)
+            self.assertEqual([], get_new_clashes(conflicts, path=path))
+
+    def test_no_new_clashes(self):
+        """Test the synonyms don't have exact clashes that aren't already known."""
+        self.assertEqual([], get_new_clashes())
@@ -0,0 +1,63 @@
+"""Test corpus coverage."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import ssslm
+from curies import NamedReference
+
+from qualo.coverage import UNGROUNDED, compute_coverage
+from qualo.data import get_literal_mappings
+from qualo.data.grounder import MutableGrounder
+
+CORPUS = {
+    "PhD": 10,
+    "Doctor of Philosophy": 5,
+    "BSc": 4,
+    "Master of Science": 3,
+    "Qualified Underwater Basket Weaver": 2,
+}
+
+
+class TestCoverage(unittest.TestCase):
+    """Test corpus coverage."""
+
+    def test_incremental(self):
+        """Test only strings affected by a change in the grounder are grounded again."""
+        grounder = MutableGrounder.from_literal_mappings(get_literal_mappings())
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = Path(directory, "coverage.json")
+
+            report = compute_coverage(CORPUS, cache_path=cache_path, grounder=grounder)
+            self.assertEqual(len(CORPUS), report.regrounded)
+            self.assertEqual(24, report.total)
+            self.assertEqual(22, report.grounded)
+            self.assertEqual(2, report.by_family[UNGROUNDED])
+            self.assertEqual(15, report.by_family["doctoral degree"])
+
+            report = compute_coverage(CORPUS, cache_path=cache_path, grounder=grounder)
+            self.assertEqual(0, report.regrounded)
+            self.assertEqual(22, report.grounded)
+
+            grounder.add(
+                ssslm.LiteralMapping(
+                    text="Qualified Underwater Basket Weaver",
+                    reference=NamedReference.from_curie("QUALO:0000016", "doctor of philosophy"),
+                )
+            )
+            report = compute_coverage(CORPUS, cache_path=cache_path, grounder=grounder)
+            self.assertEqual(1, report.regrounded)
+            self.assertEqual(24, report.grounded)
+            self.assertEqual(17, report.by_family["doctoral degree"])
+
+            # gilda scores matches on the original text, so a new text for the same
+            # term and normalized text can change the results
+            grounder.add(
+                ssslm.LiteralMapping(
+                    text="PHD",
+                    reference=NamedReference.from_curie("QUALO:0000016", "doctor of philosophy"),
+                )
+            )
+            report = compute_coverage(CORPUS, cache_path=cache_path, grounder=grounder)
+            self.assertEqual(1, report.regrounded)
@@ -0,0 +1,237 @@
+"""Tests for data access."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from curies import NamedReference, Reference
+
+from qualo.data import (
+    BUNDLE_PATH,
+    BUNDLE_SOURCES,
+    PREFIX,
+    _read_term_table,
+    build_sqlite,
+    get_conferrer_index,
+    get_degrees_by_conferrer,
+    get_degrees_by_holder,
+    get_mapping_index,
+    get_names,
+    get_term_table,
+    map_references,
+)
+from qualo.data.bundle import read_bundle, write_bundle
+from qualo.data.sqlite import write_sqlite
+
+
+class TestTermTable(unittest.TestCase):
+    """Test the interned term table."""
+
+    def test_terms_first(self):
+        """Test terms get contiguous IDs before parents and related references."""
+        table = get_term_table()
+        self.assertLess(0, table.n_terms)
+        self.assertLess(table.n_terms, len(table))
+        for idx in table.term_ids():
+            self.assertTrue(table.curie(idx).startswith(f"{PREFIX}:"))
+        pato = table.get_id("PATO:0000001")
+        self.assertIsNotNone(pato)
+        self.assertLessEqual(table.n_terms, pato)
+
+    def test_parents(self):
+        """Test parents are stored by ID."""
+        table = get_term_table()
+        idx = table.get_id("QUALO:0000012")
+        parents = {table.curie(parent) for parent in table.parent_ids(idx)}
+        self.assertEqual({"QUALO:0000010", "QUALO:0000003"}, parents)
+        self.assertIn(table.get_id("QUALO:0000003"), table.ancestor_ids(idx))
+        self.assertNotIn(idx, table.ancestor_ids(idx))
+        # the term's own label wins over the drifted parent label
+        self.assertEqual("honarary academic degree", table.label(table.get_id("QUALO:0000010")))
+
+    def test_names(self):
+        """Test the names view can be looked up with any kind of reference."""
+        names = get_names()
+        self.assertEqual(get_term_table().n_terms, len(names))
+        label = "bachelor of science in biochemistry"
+        self.assertEqual(label, names[Reference.from_curie("QUALO:0000041")])
+        self.assertIn(NamedReference.from_curie("QUALO:0000041", label), names)
+        self.assertNotIn(Reference.from_curie("PATO:0000001"), names)
+        self.assertIs(names, get_names())
+
+
+class TestBundle(unittest.TestCase):
+    """Test the binary data bundle."""
+
+    def setUp(self) -> None:
+        """Copy the source files to a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        root = Path(self.directory.name)
+        self.sources = {
+            name: Path(shutil.copy(path, root.joinpath(name)))
+            for name, path in BUNDLE_SOURCES.items()
+        }
+        self.path = root.joinpath("test.bundle")
+
+    def tearDown(self) -> None:
+        """Clean up the temporary directory."""
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        """Test the term table and packed tables can be read back from a bundle."""
+        expected = _read_term_table()
+        write_bundle(self.path, table=expected, sources=self.sources)
+        bundle = read_bundle(self.path, self.sources)
+        self.assertIsNotNone(bundle)
+
+        table = bundle.get_term_table()
+        self.assertEqual(expected.n_terms, table.n_terms)
+        self.assertEqual(list(expected.curies), list(table.curies))
+        self.assertEqual(list(expected.labels), list(table.labels))
+        self.assertEqual(list(expected.parents), list(table.parents))
+        self.assertEqual(list(expected.holders), list(table.holders))
+        self.assertEqual(expected.get_id("QUALO:0000041"), table.get_id("QUALO:0000041"))
+
+        records = list(bundle.iter_records("terms.tsv"))
+        self.assertEqual(expected.n_terms, len(records))
+        self.assertEqual({"curie", "label", "parent_1", "parent_1_label"}, set(records[0]))
+
+    def test_stale(self):
+        """Test a bundle is ignored after its sources change."""
+        write_bundle(self.path, table=_read_term_table(), sources=self.sources)
+        with self.sources["terms.tsv"].open("a") as file:
+            print("QUALO:9999999", "test", sep="\t", file=file)
+        self.assertIsNone(read_bundle(self.path, self.sources))
+
+    def test_touched(self):
+        """Test a bundle is still used when its sources are touched but not changed."""
+        write_bundle(self.path, table=_read_term_table(), sources=self.sources)
+        path = self.sources["terms.tsv"]
+        path.write_bytes(path.read_bytes())
+        os.utime(path, ns=(0, 0))
+        self.assertIsNotNone(read_bundle(self.path, self.sources))
+
+    def test_committed(self):
+        """Test the bundle shipped with the package is up-to-date with the data tables.
+
+        If this fails, rebuild it by running ``qualo``.
+        """
+        self.assertIsNotNone(read_bundle(BUNDLE_PATH, BUNDLE_SOURCES))
+
+
+class TestMappings(unittest.TestCase):
+    """Test the mapping index."""
+
+    def test_index(self):
+        """Test looking up mappings in both directions."""
+        index = get_mapping_index()
+        self.assertEqual(["wikidata:Q163727"], index.get_objects("QUALO:0000003"))
+        self.assertEqual(["QUALO:0000003"], index.get_subjects("wikidata:Q163727"))
+        self.assertEqual([], index.get_subjects("wikidata:Q163727", predicate="skos:broadMatch"))
+        self.assertEqual([], index.get_objects("QUALO:0000003", prefix="ror"))
+
+    def test_map_references(self):
+        """Test mapping in bulk."""
+        self.assertEqual(
+            [NamedReference.from_curie("QUALO:0000003", "bachelor's degree"), None],
+            map_references(["Q163727", "Q5"], prefix="wikidata"),
+        )
+        self.assertEqual(
+            ["QUALO:0000003"],
+            [r.curie for r in map_references([Reference.from_curie("wikidata:Q163727")])],
+        )
+
+
+class TestRelationIndex(unittest.TestCase):
+    """Test the holder and conferrer indexes."""
+
+    def test_reverse(self):
+        """Test looking up degrees by person or organization, rolled up by the hierarchy."""
+        person = "orcid:0000-0003-4423-4370"
+        self.assertEqual(
+            [["QUALO:0000016", "QUALO:0000037"], []],
+            [[d.curie for d in ds] for ds in get_degrees_by_holder([person, "orcid:0"])],
+        )
+        self.assertEqual(
+            ["QUALO:0000037"],
+            [d.curie for d in get_degrees_by_holder([person], under="QUALO:0000003")[0]],
+        )
+        ror = "ror:024z2rq82"
+        self.assertEqual(
+            ["QUALO:0000161"],
+            [d.curie for d in get_degrees_by_conferrer([ror], under="QUALO:0000016")[0]],
+        )
+        self.assertEqual([[]], get_degrees_by_conferrer([ror], under="QUALO:0000003"))
+
+    def test_forward(self):
+        """Test looking up entities by degree, including descendants."""
+        index = get_conferrer_index()
+        self.assertEqual([], index.get_entities("QUALO:0000016"))
+        self.assertEqual(
+            ["ror:024z2rq82"],
+            [e.curie for e in index.get_entities("QUALO:0000016", include_descendants=True)],
+        )
+
+
+class TestSQLite(unittest.TestCase):
+    """Test the SQLite export and backend."""
+
+    def setUp(self) -> None:
+        """Export to a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.backend = build_sqlite(Path(self.directory.name, "qualo.db"))
+
+    def tearDown(self) -> None:
+        """Clean up the temporary directory."""
+        self.backend.close()
+        self.directory.cleanup()
+
+    def test_terms(self):
+        """Test looking up names, ancestors, and descendants."""
+        self.assertEqual("doctor of philosophy", self.backend.get_name("QUALO:0000016"))
+        self.assertIsNone(self.backend.get_name("QUALO:9999999"))
+        self.assertEqual(get_term_table().n_terms, len(self.backend.get_names()))
+        ancestors = {r.curie for r in self.backend.get_ancestors("QUALO:0000016")}
+        self.assertIn("QUALO:0000005", ancestors)
+        self.assertIn("PATO:0000001", ancestors)
+        self.assertIn(
+            "QUALO:0000016", {r.curie for r in self.backend.get_descendants("QUALO:0000005")}
+        )
+
+    def test_search(self):
+        """Test full-text search over synonyms."""
+        curies = {reference.curie for reference, _ in self.backend.search("phd", limit=50)}
+        self.assertIn("QUALO:0000016", curies)
+        for query in ["Ph.D.", "bachelor's", 'doctor "of" philosophy', "NOT"]:
+            with self.subTest(query=query):
+                self.backend.search(query)
+        curies = {reference.curie for reference, _ in self.backend.search("Ph.D.", limit=50)}
+        self.assertIn("QUALO:0000016", curies)
+        self.assertEqual([], self.backend.search("  "))
+        results = self.backend.search("doctor AND philosophy", raw=True)
+        self.assertIn("QUALO:0000016", {reference.curie for reference, _ in results})
+
+    def test_write_failure(self):
+        """Test the temporary file is removed when writing fails."""
+        path = Path(self.directory.name, "broken.db")
+        with self.assertRaises(KeyError):
+            write_sqlite(path, table=get_term_table(), sources={})
+        self.assertEqual(["qualo.db"], sorted(p.name for p in Path(self.directory.name).iterdir()))
+
+    def test_same_as_data(self):
+        """Test the backend gives the same results as :mod:`qualo.data`."""
+        references = ["Q163727", "Q752297", "Q5", "Q163727"]
+        self.assertEqual(
+            map_references(references, prefix="wikidata"),
+            self.backend.map_references(references, prefix="wikidata"),
+        )
+        people = ["orcid:0000-0003-4423-4370", "orcid:0"]
+        self.assertEqual(get_degrees_by_holder(people), self.backend.get_degrees_by_holder(people))
+        ror = ["ror:024z2rq82"]
+        for under in [None, "QUALO:0000016", "QUALO:0000003"]:
+            self.assertEqual(
+                get_degrees_by_conferrer(ror, under=under),
+                self.backend.get_degrees_by_conferrer(ror, under=under),
+            )
@@ -0,0 +1,107 @@
+"""Test comparing releases."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from qualo.diff import diff_releases, read_release
+
+TERMS = """\
+curie\tlabel\tparent_1\tparent_1_label\tparent_2\tparent_2_label
+QUALO:0000001\tqualification\t\t\t\t
+QUALO:0000002\tacademic degree\tQUALO:0000001\tqualification\t\t
+QUALO:0000003\tbachelor's degree\tQUALO:0000002\tacademic degree\t\t
+"""
+NEW_TERMS = """\
+curie\tlabel\tparent_1\tparent_1_label\tparent_2\tparent_2_label
+QUALO:0000001\tqualification\t\t\t\t
+QUALO:0000002\tdegree\tQUALO:0000001\tqualification\t\t
+QUALO:0000004\tmaster's degree\tQUALO:0000001\tqualification\t\t
+"""
+SYNONYMS = """\
+text\tcurie\tname\tpredicate\ttype\tcontributor\tdate\tlanguage
+BSc\tQUALO:0000003\tbachelor's degree\toboInOwl:hasExactSynonym\t\t\t\ten
+degree\tQUALO:0000002\tacademic degree\toboInOwl:hasExactSynonym\t\t\t\ten
+"""
+NEW_SYNONYMS = """\
+text\tcurie\tname\tpredicate\ttype\tcontributor\tdate\tlanguage
+MSc\tQUALO:0000004\tmaster's degree\toboInOwl:hasExactSynonym\t\t\t\ten
+degree\tQUALO:0000002\tdegree\toboInOwl:hasRelatedSynonym\t\t\t\ten
+"""
+
+TURTLE = """\
+QUALO:9999990 a owl:Class ; rdfs:label "academic discipline" .
+
+QUALO:0000001 a owl:Class; rdfs:label "qualification" .
+QUALO:0000001 rdfs:subClassOf PATO:0000001 .
+
+QUALO:0000002 a owl:Class; rdfs:label "academic degree" .
+QUALO:0000002 rdfs:subClassOf QUALO:0000001 .
+QUALO:0000002 oboInOwl:hasExactSynonym "degree"@en .
+[
+    a owl:Axiom ;
+    owl:annotatedSource QUALO:0000002 ;
+] .
+QUALO:0000002 skos:exactMatch wikidata:Q189533 .
+"""
+
+
+class TestDiff(unittest.TestCase):
+    """Test comparing releases."""
+
+    def test_diff(self) -> None:
+        """Test comparing two data directories."""
+        with tempfile.TemporaryDirectory() as directory:
+            old, new = Path(directory, "old"), Path(directory, "new")
+            for path, terms, synonyms in [(old, TERMS, SYNONYMS), (new, NEW_TERMS, NEW_SYNONYMS)]:
+                path.mkdir()
+                path.joinpath("terms.tsv").write_text(terms)
+                path.joinpath("synonyms.tsv").write_text(synonyms)
+            diff = diff_releases(old, new)
+
+        self.assertEqual({("QUALO:0000004",): ("master's degree",)}, diff.labels.added)
+        self.assertEqual({("QUALO:0000003",): ("bachelor's degree",)}, diff.labels.removed)
+        self.assertEqual(
+            {("QUALO:0000002",): (("academic degree",), ("degree",))}, diff.labels.changed
+        )
+        self.assertEqual({("MSc", "QUALO:0000004")}, set(diff.synonyms.added))
+        self.assertEqual({("BSc", "QUALO:0000003")}, set(diff.synonyms.removed))
+        self.assertEqual({("degree", "QUALO:0000002")}, set(diff.synonyms.changed))
+        self.assertFalse(diff.mappings)
+        self.assertEqual(
+            {"QUALO:0000002", "QUALO:0000003", "QUALO:0000004"}, diff.get_affected_curies()
+        )
+        self.assertEqual(
+            {"MSc", "BSc", "degree", "academic degree", "bachelor's degree", "master's degree"},
+            diff.get_affected_texts(),
+        )
+        records = diff.to_dict()["labels"]
+        self.assertEqual(
+            [
+                {
+                    "curie": "QUALO:0000002",
+                    "old": {"label": "academic degree"},
+                    "new": {"label": "degree"},
+                }
+            ],
+            records["changed"],  # type:ignore[index]
+        )
+
+    def test_turtle(self) -> None:
+        """Test reading a release from an exported Turtle file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "qualo.ttl")
+            path.write_text(TURTLE)
+            release = read_release(path)
+        self.assertEqual(
+            {("QUALO:0000001",): ("qualification",), ("QUALO:0000002",): ("academic degree",)},
+            release.labels,
+        )
+        self.assertEqual(("PATO:0000001",), release.parents["QUALO:0000001",])
+        self.assertEqual(
+            {("degree", "QUALO:0000002"): ("oboInOwl:hasExactSynonym", "en")}, release.synonyms
+        )
+        self.assertEqual(
+            {("QUALO:0000002", "wikidata:Q189533"): ("skos:exactMatch",)}, release.mappings
+        )
+        self.assertFalse(diff_releases(release, release))
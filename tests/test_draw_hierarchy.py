@@ -0,0 +1,63 @@
+"""Test drawing the hierarchies of disciplines."""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import networkx as nx
+from curies import NamedReference
+
+from qualo.draw_hierarchy import draw_all
+
+DEGREE = NamedReference(prefix="QUALO", identifier="0000002", name="degree")
+BSC = NamedReference(prefix="QUALO", identifier="0000024", name="bachelor of science")
+MSC = NamedReference(prefix="QUALO", identifier="0000028", name="master of science")
+PHD = NamedReference(prefix="QUALO", identifier="0000016", name="doctor of philosophy")
+CHEMISTRY = NamedReference(prefix="mesh", identifier="D002621", name="chemistry")
+BIOLOGY = NamedReference(prefix="mesh", identifier="D001695", name="biology")
+
+
+class TestDrawAll(unittest.TestCase):
+    """Test drawing the hierarchies of disciplines."""
+
+    def setUp(self) -> None:
+        """Set up a small graph, a temporary directory, and a fake Graphviz."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        self.graph = nx.DiGraph([(BSC, DEGREE), (BSC, CHEMISTRY), (MSC, DEGREE), (MSC, BIOLOGY)])
+        for target, kwargs in [
+            ("qualo.draw_hierarchy.get_graph", {"side_effect": lambda: self.graph}),
+            ("qualo.draw_hierarchy._draw", {"side_effect": self._draw}),
+        ]:
+            patcher = mock.patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        """Clean up the temporary directory."""
+        self.directory.cleanup()
+
+    @staticmethod
+    def _draw(dot: str, path: Path) -> None:
+        path.write_text(dot)
+
+    def _draw_all(self, **kwargs) -> list[NamedReference]:
+        return draw_all(self.root, disciplines=[BIOLOGY, CHEMISTRY], processes=2, **kwargs)
+
+    def test_incremental(self) -> None:
+        """Test only the hierarchies that changed are drawn again."""
+        self.assertEqual([BIOLOGY, CHEMISTRY], self._draw_all())
+        self.assertIn("bachelor of science", self.root.joinpath("mesh-D002621.png").read_text())
+        self.assertEqual([], self._draw_all())
+
+        # adding a degree to a discipline only redraws that discipline
+        self.graph.add_edges_from([(PHD, DEGREE), (PHD, CHEMISTRY)])
+        self.assertEqual([CHEMISTRY], self._draw_all())
+        self.assertIn("doctor of philosophy", self.root.joinpath("mesh-D002621.png").read_text())
+
+        # a chart that's missing on disk is drawn again
+        self.root.joinpath("mesh-D001695.png").unlink()
+        self.assertEqual([BIOLOGY], self._draw_all())
+
+        self.assertEqual([BIOLOGY, CHEMISTRY], self._draw_all(force=True))
@@ -0,0 +1,89 @@
+"""Test the grounding accuracy and latency harness."""
+
+import unittest
+
+import ssslm
+from curies import NamedReference
+
+from qualo.evaluation import (
+    EvaluationReport,
+    VariantStats,
+    check_regressions,
+    evaluate_grounding,
+    get_cases,
+    read_baseline,
+)
+
+BACHELOR = NamedReference.from_curie("QUALO:0000003", "bachelor's degree")
+MASTER = NamedReference.from_curie("QUALO:0000004", "master's degree")
+
+
+class TestEvaluation(unittest.TestCase):
+    """Test the grounding accuracy and latency harness."""
+
+    def test_cases(self):
+        """Test cases accept any term that shares a normalized text."""
+        cases = get_cases(
+            [
+                ssslm.LiteralMapping(text="Degree X", reference=BACHELOR),
+                ssslm.LiteralMapping(text="degree  x", reference=MASTER),
+                ssslm.LiteralMapping(text="bachelor's degree", reference=BACHELOR),
+            ],
+            variants=["upper", "typo"],
+        )
+        self.assertEqual(
+            [
+                ("upper", "DEGREE X", {BACHELOR.curie, MASTER.curie}),
+                ("upper", "DEGREE  X", {BACHELOR.curie, MASTER.curie}),
+                ("upper", "BACHELOR'S DEGREE", {BACHELOR.curie}),
+                ("typo", "Degre X", {BACHELOR.curie, MASTER.curie}),
+                ("typo", "degre  x", {BACHELOR.curie, MASTER.curie}),
+                ("typo", "bachelors degree", {BACHELOR.curie}),
+            ],
+            [(case.variant, case.text, set(case.expected)) for case in cases],
+        )
+
+    def test_check_regressions(self):
+        """Test drops in accuracy and growth in latency are reported."""
+        baseline = {
+            "variants": {
+                "exact": {"total": 10, "correct": 10, "latency": {"p99": 1.0}},
+                "typo": {"total": 10, "correct": 8, "latency": {"p99": 1.0}},
+            }
+        }
+        report = EvaluationReport(
+            variants={
+                "exact": VariantStats(total=10, correct=9, latency={"p99": 1.2}),
+                "typo": VariantStats(total=10, correct=9, latency={"p99": 2.0}),
+            }
+        )
+        self.assertEqual(
+            [
+                "exact: accuracy dropped from 100.00% to 90.00%",
+                "typo: p99 latency grew from 1.000 ms to 2.000 ms",
+            ],
+            check_regressions(report, baseline),
+        )
+        self.assertEqual(
+            [], check_regressions(report, baseline, max_accuracy_drop=0.1, max_latency_ratio=2)
+        )
+
+        # latency is only compared to a baseline that has it
+        accuracy_baseline = report.to_dict(latency=False)
+        self.assertNotIn("latency", accuracy_baseline["variants"]["exact"])
+        self.assertEqual([], check_regressions(report, accuracy_baseline))
+        self.assertEqual(
+            ["typo: p99 latency grew from 1.000 ms to 2.000 ms"],
+            check_regressions(report, accuracy_baseline, latency_baseline=baseline),
+        )
+
+    def test_no_regressions(self):
+        """Test grounding is at least as accurate as the committed baseline.
+
+        The committed baseline doesn't have latency, since it depends on the machine.
+        """
+        baseline = read_baseline()
+        self.assertTrue(all("latency" not in stats for stats in baseline["variants"].values()))
+        report = evaluate_grounding()
+        problems = check_regressions(report, baseline)
+        self.assertEqual([], problems, msg="\n".join(map(str, report.mismatches)))
@@ -0,0 +1,118 @@
+"""Test planning degrees for many disciplines."""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import ssslm
+from curies import NamedReference
+
+from qualo.conflicts import find_conflicts, get_new_clashes
+from qualo.data import (
+    DISCIPLINES_PATH,
+    SYNONYMS_PATH,
+    TERMS_PATH,
+    get_highest,
+    get_label_literal_mapping,
+    get_literal_mappings,
+)
+from qualo.expand import (
+    DisciplineRequest,
+    plan_discipline_degrees,
+    plan_expansion,
+    read_requests,
+)
+
+PSYCHOLOGY = NamedReference.from_curie("mesh:D011584", "Psychology")
+BIOLOGY = NamedReference.from_curie("mesh:D001699", "Biology")
+
+
+class TestExpand(unittest.TestCase):
+    """Test planning degrees for many disciplines."""
+
+    def test_plan(self):
+        """Test planning against existing terms and synonyms."""
+        plan = plan_expansion(
+            [
+                DisciplineRequest(PSYCHOLOGY, has_ba=True, has_phd=True),
+                DisciplineRequest(BIOLOGY, has_bachelor_of_science=True, has_ba=True),
+                DisciplineRequest(BIOLOGY, has_bachelor_of_science=True, has_ba=True),
+            ]
+        )
+        names = [row[1] for row in plan.terms]
+        # psychology's degrees and biology's bachelor of arts already exist
+        self.assertEqual(
+            ["academic degree in biology", "bachelor of biology", "master of biology"], names
+        )
+        highest = get_highest()
+        self.assertEqual(
+            [f"QUALO:{highest + i:07}" for i in range(1, 4)], [row[0] for row in plan.terms]
+        )
+        self.assertEqual(plan.terms[0][0], plan.degrees[BIOLOGY.curie].curie)
+        self.assertEqual("QUALO:0000199", plan.degrees[PSYCHOLOGY.curie].curie)
+        self.assertEqual(
+            [(plan.terms[0][0], "academic degree in biology", BIOLOGY.curie, "Biology")],
+            plan.disciplines,
+        )
+
+        norm_texts = [synonym.to_gilda().norm_text for synonym in plan.synonyms]
+        self.assertEqual(len(norm_texts), len(set(norm_texts)), msg="duplicate synonyms")
+        self.assertIn("ba in biology", norm_texts)
+        self.assertNotIn("bachelor of arts in biology", norm_texts, msg="duplicates a label")
+        self.assertNotIn("master of biology", norm_texts, msg="duplicates a planned label")
+
+        labels = [
+            get_label_literal_mapping(NamedReference.from_curie(curie, name), name)
+            for curie, name, *_ in plan.terms
+        ]
+        conflicts = find_conflicts([*get_literal_mappings(), *labels, *plan.synonyms])
+        self.assertEqual([], get_new_clashes(conflicts))
+
+    def test_apply(self):
+        """Test writing a plan, with one write for each table."""
+        plan = plan_expansion([DisciplineRequest(BIOLOGY, has_phd=True)])
+        self.assertTrue(plan)
+        self.assertIn("+++ terms.tsv (3 rows)", list(plan.iter_diff()))
+        with tempfile.TemporaryDirectory() as directory_:
+            directory = Path(directory_)
+            for path in (TERMS_PATH, SYNONYMS_PATH, DISCIPLINES_PATH):
+                shutil.copy(path, directory)
+            plan.apply(directory)
+
+            for path, rows in [(TERMS_PATH, plan.terms), (DISCIPLINES_PATH, plan.disciplines)]:
+                lines = directory.joinpath(path.name).read_text().splitlines()
+                self.assertEqual(len(path.read_text().splitlines()) + len(rows), len(lines))
+                self.assertEqual("\t".join(rows[-1]), lines[-1])
+
+            old = ssslm.read_literal_mappings(SYNONYMS_PATH)
+            new = ssslm.read_literal_mappings(directory.joinpath(SYNONYMS_PATH.name))
+            self.assertEqual(len(old) + len(plan.synonyms), len(new))
+            self.assertEqual(sorted(new), new)
+
+    def test_plan_discipline_degrees(self):
+        """Test planning a degree in each discipline, named with the discipline's label."""
+        highest = get_highest()
+        plan = plan_discipline_degrees([PSYCHOLOGY, PSYCHOLOGY])
+        curie = f"QUALO:{highest + 1:07}"
+        self.assertEqual(
+            [(curie, "degree in Psychology", "QUALO:0000021", "academic degree by discipline")],
+            plan.terms,
+        )
+        self.assertEqual(
+            [(curie, "degree in Psychology", PSYCHOLOGY.curie, PSYCHOLOGY.name)], plan.disciplines
+        )
+        self.assertEqual([], plan.synonyms)
+
+    def test_read_requests(self):
+        """Test reading requests from a TSV file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory).joinpath("requests.tsv")
+            path.write_text(
+                "discipline\tdiscipline_label\thas_bachelor_of_science\thas_ba\thas_msc\thas_phd\n"
+                "mesh:D001699\tBiology\ttrue\t\t\tx\n"
+            )
+            self.assertEqual(
+                [DisciplineRequest(BIOLOGY, has_bachelor_of_science=True, has_phd=True)],
+                read_requests(path),
+            )
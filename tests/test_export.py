@@ -0,0 +1,56 @@
+"""Test exporting columnar tables."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from qualo.data import get_term_table
+from qualo.export import SCHEMAS, get_columns, write_tables
+
+
+class TestExport(unittest.TestCase):
+    """Test exporting columnar tables."""
+
+    def test_columns(self):
+        """Test the tables have the columns in their schemas and consistent contents."""
+        columns = get_columns()
+        self.assertEqual(set(SCHEMAS), set(columns))
+        for name, table in columns.items():
+            self.assertEqual(list(SCHEMAS[name]), list(table), msg=name)
+            self.assertEqual(1, len({len(values) for values in table.values()}), msg=name)
+
+        self.assertEqual(get_term_table().n_terms, len(columns["terms"]["curie"]))
+        ancestors = {
+            (curie, ancestor): distance
+            for curie, ancestor, distance in zip(*columns["ancestors"].values(), strict=True)
+        }
+        self.assertEqual(1, ancestors["QUALO:0000016", "QUALO:0000005"])
+        self.assertLess(1, ancestors["QUALO:0000016", "QUALO:0000002"])
+        self.assertIn("LABEL", columns["synonyms"]["scope"])
+
+    def test_write_jsonl(self):
+        """Test writing JSON lines files."""
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            paths = write_tables(root, export_format="jsonl")
+            self.assertEqual(len(SCHEMAS), len(paths))
+            with root.joinpath("terms.jsonl").open() as file:
+                record = json.loads(next(file))
+            self.assertEqual(["PATO:0000001"], record["parents"])
+
+    def test_write_parquet(self):
+        """Test writing Parquet files."""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            write_tables(root, export_format="parquet")
+            table = pq.read_table(
+                root.joinpath("synonyms.parquet"), filters=[("curie", "=", "QUALO:0000016")]
+            )
+            self.assertEqual("date32[day]", str(table.schema.field("date").type))
+            self.assertIn("doctor of philosophy", table.column("text").to_pylist())
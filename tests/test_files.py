@@ -0,0 +1,56 @@
+"""Tests for grounding files."""
+
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from qualo.files import ground_file, infer_format
+
+
+class TestGroundFile(unittest.TestCase):
+    """Test grounding files."""
+
+    def test_infer_format(self):
+        """Test inferring formats."""
+        self.assertEqual("tsv", infer_format(Path("x.tsv.gz")))
+        self.assertEqual("csv", infer_format(Path("x.csv")))
+        self.assertEqual("jsonl", infer_format(Path("x.jsonl.gz")))
+        with self.assertRaises(ValueError):
+            infer_format(Path("x.xlsx"))
+
+    def test_ground_file(self):
+        """Test grounding a gzipped TSV in several chunks and writing JSON lines."""
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = Path(directory).joinpath("input.tsv.gz")
+            output_path = Path(directory).joinpath("output.jsonl")
+            with gzip.open(input_path, "wt") as file:
+                print("id", "degree", sep="\t", file=file)
+                for i, text in enumerate(["PhD", "not a degree", "", "PhD", "BSc"]):
+                    print(i, text, sep="\t", file=file)
+
+            ground_file(input_path, output_path, "degree", chunksize=2, progress=False)
+
+            records = [json.loads(line) for line in output_path.read_text().splitlines()]
+        self.assertEqual([str(i) for i in range(5)], [record["id"] for record in records])
+        self.assertEqual(
+            ["QUALO:0000016", None, None, "QUALO:0000016", "QUALO:0000024"],
+            [record["degree_curie"] for record in records],
+        )
+        self.assertEqual("doctor of philosophy", records[0]["degree_label"])
+
+    def test_small_cache(self):
+        """Test cache hits aren't lost when the cache overflows in the middle of a chunk."""
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = Path(directory).joinpath("input.csv")
+            output_path = Path(directory).joinpath("output.csv")
+            input_path.write_text("degree\nPhD\nBSc\nPhD\nMSc\n")
+
+            ground_file(
+                input_path, output_path, "degree", chunksize=2, cache_size=2, progress=False
+            )
+
+            lines = output_path.read_text().splitlines()
+        self.assertEqual(5, len(lines))
+        self.assertTrue(lines[3].startswith("PhD,QUALO:0000016,"), msg=lines[3])
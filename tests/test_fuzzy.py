@@ -0,0 +1,60 @@
+"""Tests for approximate matching."""
+
+import unittest
+
+import ssslm
+from curies import NamedReference
+
+import qualo
+from qualo.fuzzy import ApproximateIndex, get_distance
+
+
+class TestApproximateIndex(unittest.TestCase):
+    """Test the approximate index."""
+
+    def setUp(self) -> None:
+        """Build a small index."""
+        self.index = ApproximateIndex(
+            [
+                ssslm.LiteralMapping(
+                    reference=NamedReference.from_curie("QUALO:0000024", "bachelor of science"),
+                    text="Bachelor of Science",
+                ),
+                ssslm.LiteralMapping(
+                    reference=NamedReference.from_curie("QUALO:0000025", "bachelor of arts"),
+                    text="Bachelor of Arts",
+                ),
+                ssslm.LiteralMapping(
+                    reference=NamedReference.from_curie("QUALO:0000057", "master of science"),
+                    text="Master of Science",
+                ),
+            ],
+            max_distance=2,
+        )
+
+    def test_distance(self):
+        """Test the bounded edit distance."""
+        self.assertEqual(0, get_distance("science", "science", 2))
+        self.assertEqual(1, get_distance("science", "scinece", 2))
+        self.assertEqual(2, get_distance("science", "sciense!", 2))
+        self.assertIsNone(get_distance("science", "silence", 1))
+
+    def test_match(self):
+        """Test typos in the prefix and in the suffix are found."""
+        for text in ["bachelour of science", "bahcelor of sciense", "BACHELOR OF SCIENCES"]:
+            with self.subTest(text=text):
+                match = self.index.get_best_match(text)
+                self.assertIsNotNone(match)
+                self.assertEqual("QUALO:0000024", match.curie)
+        self.assertIsNone(self.index.get_best_match("bachelor of fine arts"))
+
+    def test_short(self):
+        """Test short texts aren't matched approximately."""
+        self.assertIsNone(self.index.get_best_match("MSc"))
+
+    def test_ground(self):
+        """Test approximate matching is a fallback for grounding."""
+        self.assertIsNone(qualo.ground("doctor of philosphy"))
+        reference = qualo.ground("doctor of philosphy", max_distance=2)
+        self.assertIsNotNone(reference)
+        self.assertEqual("QUALO:0000016", reference.curie)
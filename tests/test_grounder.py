@@ -0,0 +1,90 @@
+"""Tests for updating grounders in place."""
+
+import unittest
+
+import ssslm
+from curies import NamedReference
+
+from qualo.data.grounder import MutableGrounder
+
+PHD = NamedReference.from_curie("QUALO:0000016", "doctor of philosophy")
+BSC = NamedReference.from_curie("QUALO:0000024", "bachelor of science")
+
+
+class TestMutableGrounder(unittest.TestCase):
+    """Test the mutable grounder."""
+
+    def setUp(self) -> None:
+        """Build a small grounder."""
+        self.grounder = MutableGrounder.from_literal_mappings(
+            [
+                ssslm.LiteralMapping(reference=PHD, text="PhD"),
+                ssslm.LiteralMapping(reference=BSC, text="BSc"),
+            ]
+        )
+
+    def test_add(self):
+        """Test adding a literal mapping."""
+        text = "Dottorato di ricerca"
+        self.assertIsNone(self.grounder.get_best_match(text))
+        self.grounder.add(ssslm.LiteralMapping(reference=PHD, text=text, language="it"))
+        self.assertEqual(PHD.curie, self.grounder.get_best_match(text).curie)
+
+    def test_remove(self):
+        """Test removing a literal mapping and a reference."""
+        self.assertEqual(1, self.grounder.remove(ssslm.LiteralMapping(reference=PHD, text="PhD")))
+        self.assertIsNone(self.grounder.get_best_match("PhD"))
+        self.assertEqual(0, self.grounder.remove(ssslm.LiteralMapping(reference=PHD, text="BSc")))
+        self.assertEqual(1, self.grounder.remove(BSC))
+        self.assertIsNone(self.grounder.get_best_match("BSc"))
+
+    def test_gilda_internals(self):
+        """Test the internals of :class:`gilda.Grounder` that updates rely on."""
+        grounder = self.grounder._grounder
+        self.assertIsInstance(grounder.entries, dict)
+        self.assertIn("phd", grounder.entries)
+        self.assertIn("phd", grounder._generate_lookups("PhD"))
+        self.assertEqual({"phd": {1}, "bsc": {1}}, grounder.prefix_index)
+
+        # an empty prefix index is rebuilt from the entries when it's next used
+        grounder._prefix_index = {}
+        self.assertEqual({"phd": {1}, "bsc": {1}}, grounder.prefix_index)
+
+    def test_copy_on_write(self):
+        """Test updates swap in new dictionaries and keep the prefix index up to date."""
+        grounder = self.grounder._grounder
+        self.assertEqual({"phd": {1}, "bsc": {1}}, grounder.prefix_index)
+        entries, prefix_index = grounder.entries, grounder._prefix_index
+
+        self.grounder.add(ssslm.LiteralMapping(reference=BSC, text="Bachelor of Science"))
+        self.grounder.add(ssslm.LiteralMapping(reference=BSC, text="Bachelor in Science"))
+        self.grounder.add(ssslm.LiteralMapping(reference=BSC, text="Bachelor"))
+        self.assertEqual({"phd", "bsc"}, set(entries))
+        self.assertEqual({"phd": {1}, "bsc": {1}}, prefix_index)
+        self.assertEqual({"phd": {1}, "bsc": {1}, "bachelor": {1, 3}}, grounder._prefix_index)
+        self.assertEqual(BSC.curie, self.grounder.get_best_match("Bachelor of Science").curie)
+
+        # a length is kept while another text with the same first word has it
+        self.grounder.remove(ssslm.LiteralMapping(reference=BSC, text="Bachelor of Science"))
+        self.assertEqual({"phd": {1}, "bsc": {1}, "bachelor": {1, 3}}, grounder._prefix_index)
+        self.grounder.remove(ssslm.LiteralMapping(reference=BSC, text="Bachelor in Science"))
+        self.assertEqual({"phd": {1}, "bsc": {1}, "bachelor": {1}}, grounder._prefix_index)
+        self.grounder.remove(BSC)
+        self.assertEqual({"phd": {1}}, grounder._prefix_index)
+        self.assertEqual({"phd"}, set(grounder.entries))
+
+    def test_index(self):
+        """Test the index has each term's text, in gilda's order."""
+        self.grounder.add(ssslm.LiteralMapping(reference=BSC, text="PHD"))
+        self.assertEqual(
+            {
+                "phd": [f"{PHD.curie}\tsynonym\tPhD", f"{BSC.curie}\tsynonym\tPHD"],
+                "bsc": [f"{BSC.curie}\tsynonym\tBSc"],
+            },
+            self.grounder.get_index(),
+        )
+
+    def test_lock(self):
+        """Test each grounder has its own lock."""
+        other = MutableGrounder.from_literal_mappings([])
+        self.assertIsNot(self.grounder._lock, other._lock)
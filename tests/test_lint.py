@@ -0,0 +1,32 @@
+"""Tests for linting the data tables."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from qualo.lint import TableSpec, check_table, get_specs, lint_specs
+
+
+class TestCheck(unittest.TestCase):
+    """Test checking tables without rewriting them."""
+
+    def test_data(self):
+        """Test the committed data tables are linted."""
+        for spec, problems in lint_specs(get_specs(), check=True, processes=1):
+            with self.subTest(path=spec.path.name):
+                self.assertEqual([], problems)
+
+    def test_problems(self):
+        """Test unsorted rows and duplicates are reported."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory).joinpath("test.tsv")
+            path.write_text("curie\tdiscipline\nb\tx\na\tx\na\tx\na\t\n")
+            spec = TableSpec(path, key=("curie", "discipline"), duplicate_subsets=("curie",))
+            self.assertEqual(
+                [
+                    "test.tsv:3: isn't sorted by curie, discipline",
+                    "test.tsv:4: is a duplicate",
+                    "test.tsv:5: is a duplicate",
+                ],
+                check_table(spec),
+            )
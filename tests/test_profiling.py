@@ -0,0 +1,61 @@
+"""Tests for instrumentation."""
+
+import os
+import subprocess
+import sys
+import unittest
+
+from qualo.profiling import (
+    ENVIRONMENT_VARIABLE,
+    _parse_environment,
+    benchmark_memory,
+    instrument,
+    log_sink,
+    stage,
+    to_prometheus,
+)
+
+
+class TestInstrument(unittest.TestCase):
+    """Test recording stages."""
+
+    def test_disabled(self):
+        """Test stages are not recorded outside of the context."""
+        with instrument() as recorder:
+            pass
+        with stage("outside"):
+            pass
+        self.assertEqual({}, recorder.stats)
+
+    def test_record(self):
+        """Test stages are recorded and sent to sinks."""
+        received = []
+        with instrument(received.append, trace_memory=True) as recorder:
+            for _ in range(3):
+                with stage("test"):
+                    _ = [0] * 1000
+        self.assertEqual([recorder], received)
+        self.assertEqual(3, recorder.stats["test"].calls)
+        self.assertIsNotNone(recorder.stats["test"].memory_bytes)
+        self.assertIn('qualo_stage_calls_total{stage="test"} 3', to_prometheus(recorder))
+
+    def test_environment(self):
+        """Test invalid sinks in the environment variable are skipped with a warning."""
+        with self.assertLogs("qualo.profiling", level="WARNING"):
+            sinks, trace_memory = _parse_environment("log,memory,nope=1")
+        self.assertEqual([log_sink], sinks)
+        self.assertTrue(trace_memory)
+
+        env = {**os.environ, ENVIRONMENT_VARIABLE: "nope"}
+        subprocess.run([sys.executable, "-c", "import qualo"], env=env, check=True)
+
+
+class TestBenchmarkMemory(unittest.TestCase):
+    """Test the memory benchmark."""
+
+    @unittest.skipUnless(sys.platform == "linux", "memory usage is read from /proc")
+    def test_preload(self):
+        """Test preloaded workers share most of their memory with the master process."""
+        _, usages = benchmark_memory(1, preload=True)
+        (usage,) = usages
+        self.assertLess(usage.private, usage.rss // 2)
@@ -0,0 +1,68 @@
+"""Tests for reloading data."""
+
+import threading
+import unittest
+from unittest import mock
+
+import qualo
+from qualo.data import BUNDLE_SOURCES, get_grounder, get_loaded_sources
+from qualo.data.bundle import get_digests
+from qualo.reload import DataWatcher, get_data_version, reload_data, start_reload
+
+
+class TestReload(unittest.TestCase):
+    """Test reloading data."""
+
+    def test_reload(self):
+        """Test the grounder is only swapped when reloading is needed or forced."""
+        version = get_data_version()
+        self.assertEqual(12, len(version.digest))
+        grounder = get_grounder()
+        self.assertFalse(reload_data())
+        self.assertIs(grounder, get_grounder())
+
+        start_reload(force=True).join()
+        self.assertIsNot(grounder, get_grounder())
+        self.assertEqual(version.digest, get_data_version().digest)
+        self.assertLessEqual(version.loaded, get_data_version().loaded)
+        self.assertEqual("QUALO:0000016", qualo.ground("PhD").curie)
+
+    def test_version_from_load(self):
+        """Test the version describes the data tables as they were read."""
+        sources = get_loaded_sources()
+        version = get_data_version()
+        self.assertEqual(sources.digests, version.digests)
+        self.assertEqual(sources.stats, version.stats)
+        self.assertEqual(get_digests(BUNDLE_SOURCES), version.digests)
+
+    def test_watcher_missing_file(self):
+        """Test the watcher keeps going when a table is briefly missing."""
+        changed = {"terms.tsv": [1, 2]}
+        stats = iter([FileNotFoundError(), changed, FileNotFoundError()])
+
+        def _get_stats(_sources):
+            value = next(stats, changed)
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        with self.assertLogs("qualo.reload", level="ERROR"):
+            self._assert_reloads(_get_stats)
+
+    def test_watcher_changed_before_start(self):
+        """Test the watcher reloads tables that changed after being read but before it started."""
+        get_data_version()
+        self._assert_reloads(lambda _sources: {"terms.tsv": [1, 2]})
+
+    def _assert_reloads(self, get_stats) -> None:
+        reloaded = threading.Event()
+        with (
+            mock.patch("qualo.reload.get_stats", side_effect=get_stats),
+            mock.patch("qualo.reload.reload_data", side_effect=lambda: reloaded.set()),
+        ):
+            watcher = DataWatcher(interval=0.01)
+            watcher.start()
+            self.assertTrue(reloaded.wait(5))
+            self.assertTrue(watcher.is_alive())
+            watcher.stop()
+            watcher.join()
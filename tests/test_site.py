@@ -0,0 +1,138 @@
+"""Test incremental site generation."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from qualo.site import MANIFEST_NAME, build_site, get_page_digests
+
+OBO = """\
+format-version: 1.2
+idspace: QUALO https://w3id.org/qualo/
+ontology: https://w3id.org/qualo/qualo.ttl
+
+[Term]
+id: PATO:0000001
+name: quality
+
+[Term]
+id: QUALO:0000001
+name: qualification
+is_a: PATO:0000001 ! quality
+
+[Term]
+id: QUALO:0000002
+name: academic degree
+is_a: QUALO:0000001 ! qualification
+
+[Term]
+id: QUALO:0000003
+name: license
+is_a: PATO:0000001 ! quality
+
+[Typedef]
+id: QUALO:1000002
+name: for discipline
+"""
+
+PAGES = [
+    "0000001/index.html",
+    "0000002/index.html",
+    "0000003/index.html",
+    "1000002/index.html",
+    "index.html",
+]
+
+
+class TestSite(unittest.TestCase):
+    """Test incremental site generation."""
+
+    def setUp(self) -> None:
+        """Set up a temporary site directory and a small OBO file."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        self.site = self.root.joinpath("docs")
+        self.obo_path = self.root.joinpath("qualo.obo")
+        self.obo_path.write_text(OBO)
+
+    def tearDown(self) -> None:
+        """Clean up the temporary site directory."""
+        self.directory.cleanup()
+
+    def _build(self, **kwargs):
+        return build_site(self.site, path=self.obo_path, processes=1, **kwargs)
+
+    def test_digests(self):
+        """Test a page's hash only changes when its inputs do."""
+        digests = get_page_digests(OBO)
+        self.assertEqual(PAGES, sorted(digests))
+
+        # renaming a term changes its page and its children's pages
+        changed = get_page_digests(OBO.replace("name: qualification", "name: qualifications"))
+        self.assertEqual(
+            {"0000001/index.html", "0000002/index.html", "index.html"},
+            {name for name in digests if digests[name] != changed[name]},
+        )
+
+        # relations are shown on every page
+        changed = get_page_digests(OBO.replace("for discipline", "in discipline"))
+        self.assertTrue(all(digests[name] != changed[name] for name in digests))
+
+    def test_without_manifest(self) -> None:
+        """Test a site rendered before there was a manifest is fully rendered."""
+        for name in PAGES:
+            self.site.joinpath(name).parent.mkdir(parents=True, exist_ok=True)
+            self.site.joinpath(name).write_text("stale")
+        self.site.joinpath("source").mkdir()
+
+        result = self._build()
+        self.assertTrue(result.rendered)
+        self.assertEqual(PAGES, result.written)
+        for name in PAGES:
+            self.assertNotEqual("stale", self.site.joinpath(name).read_text())
+        self.assertIn("for discipline", self.site.joinpath("1000002", "index.html").read_text())
+        self.assertTrue(self.site.joinpath("source").is_dir())
+        manifest = json.loads(self.site.joinpath(MANIFEST_NAME).read_text())
+        self.assertEqual(set(PAGES), set(manifest["pages"]))
+
+    def test_incremental(self) -> None:
+        """Test only the pages whose inputs changed are rendered."""
+        self.assertEqual(PAGES, self._build().written)
+
+        # nothing is parsed when the OBO file didn't change
+        result = self._build()
+        self.assertFalse(result.rendered)
+        self.assertEqual(len(PAGES), result.unchanged)
+
+        # an unchanged term's page isn't rendered again
+        license_path = self.site.joinpath("0000003", "index.html")
+        license_path.write_text("not rendered again")
+        self.obo_path.write_text(OBO.replace("name: academic degree", "name: degree"))
+        result = self._build()
+        self.assertEqual(["0000001/index.html", "0000002/index.html", "index.html"], result.written)
+        self.assertEqual("not rendered again", license_path.read_text())
+        self.assertIn("degree", self.site.joinpath("0000001", "index.html").read_text())
+
+        # a page that's missing on disk is rendered again
+        license_path.unlink()
+        self.assertEqual(["0000003/index.html"], self._build().written)
+
+        # removing a term deletes its page
+        self.site.joinpath("source").mkdir()
+        self.obo_path.write_text(OBO.split("[Term]\nid: QUALO:0000003")[0] + OBO.split("\n\n")[-1])
+        result = self._build()
+        self.assertEqual(["0000003/index.html"], result.deleted)
+        self.assertFalse(self.site.joinpath("0000003").exists())
+        self.assertTrue(self.site.joinpath("source").is_dir())
+
+        self.assertEqual(len(PAGES) - 1, len(self._build(force=True).written))
+
+    def test_parallel(self) -> None:
+        """Test rendering in several processes gives the same pages."""
+        self._build()
+        expected = {name: self.site.joinpath(name).read_text() for name in PAGES}
+        result = build_site(self.site, path=self.obo_path, processes=2, force=True)
+        self.assertEqual(PAGES, result.written)
+        for name in PAGES:
+            self.assertEqual(expected[name], self.site.joinpath(name).read_text())
@@ -0,0 +1,51 @@
+"""Tests for referential integrity validation."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from qualo.validate import validate
+
+TERMS = """\
+curie\tlabel\tparent_1\tparent_1_label\tparent_2\tparent_2_label
+QUALO:0000001\tqualification\tPATO:0000001\tquality\t\t
+QUALO:0000002\tdegree\tQUALO:0000003\tlevel 3\t\t
+QUALO:0000003\tlevel 3\tQUALO:0000002\tdegree\tQUALO:0000009\tmissing
+QUALO:0000003\tlevel 3 again\t\t\t\t
+"""
+
+SYNONYMS = """\
+text\tcurie\tname\tpredicate
+qual\tQUALO:0000001\tqualifications\toboInOwl:hasExactSynonym
+thing\tQUALO:0000404\tthing\toboInOwl:hasExactSynonym
+"""
+
+
+class TestValidate(unittest.TestCase):
+    """Test the validator."""
+
+    def test_data(self):
+        """Test the committed data has no errors."""
+        report = validate()
+        self.assertEqual([], report.errors)
+        self.assertTrue(report.passes())
+
+    def test_issues(self):
+        """Test each rule on a small set of tables."""
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            root.joinpath("terms.tsv").write_text(TERMS)
+            root.joinpath("synonyms.tsv").write_text(SYNONYMS)
+            report = validate({name: root.joinpath(name) for name in ["terms.tsv", "synonyms.tsv"]})
+        self.assertEqual(
+            {
+                ("duplicate-term", "terms.tsv", 5, "QUALO:0000003"),
+                ("missing-parent", "terms.tsv", 4, "QUALO:0000009"),
+                ("label-mismatch", "synonyms.tsv", 2, "QUALO:0000001"),
+                ("missing-term", "synonyms.tsv", 3, "QUALO:0000404"),
+                ("cycle", "terms.tsv", None, "QUALO:0000002"),
+            },
+            {(i.rule, i.table, i.line, i.curie) for i in report.issues},
+        )
+        self.assertFalse(report.passes())
+        self.assertEqual(1, report.to_dict()["counts"]["cycle"])